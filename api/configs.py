@@ -1,4 +1,8 @@
 # api/configs.py
+import os
+import json
+from typing import Dict, Optional
+
 def get_nietzsche_system_prompt() -> str:
     """
     Returns the system prompt for the Nietzsche RAG chatbot.
@@ -34,3 +38,44 @@ Whenever uncertain, channel Nietzsche’s spirit by asking:
 Proceed with conversation: challenge, inspire, provoke.
     """
 
+
+def get_corpus_registry(default_collection: str = "nietzsche_books", registry_path: Optional[str] = None) -> Dict[str, dict]:
+    """
+    Returns the corpora the API can answer from, keyed by the name requests use.
+
+    Each entry holds the ``collection`` (or alias) to retrieve from, the ``author``
+    named in the RAG prompt and the persona ``system_prompt``. The built-in
+    ``"nietzsche"`` corpus is always present; more are read from a JSON file:
+
+        {"schopenhauer": {"collection": "schopenhauer_books", "author": "Schopenhauer",
+                          "system_prompt_file": "prompts/schopenhauer.txt"}}
+
+    ``system_prompt`` may be given inline instead of ``system_prompt_file``
+    (relative paths are resolved against the registry file).
+    """
+    registry = {
+        "nietzsche": {
+            "collection": default_collection,
+            "author": "Nietzsche",
+            "system_prompt": get_nietzsche_system_prompt(),
+        }
+    }
+    if not registry_path:
+        return registry
+
+    with open(registry_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(registry_path))
+    for name, entry in entries.items():
+        if "collection" not in entry:
+            raise ValueError(f"Corpus {name!r} in {registry_path} has no collection")
+        system_prompt = entry.get("system_prompt")
+        if "system_prompt_file" in entry:
+            with open(os.path.join(base_dir, entry["system_prompt_file"]), "r", encoding="utf-8") as f:
+                system_prompt = f.read()
+        registry[name] = {
+            "collection": entry["collection"],
+            "author": entry.get("author", name.title()),
+            "system_prompt": system_prompt,
+        }
+    return registry
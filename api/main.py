@@ -1,11 +1,16 @@
 import os
 import logging
+import asyncio
 from typing import List, Dict, Optional
-from fastapi import FastAPI, HTTPException
+import uuid
+from fastapi import FastAPI, File, Header, HTTPException, UploadFile
 from pydantic import BaseModel
 from dotenv import load_dotenv 
 import chromadb
-from api.query import rag_query_stream, rag_query, query_chromadb
+from api.query import rag_query_stream, rag_query, query_chromadb, get_backend, get_reranker, build_where, get_embedding_batcher
+from api.query import get_index_handle, swap_index, start_alias_watcher, get_ingest_queue, INGEST_UPLOAD_DIR
+from api.query import resolve_corpus, collection_cache_stats, open_index_records, CORPORA
+from api.query import SNAPSHOT_PATH, NUMPY_INDEX_DIR, LEXICAL_INDEX_DIR
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 
@@ -18,6 +23,7 @@ logger = logging.getLogger(__name__)
 
 PERSIST_DIR = os.getenv("PERSIST_DIR", r"D:\Documents\chromadb\nietzsche_db")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "nietzsche_books")
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # Unset disables the /admin endpoints
 
 # ---------- FastAPI App ----------
 app = FastAPI(
@@ -40,6 +46,9 @@ class QueryRequest(BaseModel):
     """Request model for RAG queries."""
     prompt: str
     n_results: Optional[int] = 5
+    source: Optional[str] = None  # Restrict retrieval to one book, e.g. "ecce_homo.txt"
+    chapter: Optional[int] = None  # Restrict retrieval to one chapter of the book(s)
+    corpus: Optional[str] = None  # Registered corpus to answer from (default: DEFAULT_CORPUS)
 
 class QueryResponse(BaseModel):
     """Response model for RAG queries."""
@@ -52,11 +61,13 @@ class StreamingResponseModel(BaseModel):
 # ---------- Startup ----------
 @app.on_event("startup")
 def startup_event():
-    """Initialize ChromaDB client on startup."""
-    global chroma_client, chroma_collection
-    chroma_client = chromadb.PersistentClient(path=PERSIST_DIR)
-    chroma_collection = chroma_client.get_collection(name=COLLECTION_NAME)
-    logger.info("ChromaDB client initialized successfully.")
+    """Open the retrieval backend, reranker and embedding batcher on startup so the first request does not pay for them."""
+    backend = get_backend(PERSIST_DIR, COLLECTION_NAME)
+    logger.info(f"Retrieval backend initialized successfully ({backend.count()} chunks).")
+    get_reranker()
+    get_embedding_batcher()
+    for corpus in CORPORA.values():
+        start_alias_watcher(PERSIST_DIR, corpus["collection"])
 
 # ---------- Endpoints ----------
 @app.get("/health")
@@ -64,15 +75,126 @@ def health_check():
     """Health check endpoint to verify API is running."""
     return {"status": "API is working just fine"}
 
+@app.get("/corpora")
+def list_corpora():
+    """Corpora requests can name, with the collection and author behind each."""
+    return {name: {"collection": c["collection"], "author": c["author"]} for name, c in CORPORA.items()}
+
+@app.get("/metrics/collections")
+def collection_metrics():
+    """Open retrieval backends (LRU order), hits, opens, evictions and load times."""
+    return collection_cache_stats()
+
+def _corpus_or_404(name: Optional[str]) -> dict:
+    try:
+        return resolve_corpus(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/metrics/memory")
+def memory_metrics():
+    """
+    Memory of the worker serving this request: unique vs shared resident memory,
+    and how much of each memory-mapped index file is resident. With
+    ``RETRIEVAL_BACKEND=snapshot`` (or ``numpy``) the index pages are shared by all
+    ``uvicorn --workers`` processes; sum ``pss_mb`` over workers for the real total.
+    """
+    from utils.memory import mapped_files_report, memory_report
+
+    prefixes = [PERSIST_DIR, SNAPSHOT_PATH, NUMPY_INDEX_DIR, LEXICAL_INDEX_DIR]
+    for record in open_index_records():
+        prefixes += [record.get("snapshot_path"), record.get("numpy_index_dir"), record.get("lexical_index_dir")]
+    return {**memory_report(), "index_files": mapped_files_report(prefixes)}
+
+def _check_admin(token: Optional[str]):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/index")
+def index_status(corpus: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """Version of a corpus's collection this worker serves and how many retrievals are using it."""
+    _check_admin(x_admin_token)
+    collection_name = _corpus_or_404(corpus)["collection"]
+    handle = get_index_handle(PERSIST_DIR, collection_name)
+    return {"alias": collection_name, "version": handle.version, "in_flight": handle.in_flight, "record": handle.record}
+
+@app.post("/admin/reload-index")
+async def reload_index(corpus: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+    """
+    Switch this worker to the version a corpus's alias currently points to. Opening
+    and draining run in a thread, so queries keep being served during the swap.
+    """
+    _check_admin(x_admin_token)
+    collection_name = _corpus_or_404(corpus)["collection"]
+    try:
+        return await asyncio.to_thread(swap_index, PERSIST_DIR, collection_name)
+    except Exception as e:
+        logger.exception(f"Error swapping the index of {collection_name}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _save_upload(data: bytes, filename: str) -> str:
+    os.makedirs(INGEST_UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(INGEST_UPLOAD_DIR, f"{uuid.uuid4().hex}_{os.path.basename(filename)}")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+@app.post("/ingest", status_code=202)
+async def ingest_endpoint(
+    file: UploadFile = File(...),
+    corpus: Optional[str] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """
+    Queue an EPUB or text book for ingestion into the served collection. Returns
+    the job immediately; conversion, chunking and embedding run on a background
+    worker thread, never on the event loop. Poll ``GET /ingest/{job_id}``.
+
+    Only the default corpus takes uploads; other corpora are rejected rather than
+    silently written into the default collection.
+    """
+    _check_admin(x_admin_token)
+    if _corpus_or_404(corpus)["collection"] != COLLECTION_NAME:
+        raise HTTPException(status_code=400, detail=f"Uploads are only ingested into the default corpus ({COLLECTION_NAME})")
+    filename = file.filename or ""
+    if not filename.lower().endswith((".txt", ".epub")):
+        raise HTTPException(status_code=400, detail="Only .txt and .epub uploads are supported")
+    data = await file.read()
+    upload_path = await asyncio.to_thread(_save_upload, data, filename)
+    job = get_ingest_queue().submit(filename, upload_path)
+    return job.to_dict()
+
+@app.get("/ingest")
+def ingest_status(x_admin_token: Optional[str] = Header(None)):
+    """Queue depth, overall ingestion throughput and the progress of recent jobs."""
+    _check_admin(x_admin_token)
+    ingest_queue = get_ingest_queue()
+    return {**ingest_queue.stats(), "recent_jobs": ingest_queue.jobs()}
+
+@app.get("/ingest/{job_id}")
+def ingest_job_status(job_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Progress and throughput of one ingest job."""
+    _check_admin(x_admin_token)
+    job = get_ingest_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingest job")
+    return job.to_dict()
+
 @app.post("/prompt", response_model=QueryResponse)
 async def rag_endpoint(request: QueryRequest):
     """Endpoint to handle RAG queries."""
+    corpus = _corpus_or_404(request.corpus)
     try:
-        answer = rag_query(
+        answer = await rag_query(
             request.prompt,
             persist_directory=PERSIST_DIR,
-            collection_name=COLLECTION_NAME,
-            n_results=request.n_results
+            collection_name=corpus["collection"],
+            n_results=request.n_results,
+            where=build_where(request.source, request.chapter),
+            system_prompt=corpus["system_prompt"],
+            author=corpus["author"],
         )
         return QueryResponse(answer=answer)
     except EnvironmentError as e:
@@ -84,13 +206,17 @@ async def rag_endpoint(request: QueryRequest):
 @app.post("/prompt-stream")
 async def rag_stream_endpoint(request: QueryRequest):
     """Endpoint to handle streaming RAG queries."""
+    corpus = _corpus_or_404(request.corpus)
     try:
         return StreamingResponse(
             rag_query_stream(
                 request.prompt,
                 persist_directory=PERSIST_DIR,
-                collection_name=COLLECTION_NAME,
-                n_results=request.n_results
+                collection_name=corpus["collection"],
+                n_results=request.n_results,
+                where=build_where(request.source, request.chapter),
+                system_prompt=corpus["system_prompt"],
+                author=corpus["author"],
             ),
             media_type="text/plain"
         )
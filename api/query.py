@@ -8,10 +8,17 @@ from groq import Groq, GroqError
 import chromadb
 from chromadb.config import Settings
 from fastapi.responses import StreamingResponse
-from api.configs import get_nietzsche_system_prompt
+from api.configs import get_corpus_registry
+from vector_DB.aliases import alias_path, read_alias
+from vector_DB.backends import RetrievalBackend, open_backend
+from vector_DB.chroma_client import set_memory_limit
 from typing import AsyncGenerator
+from collections import OrderedDict
+from contextlib import contextmanager
 import json
+import time
 import asyncio
+import threading
 
 # Load environment variables from .env
 load_dotenv()
@@ -25,7 +32,33 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 PERSIST_DIR = os.getenv("PERSIST_DIR", r"D:\Documents\chromadb\nietzsche_db")
 COLLECTION_NAME = os.getenv("COLLECTION_NAME", "nietzsche_books")
 MODEL_NAME = os.getenv("GROQ_MODEL", "meta-llama/llama-4-scout-17b-16e-instruct")
-system_prompt = get_nietzsche_system_prompt()
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "chroma")  # "chroma", "numpy" or "snapshot"
+NUMPY_INDEX_DIR = os.getenv("NUMPY_INDEX_DIR", os.path.join(PERSIST_DIR, "numpy_index"))
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(PERSIST_DIR, f"{COLLECTION_NAME}.snap"))
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "0") == "1"  # Fuse BM25 with vector search
+LEXICAL_INDEX_DIR = os.getenv("LEXICAL_INDEX_DIR")  # Default: "{collection}_bm25" next to the DB
+RERANK_MODEL_DIR = os.getenv("RERANK_MODEL_DIR")  # ONNX cross-encoder dir; unset disables reranking
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))  # Chunks retrieved before reranking
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "3"))  # Chunks kept after reranking
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "8192"))
+EMBED_BATCHING = os.getenv("EMBED_BATCHING", "1") == "1"  # Micro-batch query embeddings across requests
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "32"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "2"))
+EMBED_INTRA_OP_THREADS = int(os.getenv("EMBED_INTRA_OP_THREADS", "0")) or None  # 0 = all cores
+ALIAS_POLL_SECONDS = float(os.getenv("ALIAS_POLL_SECONDS", "0"))  # >0 watches the alias file for swaps
+DRAIN_TIMEOUT_SECONDS = float(os.getenv("DRAIN_TIMEOUT_SECONDS", "30"))
+INGEST_BOOKS_FOLDER = os.getenv("INGEST_BOOKS_FOLDER", os.path.join(PERSIST_DIR, "books"))  # Uploaded books land here
+INGEST_UPLOAD_DIR = os.getenv("INGEST_UPLOAD_DIR", os.path.join(PERSIST_DIR, "uploads"))
+INGEST_MAX_CHUNKS_PER_S = float(os.getenv("INGEST_MAX_CHUNKS_PER_S", "200"))  # 0 = unthrottled
+MAX_OPEN_COLLECTIONS = int(os.getenv("MAX_OPEN_COLLECTIONS", "4"))  # LRU bound on open retrieval backends
+# Chroma keeps every opened collection's HNSW index in its own process-wide cache, whatever
+# handles are evicted here: bound that cache too (LRU over loaded segments, 0 = unbounded)
+CHROMA_MEMORY_LIMIT_BYTES = int(os.getenv("CHROMA_MEMORY_LIMIT_BYTES", str(2 * 2**30)))
+set_memory_limit(CHROMA_MEMORY_LIMIT_BYTES)
+CORPORA_FILE = os.getenv("CORPORA_FILE")  # JSON registry of extra corpora (see api.configs)
+CORPORA = get_corpus_registry(COLLECTION_NAME, CORPORA_FILE)
+DEFAULT_CORPUS = os.getenv("DEFAULT_CORPUS", "nietzsche")
+system_prompt = CORPORA[DEFAULT_CORPUS]["system_prompt"]
 # ---------- FastAPI App ----------
 app = FastAPI(
     title="Nietzsche RAG API",
@@ -37,6 +70,9 @@ app = FastAPI(
 class QueryRequest(BaseModel):
     prompt: str
     n_results: Optional[int] = 3
+    source: Optional[str] = None
+    chapter: Optional[int] = None
+    corpus: Optional[str] = None
 
 class QueryResponse(BaseModel):
     answer: str
@@ -44,32 +80,379 @@ class QueryResponse(BaseModel):
 class StreamingResponseModel(BaseModel):
     chunk: str
 
-def query_chromadb(persist_directory, collection_name, query_text, n_results=3):
+class IndexHandle:
     """
-    Query a ChromaDB persisted database.
+    One opened version of a collection plus the number of requests using it.
+
+    A swap replaces the handle for new requests; the old one is dropped only once
+    its in-flight retrievals have drained.
+    """
+
+    def __init__(self, version: str, backend: RetrievalBackend, record: dict):
+        self.version = version
+        self.backend = backend
+        self.record = record
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            self.in_flight += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self._cond.notify_all()
+
+    def wait_drained(self, timeout: float) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self.in_flight == 0, timeout=timeout)
+
+# Handles are opened once per process and reused across requests. Only the
+# MAX_OPEN_COLLECTIONS most recently used stay open, so corpora that are rarely
+# asked about do not pin their index memory. With the chroma backend the HNSW
+# indexes live in Chroma's segment cache, bounded by CHROMA_MEMORY_LIMIT_BYTES.
+_handles: "OrderedDict[tuple, IndexHandle]" = OrderedDict()
+_handles_lock = threading.Lock()
+_open_locks: Dict[tuple, threading.Lock] = {}
+_handle_stats = {"hits": 0, "opens": 0, "evictions": 0, "open_ms_total": 0.0, "collections": {}}
+
+def open_index_handle(persist_directory: str, collection_name: str) -> IndexHandle:
+    """
+    Open the version ``collection_name`` currently resolves to.
+
+    ``collection_name`` is looked up as an alias first (``vector_DB.aliases``); without
+    an alias file it is served as a plain collection name. Index artifacts not named
+    by the alias record default to the ``*_INDEX_DIR``/``SNAPSHOT_PATH`` settings for
+    ``COLLECTION_NAME`` and to ``{collection}_numpy_index``/``{collection}.snap`` next
+    to the DB for other corpora.
+    """
+    record = read_alias(persist_directory, collection_name) or {
+        "version": collection_name, "collection": collection_name,
+    }
+    collection = record["collection"]
+    default_corpus = collection_name == COLLECTION_NAME
+    lexical_index_dir = None
+    if HYBRID_SEARCH:
+        lexical_index_dir = (
+            record.get("lexical_index_dir") or (LEXICAL_INDEX_DIR if default_corpus else None)
+            or os.path.join(persist_directory, f"{collection}_bm25")
+        )
+    index_dir = record.get("numpy_index_dir") or (
+        NUMPY_INDEX_DIR if default_corpus else os.path.join(persist_directory, f"{collection}_numpy_index")
+    )
+    snapshot_path = record.get("snapshot_path") or (
+        SNAPSHOT_PATH if default_corpus else os.path.join(persist_directory, f"{collection}.snap")
+    )
+
+    start = time.perf_counter()
+    backend = open_backend(
+        RETRIEVAL_BACKEND,
+        persist_directory=persist_directory,
+        collection_name=collection,
+        index_dir=index_dir,
+        snapshot_path=snapshot_path,
+        lexical_index_dir=lexical_index_dir,
+    )
+    open_ms = (time.perf_counter() - start) * 1000
+    logger.info(
+        f"Opened {RETRIEVAL_BACKEND} retrieval backend for {collection_name} (version {record['version']})"
+        f"{' with BM25 fusion' if HYBRID_SEARCH else ''} in {open_ms:.0f} ms"
+    )
+    handle = IndexHandle(record["version"], backend, record)
+    handle.open_ms = open_ms
+    return handle
+
+def _evict_unused(keep: Optional[tuple]) -> None:
+    """Close least recently used handles beyond ``MAX_OPEN_COLLECTIONS`` (caller holds the lock)."""
+    for key in list(_handles):
+        if len(_handles) <= MAX_OPEN_COLLECTIONS:
+            return
+        handle = _handles[key]
+        if key == keep or handle.in_flight:
+            continue  # Busy handles stay until a later eviction pass
+        del _handles[key]
+        _handle_stats["evictions"] += 1
+        logger.info(f"Evicted retrieval backend for {key[2]} (version {handle.version})")
+
+def get_index_handle(persist_directory: str, collection_name: str) -> IndexHandle:
+    """
+    Return the handle currently serving ``collection_name``, opening it on first use.
+
+    Opening happens outside the handle lock (one opener per collection), so a cold
+    corpus loading its index does not stall queries on the others.
+    """
+    key = (RETRIEVAL_BACKEND, persist_directory, collection_name)
+    with _handles_lock:
+        handle = _handles.get(key)
+        if handle is not None:
+            _handles.move_to_end(key)
+            _handle_stats["hits"] += 1
+            return handle
+        open_lock = _open_locks.setdefault(key, threading.Lock())
+
+    with open_lock:
+        with _handles_lock:
+            handle = _handles.get(key)
+        if handle is None:
+            handle = open_index_handle(persist_directory, collection_name)
+            with _handles_lock:
+                _handles[key] = handle
+                stats = _handle_stats["collections"].setdefault(collection_name, {"opens": 0, "last_open_ms": 0.0})
+                stats["opens"] += 1
+                stats["last_open_ms"] = round(handle.open_ms, 1)
+                _handle_stats["opens"] += 1
+                _handle_stats["open_ms_total"] += handle.open_ms
+                _evict_unused(keep=key)
+        return handle
+
+@contextmanager
+def acquire_index(persist_directory: str, collection_name: str):
+    """Pin the current handle for the duration of a retrieval."""
+    while True:
+        handle = get_index_handle(persist_directory, collection_name)
+        with _handles_lock:
+            # Evicted or swapped between lookup and pinning: look it up again
+            if _handles.get((RETRIEVAL_BACKEND, persist_directory, collection_name)) is handle:
+                handle.acquire()
+                break
+    try:
+        yield handle
+    finally:
+        handle.release()
+        if len(_handles) > MAX_OPEN_COLLECTIONS:  # Evictions skipped while this handle was busy
+            with _handles_lock:
+                _evict_unused(keep=None)
+
+def get_backend(persist_directory: str, collection_name: str) -> RetrievalBackend:
+    """Return the retrieval backend currently serving ``collection_name``."""
+    return get_index_handle(persist_directory, collection_name).backend
+
+def open_index_records() -> List[dict]:
+    """Alias records of the currently open collections (artifact paths per version)."""
+    with _handles_lock:
+        return [handle.record for handle in _handles.values()]
+
+def collection_cache_stats() -> dict:
+    """Open collections in LRU order plus open/eviction/hit counters and load times."""
+    with _handles_lock:
+        return {
+            "max_open": MAX_OPEN_COLLECTIONS,
+            "open": [
+                {"collection": key[2], "version": handle.version, "in_flight": handle.in_flight}
+                for key, handle in _handles.items()
+            ],
+            "hits": _handle_stats["hits"],
+            "opens": _handle_stats["opens"],
+            "evictions": _handle_stats["evictions"],
+            "avg_open_ms": round(_handle_stats["open_ms_total"] / _handle_stats["opens"], 1) if _handle_stats["opens"] else 0.0,
+            "collections": {name: dict(stats) for name, stats in _handle_stats["collections"].items()},
+        }
+
+def swap_index(persist_directory: str, collection_name: str, drain_timeout: float = DRAIN_TIMEOUT_SECONDS) -> dict:
+    """
+    Switch ``collection_name`` to the version its alias points to now.
+
+    The new version is opened and warmed up before the switch, so requests never
+    wait for it; the switch itself is a dict assignment under the handle lock.
+    Requests already retrieving from the old version finish on it (streams only
+    need the index before their first token), and caches keyed on old chunks are
+    cleared.
+
+    Returns:
+        dict: Previous and current versions, whether the old handle drained in time
+        and how long opening the new version took.
+    """
+    key = (RETRIEVAL_BACKEND, persist_directory, collection_name)
+    start = time.perf_counter()
+    new = open_index_handle(persist_directory, collection_name)
+    new.backend.query(query_texts=["warm up"], n_results=1)  # Load HNSW / fault in pages now
+    open_ms = (time.perf_counter() - start) * 1000
+
+    with _handles_lock:
+        old = _handles.get(key)
+        _handles[key] = new
+
+    reranker = get_reranker()
+    if reranker is not None:
+        reranker.clear_cache()
+
+    drained = old.wait_drained(drain_timeout) if old is not None else True
+    logger.info(
+        f"Swapped {collection_name}: {old.version if old else None} -> {new.version} "
+        f"(opened in {open_ms:.0f} ms, old handle {'drained' if drained else 'still busy'})"
+    )
+    return {
+        "alias": collection_name,
+        "previous": old.version if old else None,
+        "current": new.version,
+        "drained": drained,
+        "open_ms": round(open_ms, 1),
+    }
+
+def start_alias_watcher(persist_directory: str, collection_name: str,
+                        interval: float = ALIAS_POLL_SECONDS) -> Optional[threading.Thread]:
+    """
+    Poll the alias file and swap when it points to a new version.
+
+    Every API worker runs its own watcher, so ``uvicorn --workers N`` deployments
+    switch on all workers without an admin call per process.
+    """
+    if interval <= 0:
+        return None
+
+    def watch():
+        path = alias_path(persist_directory, collection_name)
+        last_mtime = os.path.getmtime(path) if os.path.exists(path) else None
+        while True:
+            time.sleep(interval)
+            try:
+                mtime = os.path.getmtime(path) if os.path.exists(path) else None
+                if mtime == last_mtime:
+                    continue
+                last_mtime = mtime
+                record = read_alias(persist_directory, collection_name)
+                with _handles_lock:
+                    handle = _handles.get((RETRIEVAL_BACKEND, persist_directory, collection_name))
+                # A collection that is not open picks up the new version when it is next opened
+                if record and handle is not None and record["version"] != handle.version:
+                    swap_index(persist_directory, collection_name)
+            except Exception:
+                logger.exception(f"Alias watcher failed to swap {collection_name}")
+
+    thread = threading.Thread(target=watch, name=f"alias-watcher-{collection_name}", daemon=True)
+    thread.start()
+    return thread
+
+_reranker = None
+
+def get_reranker():
+    """Return the process-wide cross-encoder, or None when ``RERANK_MODEL_DIR`` is unset."""
+    global _reranker
+    if _reranker is None and RERANK_MODEL_DIR:
+        from vector_DB.rerank import CrossEncoderReranker
+
+        _reranker = CrossEncoderReranker(RERANK_MODEL_DIR, cache_size=RERANK_CACHE_SIZE)
+        logger.info(f"Loaded cross-encoder reranker from {RERANK_MODEL_DIR}")
+    return _reranker
+
+_embedding_batcher = None
+
+def get_embedding_batcher():
+    """Return the process-wide query embedding batcher, or None when ``EMBED_BATCHING`` is off."""
+    global _embedding_batcher
+    if _embedding_batcher is None and EMBED_BATCHING:
+        from vector_DB.batcher import get_batcher
+        from vector_DB.embeddings import get_embedding_function
+
+        # The embedding function (an ONNX session) is only built with the batcher, not per request
+        _embedding_batcher = get_batcher(
+            get_embedding_function(intra_op_threads=EMBED_INTRA_OP_THREADS),
+            max_batch_size=EMBED_MAX_BATCH,
+            max_wait_ms=EMBED_MAX_WAIT_MS,
+        )
+    return _embedding_batcher
+
+_ingest_queue = None
+
+def get_ingest_queue():
+    """
+    Return the process-wide background ingestion queue for uploaded books.
+
+    Jobs write into the default corpus (the collection its alias currently points
+    to), chunked and deduplicated with the settings recorded in that collection's
+    manifest. Once a job is done, the BM25 index is rebuilt (with ``HYBRID_SEARCH``) and the serving
+    index is swapped so the next queries see the new chunks.
+    """
+    global _ingest_queue
+    if _ingest_queue is None:
+        from vector_DB.ingest_queue import IngestQueue
+
+        def serving_collection():
+            return get_index_handle(PERSIST_DIR, COLLECTION_NAME).record["collection"]
+
+        def refresh_index(job):
+            if HYBRID_SEARCH:
+                from vector_DB.chroma_db import get_collection
+                from vector_DB.lexical import build_lexical_index
+
+                # The build goes into a new version directory and the index path is switched to it
+                # atomically, so requests still on the open handle keep their mapped postings; the
+                # swap then opens the new build.
+                record = get_index_handle(PERSIST_DIR, COLLECTION_NAME).record
+                build_lexical_index(
+                    get_collection(PERSIST_DIR, record["collection"]),
+                    record.get("lexical_index_dir") or LEXICAL_INDEX_DIR
+                    or os.path.join(PERSIST_DIR, f"{record['collection']}_bm25"),
+                )
+                swap_index(PERSIST_DIR, COLLECTION_NAME)
+
+        _ingest_queue = IngestQueue(
+            INGEST_BOOKS_FOLDER,
+            PERSIST_DIR,
+            serving_collection,
+            max_chunks_per_s=INGEST_MAX_CHUNKS_PER_S,
+            on_job_done=refresh_index,
+        )
+    return _ingest_queue
+
+def resolve_corpus(corpus: Optional[str] = None) -> dict:
+    """
+    Registry entry (``collection``, ``author``, ``system_prompt``) for a corpus name.
+
+    Raises:
+        KeyError: If the corpus is not registered.
+    """
+    name = corpus or DEFAULT_CORPUS
+    if name not in CORPORA:
+        raise KeyError(f"Unknown corpus {name!r}; available: {', '.join(sorted(CORPORA))}")
+    return CORPORA[name]
+
+def build_where(source: Optional[str] = None, chapter: Optional[int] = None) -> Optional[dict]:
+    """
+    Metadata filter restricting retrieval to one book and/or chapter.
+
+    Args:
+        source (str): Book file name as ingested, e.g. ``"ecce_homo.txt"`` (the
+            ``.txt`` extension may be omitted).
+        chapter (int): Chapter number within the book (0 = front matter).
+
+    Returns:
+        dict: Chroma-style ``where`` filter, or None when nothing is restricted.
+    """
+    clauses = []
+    if source:
+        clauses.append({"source": source if source.endswith(".txt") else f"{source}.txt"})
+    if chapter is not None:
+        clauses.append({"chapter": chapter})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def query_chromadb(persist_directory, collection_name, query_text, n_results=3, where=None, query_embedding=None):
+    """
+    Query the configured retrieval backend (Chroma or the in-process NumPy index).
 
     Args:
         persist_directory (str): Path to the ChromaDB storage folder.
         collection_name (str): Name of the collection to query.
         query_text (str): The text you want to search for.
         n_results (int): Number of top results to return.
+        where (dict): Optional metadata filter (see ``build_where``).
+        query_embedding (list): Precomputed embedding of ``query_text``; the text is
+            then only used for lexical matching.
 
     Returns:
         dict: Query results containing IDs, documents, and metadata.
     """
-    # Load the persisted ChromaDB client
-    client = chromadb.PersistentClient(path=PERSIST_DIR)
-
-    # Get the collection
-    collection = client.get_collection(name=COLLECTION_NAME)
-
-    # Perform the query
-    results = collection.query(
-        query_texts=[query_text],
-        n_results=n_results
-    )
-
-    return results
+    with acquire_index(persist_directory, collection_name) as handle:
+        return handle.backend.query(
+            query_texts=[query_text],
+            query_embeddings=None if query_embedding is None else [query_embedding],
+            n_results=n_results,
+            where=where,
+        )
 
 def get_groq_client() -> Groq:
     """Initialize and return the Groq client with error handling."""
@@ -125,11 +508,71 @@ def clean_title(filename: str) -> str:
     return bold_title
 
 # ---------- RAG Pipeline ----------
-def rag_query(user_query: str, persist_directory: str, collection_name: str, n_results: int = 3) -> str:
-    # Step 1: Retrieve relevant chunks
-    search_results = query_chromadb(persist_directory, collection_name, user_query, n_results=n_results)
+def retrieve_chunks(
+    user_query: str,
+    persist_directory: str,
+    collection_name: str,
+    n_results: int = 3,
+    where: Optional[dict] = None,
+    query_embedding=None,
+) -> dict:
+    """
+    Retrieve the chunks for a question, reranking a wider candidate set when enabled.
+
+    ``where`` restricts the search to a book/chapter (see ``build_where``);
+    ``query_embedding`` skips embedding the question again.
+
+    Returns:
+        dict: Single-query results (``documents[0]``, ``metadatas[0]`` ...) with at most
+            ``n_results`` chunks, plus ``timings`` in milliseconds per stage.
+    """
+    reranker = get_reranker()
+    n_candidates = max(RERANK_CANDIDATES, n_results) if reranker else n_results
+
+    start = time.perf_counter()
+    search_results = query_chromadb(
+        persist_directory, collection_name, user_query,
+        n_results=n_candidates, where=where, query_embedding=query_embedding,
+    )
+    timings = {"retrieval_ms": (time.perf_counter() - start) * 1000}
+
+    if reranker:
+        start = time.perf_counter()
+        search_results = reranker.rerank(user_query, search_results, top_n=min(n_results, RERANK_TOP_N))
+        timings["rerank_ms"] = (time.perf_counter() - start) * 1000
+
+    search_results["timings"] = timings
+    return search_results
 
-    # Step 2: Combine retrieved chunks into context
+async def retrieve_chunks_async(
+    user_query: str,
+    persist_directory: str,
+    collection_name: str,
+    n_results: int = 3,
+    where: Optional[dict] = None,
+) -> dict:
+    """
+    ``retrieve_chunks`` for request handlers: the question is embedded through the
+    shared micro-batcher and the search runs in a worker thread, so neither blocks
+    the event loop.
+    """
+    batcher = get_embedding_batcher()
+    query_embedding, embed_ms = None, None
+    if batcher is not None:
+        start = time.perf_counter()
+        query_embedding = await batcher.embed(user_query)
+        embed_ms = (time.perf_counter() - start) * 1000
+
+    search_results = await asyncio.to_thread(
+        retrieve_chunks, user_query, persist_directory, collection_name,
+        n_results=n_results, where=where, query_embedding=query_embedding,
+    )
+    if embed_ms is not None:
+        search_results["timings"] = {"embed_ms": embed_ms, **search_results["timings"]}
+    return search_results
+
+def build_rag_prompt(user_query: str, search_results: dict, author: str = "Nietzsche") -> str:
+    """Combine retrieved chunks and the question into the final LLM prompt."""
     context_with_titles = []
     for doc, meta in zip(search_results["documents"][0], search_results["metadatas"][0]):
         raw_title = meta.get("source", "Unknown Source")
@@ -138,53 +581,79 @@ def rag_query(user_query: str, persist_directory: str, collection_name: str, n_r
 
     context_text = "\n\n".join(context_with_titles)
 
-    # Step 3: Build final prompt
-    prompt = (
-        f"Use the following excerpts from Nietzsche's works to answer the question.\n\n"
+    return (
+        f"Use the following excerpts from {author}'s works to answer the question.\n\n"
         f"{context_text}\n\n"
         f"Question: {user_query}\n\n"
         f"Answer:"
     )
 
-    # Step 4: Call the LLM
-    answer = generate_completion_stream(
-        prompt=prompt,
-        system_prompt= system_prompt,
-        model=MODEL_NAME
+def format_timings(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{stage}={value:.1f}" for stage, value in timings.items())
+
+async def rag_query(
+    user_query: str,
+    persist_directory: str,
+    collection_name: str,
+    n_results: int = 3,
+    where: Optional[dict] = None,
+    system_prompt: Optional[str] = None,
+    author: str = "Nietzsche",
+) -> str:
+    # Step 1: Retrieve (and optionally rerank) relevant chunks
+    search_results = await retrieve_chunks_async(
+        user_query, persist_directory, collection_name, n_results=n_results, where=where
+    )
+
+    # Step 2: Build final prompt from the retrieved chunks
+    prompt = build_rag_prompt(user_query, search_results, author=author)
+    logger.info(
+        f"Prompt built from {len(search_results['documents'][0])} chunks ({len(prompt)} chars); "
+        f"{format_timings(search_results['timings'])}"
     )
 
-    return answer
+    # Step 3: Call the LLM and collect the full answer
+    chunks = [
+        chunk async for chunk in generate_completion_stream(
+            prompt=prompt,
+            system_prompt=system_prompt or resolve_corpus()["system_prompt"],
+            model=MODEL_NAME
+        )
+    ]
+
+    return "".join(chunks)
 
 async def rag_query_stream(
     user_query: str,
     persist_directory: str,
     collection_name: str,
-    n_results: int = 5
+    n_results: int = 5,
+    where: Optional[dict] = None,
+    system_prompt: Optional[str] = None,
+    author: str = "Nietzsche",
 ) -> AsyncGenerator[str, None]:
-    # Step 1: Retrieve relevant chunks (synchronous operation)
-    search_results = query_chromadb(persist_directory, collection_name, user_query, n_results=n_results)
-
-    # Step 2: Combine retrieved chunks into context
-    context_with_titles = []
-    for doc, meta in zip(search_results["documents"][0], search_results["metadatas"][0]):
-        raw_title = meta.get("source", "Unknown Source")
-        book_title = clean_title(raw_title)
-        context_with_titles.append(f"From '{book_title}':\n{doc}")
-
-    context_text = "\n\n".join(context_with_titles)
-
-    # Step 3: Build final prompt
-    prompt = (
-        f"Use the following excerpts from Nietzsche's works to answer the question.\n\n"
-        f"{context_text}\n\n"
-        f"Question: {user_query}\n\n"
-        f"Answer:"
+    # Step 1: Retrieve (and optionally rerank) relevant chunks off the event loop
+    search_results = await retrieve_chunks_async(
+        user_query, persist_directory, collection_name, n_results=n_results, where=where
     )
 
-    # Step 4: Stream the LLM response
+    # Step 2: Build final prompt from the retrieved chunks
+    prompt = build_rag_prompt(user_query, search_results, author=author)
+    timings = search_results["timings"]
+
+    # Step 3: Stream the LLM response
+    start = time.perf_counter()
+    first_token = True
     async for chunk in generate_completion_stream(
         prompt=prompt,
-        system_prompt= system_prompt,
+        system_prompt=system_prompt or resolve_corpus()["system_prompt"],
         model=MODEL_NAME
     ):
-        yield chunk
\ No newline at end of file
+        if first_token:
+            first_token = False
+            timings["first_token_ms"] = (time.perf_counter() - start) * 1000
+            logger.info(
+                f"Prompt built from {len(search_results['documents'][0])} chunks ({len(prompt)} chars); "
+                f"{format_timings(timings)}"
+            )
+        yield chunk
@@ -0,0 +1,111 @@
+"""
+Latency, recall and per-worker memory of the Chroma and NumPy retrieval backends.
+
+Queries are perturbed copies of random stored embeddings, so no embedding model is
+needed. Ground truth is exact float32 search over the collection's own embeddings.
+Each backend runs in a fresh spawned process (like an API worker) which reports its
+resident set size after opening the index and after serving the queries.
+
+Usage:
+    python -m vector_DB.backends --persist-dir /path/to/db --out /path/to/numpy_index
+    python -m benchmarks.backend_benchmark --persist-dir /path/to/db --numpy-index /path/to/numpy_index
+"""
+
+import time
+import argparse
+import resource
+import multiprocessing as mp
+import numpy as np
+from vector_DB.backends import open_backend, topk_rows, normalize_rows
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process in MB (Linux)."""
+    with open("/proc/self/status", "r") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def load_ground_truth_matrix(persist_dir: str, collection: str) -> tuple:
+    from vector_DB.chroma_client import persistent_client
+
+    coll = persistent_client(persist_dir).get_collection(name=collection)
+    ids, rows = [], []
+    total = coll.count()
+    for offset in range(0, total, 4096):
+        page = coll.get(limit=4096, offset=offset, include=["embeddings"])
+        ids.extend(page["ids"])
+        rows.append(np.asarray(page["embeddings"], dtype=np.float32))
+    return ids, normalize_rows(np.concatenate(rows))
+
+
+def _worker(kind, kwargs, queries, k, result_queue):
+    rss_before = rss_mb()
+    backend = open_backend(kind, **kwargs)
+    backend.query(query_embeddings=queries[:1], n_results=k)  # Warm-up (loads HNSW / pages)
+    rss_open = rss_mb()
+
+    latencies, returned = [], []
+    for q in queries:
+        start = time.perf_counter()
+        result = backend.query(query_embeddings=q[None, :], n_results=k)
+        latencies.append(time.perf_counter() - start)
+        returned.append(result["ids"][0])
+
+    result_queue.put({
+        "latencies": latencies,
+        "ids": returned,
+        "rss_open_mb": rss_open - rss_before,
+        "rss_final_mb": rss_mb(),
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    })
+
+
+def run_backend(kind, kwargs, queries, k):
+    ctx = mp.get_context("spawn")
+    result_queue = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(kind, kwargs, queries, k, result_queue))
+    proc.start()
+    result = result_queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Chroma vs NumPy retrieval backends")
+    parser.add_argument("--persist-dir", type=str, required=True)
+    parser.add_argument("--collection", type=str, default="nietzsche_books")
+    parser.add_argument("--numpy-index", type=str, required=True)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.05, help="Std of the query perturbation")
+    args = parser.parse_args()
+
+    ids, matrix = load_ground_truth_matrix(args.persist_dir, args.collection)
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(ids), size=args.queries)
+    queries = normalize_rows(matrix[picks] + rng.normal(0, args.noise, size=(args.queries, matrix.shape[1])))
+    truth_idx, _ = topk_rows(matrix, queries, args.k)
+    truth = [{ids[i] for i in row} for row in truth_idx]
+    del matrix
+
+    backends = {
+        "chroma": {"persist_directory": args.persist_dir, "collection_name": args.collection},
+        "numpy": {"index_dir": args.numpy_index},
+    }
+    print(f"🔎 {len(ids):,} chunks, {args.queries} queries, k={args.k}\n")
+    for kind, kwargs in backends.items():
+        result = run_backend(kind, kwargs, queries, args.k)
+        lat = np.asarray(result["latencies"]) * 1000
+        recall = np.mean([len(truth[i] & set(r)) / args.k for i, r in enumerate(result["ids"])])
+        print(
+            f"{kind:<7} p50={np.percentile(lat, 50):7.2f} ms  p95={np.percentile(lat, 95):7.2f} ms  "
+            f"recall@{args.k}={recall:.4f}  index RSS={result['rss_open_mb']:8.1f} MB  "
+            f"worker RSS={result['rss_final_mb']:8.1f} MB  peak={result['peak_rss_mb']:8.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Memory and throughput of the streaming chunker versus the in-memory ``chunk_text``.
+
+The baseline reproduces the original ingestion path (read the whole file, strip and
+flatten newlines, build the full chunk list); the streaming path consumes
+``stream_chunks`` lazily. Peak Python heap is measured with ``tracemalloc`` in a
+separate pass so it does not distort the timings.
+
+Usage:
+    python -m benchmarks.chunking_benchmark --size-mb 200
+    python -m benchmarks.chunking_benchmark --file /path/to/book.txt
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+from vector_DB.chunking import chunk_text, stream_chunks
+
+SAMPLE_PARAGRAPH = (
+    "Was mich nicht umbringt, macht mich stärker. — What does not kill me makes me stronger.\r\n"
+    "He who has a why to live can bear almost any how.\n\n"
+)
+
+
+def write_sample_file(path: str, size_mb: int) -> None:
+    """Write a synthetic corpus with multi-byte characters and mixed line endings."""
+    block = SAMPLE_PARAGRAPH * 1000
+    block_bytes = block.encode("utf-8")
+    with open(path, "wb") as f:
+        for _ in range(size_mb * (1 << 20) // len(block_bytes) + 1):
+            f.write(block_bytes)
+
+
+def baseline(file_path: str, chunk_size: int, overlap: int) -> int:
+    with open(file_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    text = text.strip().replace("\n", " ")
+    return len(chunk_text(text, chunk_size, overlap))
+
+
+def streaming(file_path: str, chunk_size: int, overlap: int) -> int:
+    return sum(1 for _ in stream_chunks(file_path, chunk_size=chunk_size, overlap=overlap))
+
+
+def measure(fn, *args) -> dict:
+    start = time.perf_counter()
+    n_chunks = fn(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    fn(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"chunks": n_chunks, "seconds": elapsed, "peak_mb": peak / (1 << 20)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming vs in-memory chunking")
+    parser.add_argument("--file", type=str, default=None, help="Text file to chunk (default: synthetic)")
+    parser.add_argument("--size-mb", type=int, default=100, help="Size of the synthetic file")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        file_path = args.file
+        if file_path is None:
+            file_path = os.path.join(tmp, "corpus.txt")
+            write_sample_file(file_path, args.size_mb)
+
+        size_mb = os.path.getsize(file_path) / (1 << 20)
+        print(f"📄 {file_path}: {size_mb:.1f} MB, chunk_size={args.chunk_size}, overlap={args.overlap}\n")
+
+        for name, fn in [("chunk_text (in-memory)", baseline), ("stream_chunks (mmap)", streaming)]:
+            result = measure(fn, file_path, args.chunk_size, args.overlap)
+            print(
+                f"{name:<24} chunks={result['chunks']:>9,}  "
+                f"time={result['seconds']:7.2f}s  "
+                f"throughput={size_mb / result['seconds']:7.1f} MB/s  "
+                f"peak_heap={result['peak_mb']:9.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+CPU latency and memory of the training graph versus the lean inference graphs of the
+transformer decoder.
+
+Variants, all sharing the same weights:
+- ``training``:     ``create_model`` as trained, returning logits at every position plus hidden states;
+- ``logits``:       logits only, every position;
+- ``last``:         logits of each row's last real token only (what generation uses);
+- ``savedmodel``:   the exported ``last`` SavedModel reloaded with ``tf.saved_model.load``.
+
+Batches are right-padded to ``--seq-len`` with random real lengths from half to the
+full length; the ``last`` variants gather at each row's length.
+
+For each: p50/p95 latency per batch, the bytes of output materialized per call and
+the process RSS growth over the timed calls. Runs on random weights unless
+``--weights`` points at a trained model.
+
+Usage:
+    python -m benchmarks.decoder_export_benchmark --batch-size 8 --seq-len 128
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import numpy as np
+from configs.configss import get_config
+from inference.export_decoder import export_decoder, load_trained_decoder
+from models.transformer_decoder_model import create_inference_model, create_model
+from utils.memory import memory_report
+
+
+def bench(fn, inputs, repeats):
+    out = fn(inputs)  # Trace / warm up
+    rss_before = memory_report()["rss_mb"]
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        out = fn(inputs)
+        latencies.append(time.perf_counter() - start)
+    outputs = out if isinstance(out, (list, tuple)) else [out]
+    return {
+        "p50_ms": np.percentile(latencies, 50) * 1000,
+        "p95_ms": np.percentile(latencies, 95) * 1000,
+        "output_mb": sum(np.asarray(o).nbytes for o in outputs) / 2**20,
+        "rss_growth_mb": memory_report()["rss_mb"] - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark lean decoder inference graphs on CPU")
+    parser.add_argument("--weights", type=str, default=None, help="Trained model (.keras); random weights if unset")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--seq-len", type=int, default=128)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")  # CPU only
+    import tensorflow as tf
+
+    model = load_trained_decoder(args.weights) if args.weights else create_model()
+    vocab_size = get_config().model["vocab_size"]
+    rng = np.random.default_rng(0)
+    lengths = rng.integers(args.seq_len // 2, args.seq_len + 1, args.batch_size).astype(np.int32)
+    tokens = rng.integers(1, vocab_size, (args.batch_size, args.seq_len)).astype(np.int32)
+    tokens[np.arange(args.seq_len)[None, :] >= lengths[:, None]] = 0  # Right padding
+    tokens, lengths = tf.constant(tokens), tf.constant(lengths)
+
+    logits_model = create_inference_model(model)
+    last_model = create_inference_model(model, last_position_only=True)
+    variants = {
+        "training": (tf.function(lambda x: model(x, training=False)), tokens),
+        "logits": (tf.function(lambda x: logits_model(x, training=False)), tokens),
+        "last": (tf.function(lambda x: last_model(x, training=False)), [tokens, lengths]),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        export_path = os.path.join(tmp, "decoder_last")
+        export_decoder(model, export_path, "savedmodel", last_position_only=True)
+        variants["savedmodel"] = (tf.saved_model.load(export_path).serve, [tokens, lengths])
+
+        print(f"batch={args.batch_size} seq_len={args.seq_len} vocab={vocab_size} params={model.count_params():,}\n")
+        print(f"{'variant':<12} {'p50 ms':>9} {'p95 ms':>9} {'output MB':>10} {'RSS +MB':>8}")
+        for name, (fn, inputs) in variants.items():
+            r = bench(fn, inputs, args.repeats)
+            print(f"{name:<12} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['output_mb']:>10.2f} {r['rss_growth_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
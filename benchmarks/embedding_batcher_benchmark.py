@@ -0,0 +1,87 @@
+"""
+Query-embedding throughput under concurrency: one ONNX call per request versus the
+shared micro-batcher.
+
+``C`` client threads each embed ``--requests`` short questions back to back. In the
+direct mode every request calls the embedding function on its own (what
+``collection.query(query_texts=...)`` does); in the batched mode requests go through
+``EmbeddingBatcher``. Throughput, p50/p95 latency and the process CPU time per
+embedded text are reported per concurrency level.
+
+Usage:
+    python -m benchmarks.embedding_batcher_benchmark --concurrency 1 8 32 64
+"""
+
+import time
+import argparse
+import threading
+import numpy as np
+from vector_DB.batcher import EmbeddingBatcher
+from vector_DB.embeddings import get_embedding_function
+
+QUESTIONS = [
+    "What does Nietzsche mean by the eternal recurrence?",
+    "Why is God dead according to the madman?",
+    "How does master morality differ from slave morality?",
+    "What is the will to power?",
+    "What is amor fati?",
+    "Who is the Übermensch?",
+    "What does Zarathustra teach in the marketplace?",
+    "How does Nietzsche criticize the ascetic ideal?",
+]
+
+
+def run_clients(embed_one, concurrency: int, requests: int):
+    latencies = [[] for _ in range(concurrency)]
+
+    def client(slot):
+        for i in range(requests):
+            question = QUESTIONS[(slot + i) % len(QUESTIONS)]
+            start = time.perf_counter()
+            embed_one(question)
+            latencies[slot].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=client, args=(slot,)) for slot in range(concurrency)]
+    wall, cpu = time.perf_counter(), time.process_time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    lat = np.concatenate([np.asarray(l) for l in latencies]) * 1000
+    return {
+        "texts_per_s": len(lat) / wall,
+        "p50_ms": np.percentile(lat, 50),
+        "p95_ms": np.percentile(lat, 95),
+        "cpu_ms_per_text": 1000 * cpu / len(lat),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request vs micro-batched query embedding")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client thread")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    parser.add_argument("--intra-op-threads", type=int, default=None, help="ONNX threads (default: all cores)")
+    args = parser.parse_args()
+
+    embedding_fn = get_embedding_function(intra_op_threads=args.intra_op_threads)
+    embedding_fn(QUESTIONS)  # Load the model before timing
+    batcher = EmbeddingBatcher(embedding_fn, max_batch_size=args.max_batch, max_wait_ms=args.max_wait_ms)
+    modes = {
+        "direct": lambda text: embedding_fn([text]),
+        "batched": lambda text: batcher.submit(text).result(),
+    }
+
+    for concurrency in args.concurrency:
+        for mode, embed_one in modes.items():
+            r = run_clients(embed_one, concurrency, args.requests)
+            print(f"C={concurrency:<3} {mode:<8} {r['texts_per_s']:8.1f} texts/s  p50={r['p50_ms']:7.2f} ms  "
+                  f"p95={r['p95_ms']:7.2f} ms  CPU={r['cpu_ms_per_text']:6.2f} ms/text")
+    print(f"\nbatcher: {batcher.stats()}")
+    batcher.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Latency of filtered (one book / one chapter) versus unfiltered retrieval.
+
+Queries are perturbed copies of stored embeddings taken from the NumPy index, so
+no embedding model is needed. For every backend the same queries run unfiltered,
+restricted to the book they were drawn from (``source``), and restricted to that
+book's chapter (``source`` + ``chapter``). On the NumPy backend a book filter
+scores only that book's contiguous partition.
+
+Usage:
+    python -m vector_DB.backends --persist-dir /path/to/db --out /path/to/numpy_index
+    python -m benchmarks.filter_benchmark --persist-dir /path/to/db --numpy-index /path/to/numpy_index
+"""
+
+import time
+import argparse
+import numpy as np
+from vector_DB.backends import NumpyBackend, open_backend, normalize_rows
+
+
+def time_queries(backend, queries, wheres, k):
+    latencies = []
+    for q, where in zip(queries, wheres):
+        start = time.perf_counter()
+        backend.query(query_embeddings=q[None, :], n_results=k, where=where)
+        latencies.append(time.perf_counter() - start)
+    return np.asarray(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark filtered vs unfiltered retrieval")
+    parser.add_argument("--persist-dir", type=str, required=True)
+    parser.add_argument("--collection", type=str, default="nietzsche_books")
+    parser.add_argument("--numpy-index", type=str, required=True)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.05, help="Std of the query perturbation")
+    args = parser.parse_args()
+
+    index = NumpyBackend(args.numpy_index)
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, index.count(), size=args.queries)
+    sample = np.asarray(index.embeddings[np.sort(picks)], dtype=np.float32)
+    queries = normalize_rows(sample + rng.normal(0, args.noise, size=sample.shape))
+    metas = [index.metadata(int(row)) for row in np.sort(picks)]
+
+    scenarios = {
+        "unfiltered": [None] * len(metas),
+        "book": [{"source": m["source"]} for m in metas],
+        "book+chapter": [{"$and": [{"source": m["source"]}, {"chapter": m.get("chapter", 0)}]} for m in metas],
+    }
+    if "chapter" not in index.columns:
+        del scenarios["book+chapter"]
+
+    print(f"🔎 {index.count():,} chunks in {len(index.partitions) or 'unpartitioned'} books, "
+          f"{args.queries} queries, k={args.k}\n")
+    backends = {
+        "chroma": open_backend("chroma", persist_directory=args.persist_dir, collection_name=args.collection),
+        "numpy": index,
+    }
+    for kind, backend in backends.items():
+        backend.query(query_embeddings=queries[:1], n_results=args.k)  # Warm-up
+        for name, wheres in scenarios.items():
+            lat = time_queries(backend, queries, wheres, args.k)
+            print(f"{kind:<7} {name:<13} p50={np.percentile(lat, 50):7.2f} ms  p95={np.percentile(lat, 95):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
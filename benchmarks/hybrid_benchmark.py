@@ -0,0 +1,62 @@
+"""
+Vector-only versus hybrid (BM25 + vector, RRF) retrieval, and lexical query latency.
+
+Runs the question set against the served collection twice: once through the plain
+vector backend and once through ``HybridBackend``. Reports hit@k and the number of
+chunks (and context tokens) needed to reach an answer, plus BM25 search latency.
+
+Usage:
+    python -m benchmarks.hybrid_benchmark --persist-dir /path/to/db
+"""
+
+import os
+import json
+import time
+import argparse
+import numpy as np
+from vector_DB.backends import HybridBackend, open_backend
+from vector_DB.lexical import BM25Index
+from benchmarks.retrieval_eval import DEFAULT_QUESTIONS, evaluate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hybrid BM25 + vector retrieval")
+    parser.add_argument("--persist-dir", type=str, required=True)
+    parser.add_argument("--collection", type=str, default="nietzsche_books")
+    parser.add_argument("--lexical-index", type=str, default=None, help="Default: <persist-dir>/<collection>_bm25")
+    parser.add_argument("--questions", type=str, default=DEFAULT_QUESTIONS)
+    parser.add_argument("--max-k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=200, help="Repetitions for lexical latency")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+
+    lexical_dir = args.lexical_index or os.path.join(args.persist_dir, f"{args.collection}_bm25")
+    lexical = BM25Index.load(lexical_dir)
+    vector = open_backend("chroma", persist_directory=args.persist_dir, collection_name=args.collection)
+    hybrid = HybridBackend(vector, lexical)
+
+    for name, backend in [("vector", vector), ("hybrid", hybrid)]:
+        metrics = evaluate(
+            lambda q, k: backend.query(query_texts=[q], n_results=k)["documents"][0],
+            questions,
+            args.max_k,
+        )
+        print(f"\n🔎 {name}")
+        for key, value in metrics.items():
+            print(f"  {key:<20} {value:.3f}" if isinstance(value, float) else f"  {key:<20} {value}")
+
+    latencies = []
+    for _ in range(args.repeats):
+        for item in questions:
+            start = time.perf_counter()
+            lexical.search(item["question"], k=args.max_k * 4)
+            latencies.append(time.perf_counter() - start)
+    lat = np.asarray(latencies) * 1000
+    print(f"\n⏱️ BM25 over {len(lexical):,} chunks: p50={np.percentile(lat, 50):.3f} ms  "
+          f"p99={np.percentile(lat, 99):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Cold import time of the project's entry-point modules.
+
+Each module is imported in a fresh interpreter (best of ``--repeats``), so nothing is
+cached between measurements. Alongside the time, the report lists which heavy
+dependencies the import pulled in: a module that loads TensorFlow, KerasNLP or a
+preset at import time shows up here long before anyone calls into it.
+
+Usage:
+    python -m benchmarks.import_benchmark
+    python -m benchmarks.import_benchmark --modules models.lora_model training.train_lora
+"""
+
+import sys
+import json
+import argparse
+import subprocess
+
+DEFAULT_MODULES = [
+    "configs.configss",
+    "models.presets",
+    "models.lora_model",
+    "training.train_lora",
+    "models.lora_layer",
+    "models.transformer_decoder_model",
+    "api.query",
+    "api.main",
+]
+HEAVY = ["tensorflow", "keras", "keras_nlp", "chromadb", "onnxruntime"]
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(module: str, repeats: int) -> dict:
+    best = None
+    for _ in range(repeats):
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY)],
+            capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1]}
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold import time of project modules")
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'module':<36} {'import ms':>10}  heavy dependencies loaded")
+    for module in args.modules:
+        r = measure(module, args.repeats)
+        if "error" in r:
+            print(f"{module:<36} {'failed':>10}  {r['error']}")
+        else:
+            print(f"{module:<36} {r['seconds'] * 1000:>10.1f}  {', '.join(r['loaded']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Vector top-k versus wide retrieval + cross-encoder reranking.
+
+Both strategies send ``--top-n`` chunks to the LLM. The reranked run retrieves
+``--candidates`` chunks first and keeps the cross-encoder's best ``--top-n``. Reported
+per strategy: answer hit rate, context tokens sent to the LLM, and per-stage latency
+(retrieval, rerank cold, rerank with a warm LRU cache).
+
+Usage:
+    python -m benchmarks.rerank_benchmark --books-folder /path/to/nietzsche_books \
+        --rerank-model /path/to/ms-marco-MiniLM-L-6-v2-onnx
+"""
+
+import json
+import time
+import argparse
+import chromadb
+import numpy as np
+from benchmarks.retrieval_eval import DEFAULT_QUESTIONS, build_collection, evaluate
+from vector_DB.chunking import approx_token_count
+from vector_DB.embeddings import get_embedding_function
+from vector_DB.rerank import CrossEncoderReranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-encoder reranking against plain top-k")
+    parser.add_argument("--books-folder", type=str, required=True, help="Folder with .txt books")
+    parser.add_argument("--rerank-model", type=str, required=True, help="Dir with model.onnx + tokenizer.json")
+    parser.add_argument("--questions", type=str, default=DEFAULT_QUESTIONS, help="JSONL question set")
+    parser.add_argument("--chunker", choices=["fixed", "structured"], default="fixed")
+    parser.add_argument("--candidates", type=int, default=20, help="Chunks retrieved before reranking")
+    parser.add_argument("--top-n", type=int, default=3, help="Chunks sent to the LLM")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+
+    embedding_fn = get_embedding_function()
+    collection, stats = build_collection(
+        chromadb.EphemeralClient(), "rerank_eval", args.books_folder, args.chunker, embedding_fn
+    )
+    reranker = CrossEncoderReranker(args.rerank_model)
+    timings = {"retrieval": [], "rerank": []}
+
+    def vector_search(question, k):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=embedding_fn([question]), n_results=k)
+        timings["retrieval"].append(time.perf_counter() - start)
+        return result["documents"][0]
+
+    def reranked_search(question, k):
+        result = collection.query(query_embeddings=embedding_fn([question]), n_results=args.candidates)
+        start = time.perf_counter()
+        result = reranker.rerank(question, result, top_n=k)
+        timings["rerank"].append(time.perf_counter() - start)
+        return result["documents"][0]
+
+    print(f"📚 {stats['chunks']:,} {args.chunker} chunks, {len(questions)} questions\n")
+    for name, search in (("vector", vector_search), ("reranked", reranked_search)):
+        metrics = evaluate(search, questions, args.top_n)
+        tokens = np.mean([sum(approx_token_count(d) for d in search(q["question"], args.top_n)) for q in questions])
+        print(f"{name:<9} hit@{args.top_n}={metrics[f'hit@{args.top_n}']:.3f}  "
+              f"mean chunks to answer={metrics['mean_chunks_needed']:.2f}  context tokens={tokens:.0f}")
+
+    cold = np.asarray(timings["rerank"][:len(questions)]) * 1000
+    warm = np.asarray(timings["rerank"][len(questions):]) * 1000
+    retrieval = np.asarray(timings["retrieval"]) * 1000
+    print(f"\nretrieval     p50={np.percentile(retrieval, 50):7.2f} ms")
+    print(f"rerank (cold) p50={np.percentile(cold, 50):7.2f} ms  p95={np.percentile(cold, 95):7.2f} ms  "
+          f"({args.candidates} pairs per query)")
+    print(f"rerank (warm) p50={np.percentile(warm, 50):7.2f} ms  cache hits={reranker.hits} misses={reranker.misses}")
+
+
+if __name__ == "__main__":
+    main()
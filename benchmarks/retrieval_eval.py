@@ -0,0 +1,133 @@
+"""
+Retrieval evaluation: fixed 500-character chunks versus structure-aware chunks.
+
+Both chunkings of the same books are embedded into in-memory Chroma collections.
+For every question the top ``--max-k`` chunks are retrieved and the smallest k whose
+context contains one of the expected answer phrases is recorded. Fewer chunks (and
+fewer context tokens) per answered question means smaller prompts for the LLM.
+
+The questions file is JSONL with ``{"question": ..., "answers": [phrase, ...]}`` per line;
+``benchmarks/data/retrieval_questions.jsonl`` is a small Nietzsche set.
+
+Usage:
+    python -m benchmarks.retrieval_eval --books-folder /path/to/nietzsche_books
+"""
+
+import os
+import json
+import time
+import argparse
+import chromadb
+from vector_DB.chunking import approx_token_count, iter_paragraphs, stream_chunks, structured_chunks
+from vector_DB.embeddings import get_embedding_function
+from vector_DB.pipeline import get_max_batch_size
+
+DEFAULT_QUESTIONS = os.path.join(os.path.dirname(__file__), "data", "retrieval_questions.jsonl")
+CHUNKERS = {
+    "fixed": lambda path: stream_chunks(path),
+    "structured": lambda path: structured_chunks(iter_paragraphs(path)),
+}
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def build_collection(client, name, books_folder, chunker, embedding_fn):
+    """Chunk every book with ``chunker``, embed and add it; return chunk stats."""
+    collection = client.create_collection(name=name)
+    max_batch = get_max_batch_size(client)
+    n_chunks, chunk_seconds = 0, 0.0
+
+    for filename in sorted(os.listdir(books_folder)):
+        if not filename.endswith(".txt"):
+            continue
+        start = time.perf_counter()
+        chunks = list(CHUNKERS[chunker](os.path.join(books_folder, filename)))
+        chunk_seconds += time.perf_counter() - start
+
+        for i in range(0, len(chunks), max_batch):
+            batch = chunks[i:i + max_batch]
+            collection.add(
+                ids=[f"{filename}-{i + j}" for j in range(len(batch))],
+                documents=batch,
+                embeddings=embedding_fn(batch),
+                metadatas=[{"source": filename} for _ in batch],
+            )
+        n_chunks += len(chunks)
+
+    return collection, {"chunks": n_chunks, "us_per_chunk": 1e6 * chunk_seconds / max(n_chunks, 1)}
+
+
+def evaluate(search, questions, max_k):
+    """
+    Return hit@k and the chunks/tokens needed to reach the first hit.
+
+    Args:
+        search (callable): ``search(question, k)`` returning ranked documents.
+        questions (list): ``{"question": ..., "answers": [...]}`` items.
+        max_k (int): Deepest rank inspected.
+    """
+    ks = [k for k in (1, 3, 5, 10) if k <= max_k]
+    hits = {k: 0 for k in ks}
+    needed_chunks, needed_tokens = [], []
+
+    for item in questions:
+        documents = search(item["question"], max_k)
+        answers = [normalize(a) for a in item["answers"]]
+
+        first_hit = None
+        for rank, doc in enumerate(documents, start=1):
+            if any(a in normalize(doc) for a in answers):
+                first_hit = rank
+                break
+
+        for k in ks:
+            hits[k] += first_hit is not None and first_hit <= k
+        if first_hit is not None:
+            needed_chunks.append(first_hit)
+            needed_tokens.append(sum(approx_token_count(d) for d in documents[:first_hit]))
+
+    n = len(questions)
+    answered = len(needed_chunks)
+    return {
+        **{f"hit@{k}": hits[k] / n for k in ks},
+        "answered": answered,
+        "mean_chunks_needed": sum(needed_chunks) / answered if answered else float("nan"),
+        "mean_context_tokens": sum(needed_tokens) / answered if answered else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare fixed and structure-aware chunking for retrieval")
+    parser.add_argument("--books-folder", type=str, required=True, help="Folder with .txt books")
+    parser.add_argument("--questions", type=str, default=DEFAULT_QUESTIONS, help="JSONL question set")
+    parser.add_argument("--max-k", type=int, default=10, help="Deepest rank inspected")
+    args = parser.parse_args()
+
+    with open(args.questions, "r", encoding="utf-8") as f:
+        questions = [json.loads(line) for line in f if line.strip()]
+
+    client = chromadb.EphemeralClient()
+    embedding_fn = get_embedding_function()
+
+    for chunker in CHUNKERS:
+        start = time.perf_counter()
+        collection, chunk_stats = build_collection(
+            client, f"eval_{chunker}", args.books_folder, chunker, embedding_fn
+        )
+        build_seconds = time.perf_counter() - start
+        metrics = evaluate(
+            lambda q, k: collection.query(query_embeddings=embedding_fn([q]), n_results=k)["documents"][0],
+            questions,
+            args.max_k,
+        )
+
+        print(f"\n📚 {chunker} chunker: {chunk_stats['chunks']:,} chunks, "
+              f"{chunk_stats['us_per_chunk']:.1f} µs/chunk to chunk, index built in {build_seconds:.1f}s")
+        for key, value in metrics.items():
+            print(f"  {key:<20} {value:.3f}" if isinstance(value, float) else f"  {key:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Untied versus tied input/output embeddings in the transformer decoder.
+
+Both models are built with ``create_model`` from the config (``tie_embeddings`` off and on)
+and trained on random token batches with the ``Trainer``'s Adam setup. Reported per variant:
+- parameters, and the optimizer state they imply (Adam: two slots per trainable weight);
+- checkpoint size of ``save_weights``;
+- training throughput in steps/sec and tokens/sec;
+- RSS growth over the timed steps and the process's peak RSS after them.
+
+Each variant runs in its own interpreter, so peak memory is not carried over from the other one.
+
+Usage:
+    python -m benchmarks.tied_embeddings_benchmark --batch-size 32 --steps 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ADAM_SLOTS = 2
+
+
+def run_variant(tie_embeddings: bool, batch_size: int, steps: int) -> dict:
+    import numpy as np
+    import tensorflow as tf
+    from tensorflow import keras
+    from configs.configss import get_config
+    from models.transformer_decoder_model import create_model
+    from utils.memory import memory_report
+
+    config = get_config()
+    seq_len, vocab_size = config.model["max_sequence_length"], config.model["vocab_size"]
+    model = create_model(tie_embeddings=tie_embeddings)
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=config.training["optimizer"]["learning_rate"]),
+        loss=[keras.losses.SparseCategoricalCrossentropy(from_logits=True), None],
+    )
+
+    rng = np.random.default_rng(0)
+    tokens = rng.integers(1, vocab_size, (batch_size, seq_len + 1)).astype(np.int32)
+    inputs, labels = tokens[:, :-1], tokens[:, 1:]
+    model.train_on_batch(inputs, labels)  # Trace and create optimizer slots
+
+    rss_before = memory_report()["rss_mb"]
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.train_on_batch(inputs, labels)
+    elapsed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ckpt = os.path.join(tmp, "model.weights.h5")
+        model.save_weights(ckpt)
+        ckpt_mb = os.path.getsize(ckpt) / 2**20
+
+    params = int(sum(np.prod(w.shape) for w in model.weights))
+    trainable = int(sum(np.prod(w.shape) for w in model.trainable_weights))
+    return {
+        "tie_embeddings": tie_embeddings,
+        "params": params,
+        "optimizer_state_mb": trainable * ADAM_SLOTS * 4 / 2**20,
+        "checkpoint_mb": ckpt_mb,
+        "steps_per_s": steps / elapsed,
+        "tokens_per_s": steps * batch_size * seq_len / elapsed,
+        "rss_growth_mb": memory_report()["rss_mb"] - rss_before,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tied vs untied embeddings in the transformer decoder")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--variant", choices=["tied", "untied"], default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:  # Child process: one variant, JSON on the last line
+        print(json.dumps(run_variant(args.variant == "tied", args.batch_size, args.steps)))
+        return
+
+    results = []
+    for variant in ("untied", "tied"):
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.tied_embeddings_benchmark", "--variant", variant,
+             "--batch-size", str(args.batch_size), "--steps", str(args.steps)],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'variant':<8} {'params':>12} {'opt MB':>8} {'ckpt MB':>8} {'steps/s':>8} {'tok/s':>10} {'RSS +MB':>8} {'peak MB':>8}")
+    for r in results:
+        name = "tied" if r["tie_embeddings"] else "untied"
+        print(f"{name:<8} {r['params']:>12,} {r['optimizer_state_mb']:>8.1f} {r['checkpoint_mb']:>8.1f} "
+              f"{r['steps_per_s']:>8.2f} {r['tokens_per_s']:>10.0f} {r['rss_growth_mb']:>8.1f} {r['peak_rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-worker unique versus shared memory of N API-like workers.
+
+Spawns ``--workers`` processes (the same start method ``uvicorn --workers`` uses),
+each opening the retrieval backend and serving ``--queries`` random queries, then
+reports every worker's RSS, PSS, unique (private) and shared memory while all of
+them are alive. With the Chroma backend every worker holds its own HNSW index;
+with a snapshot or NumPy index the embedding matrix and documents are file
+mappings shared by all workers, so the unique part stays small and the summed PSS
+grows much slower than N x RSS.
+
+A running deployment can be inspected instead with ``--pid <uvicorn master pid>``.
+
+Usage:
+    python -m benchmarks.worker_memory --backend snapshot --snapshot /path/to/nietzsche.snap --workers 4
+    python -m benchmarks.worker_memory --pid 12345
+"""
+
+import argparse
+import multiprocessing as mp
+import numpy as np
+from vector_DB.backends import open_backend
+from utils.memory import child_pids, mapped_files_report, memory_report
+
+
+def _worker(kind, kwargs, queries, dim, ready, done, reports):
+    backend = open_backend(kind, **kwargs)
+    rng = np.random.default_rng()
+    for _ in range(queries):
+        backend.query(query_embeddings=rng.normal(size=(1, dim)).astype(np.float32), n_results=5)
+    ready.wait()  # Measure only once every worker has loaded and served
+    reports.put({**memory_report(), "index_files": mapped_files_report(kwargs.values())})
+    done.wait()
+
+
+def print_reports(reports):
+    print(f"{'pid':>8} {'RSS MB':>9} {'PSS MB':>9} {'unique MB':>10} {'shared MB':>10}")
+    for r in sorted(reports, key=lambda r: r["pid"]):
+        print(f"{r['pid']:>8} {r['rss_mb']:>9.1f} {r['pss_mb']:>9.1f} {r['unique_mb']:>10.1f} {r['shared_mb']:>10.1f}")
+    print(f"\n{len(reports)} workers: sum RSS={sum(r['rss_mb'] for r in reports):.1f} MB, "
+          f"sum PSS (actual)={sum(r['pss_mb'] for r in reports):.1f} MB, "
+          f"sum unique={sum(r['unique_mb'] for r in reports):.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report unique vs shared memory across API workers")
+    parser.add_argument("--pid", type=int, default=None, help="Inspect the children of a running master")
+    parser.add_argument("--backend", choices=["chroma", "numpy", "snapshot"], default="snapshot")
+    parser.add_argument("--persist-dir", type=str, default=None)
+    parser.add_argument("--collection", type=str, default="nietzsche_books")
+    parser.add_argument("--numpy-index", type=str, default=None)
+    parser.add_argument("--snapshot", type=str, default=None)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384, help="Query embedding dimension")
+    args = parser.parse_args()
+
+    if args.pid:
+        print_reports([memory_report(pid) for pid in child_pids(args.pid)])
+        return
+
+    kwargs = {
+        "chroma": {"persist_directory": args.persist_dir, "collection_name": args.collection},
+        "numpy": {"index_dir": args.numpy_index},
+        "snapshot": {"snapshot_path": args.snapshot},
+    }[args.backend]
+
+    ctx = mp.get_context("spawn")
+    ready, done, reports = ctx.Barrier(args.workers + 1), ctx.Event(), ctx.Queue()
+    procs = [
+        ctx.Process(target=_worker, args=(args.backend, kwargs, args.queries, args.dim, ready, done, reports))
+        for _ in range(args.workers)
+    ]
+    for p in procs:
+        p.start()
+    ready.wait()
+    results = [reports.get() for _ in procs]
+    done.set()
+    for p in procs:
+        p.join()
+
+    print(f"🧠 {args.backend} backend, {args.workers} workers\n")
+    print_reports(results)
+    for f in results[0]["index_files"]:
+        print(f"  {f['path']}: resident {f['rss_mb']:.1f} MB, shared {f['shared_mb']:.1f} MB, PSS {f['pss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
+import os
+from functools import lru_cache
 import yaml
 
+# Resolved next to this file, so loading does not depend on the working directory
+DEFAULT_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.yml")
+
 class Config:
-    def __init__(self, config_path='configs/config.yml'):
+    def __init__(self, config_path=DEFAULT_CONFIG_PATH):
         with open(config_path, 'r') as file:
             self.cfg = yaml.safe_load(file)
 
@@ -11,5 +16,17 @@ class Config:
         self.tokens = self.cfg.get("tokens", {})
         self.paths = self.cfg.get("paths", {})
 
-# Initialize once and reuse
-config = Config()
+    def __getitem__(self, key):
+        # Dict-style access (config["training"]) for code written against the raw YAML
+        return self.cfg[key]
+
+@lru_cache(maxsize=None)
+def get_config(config_path=DEFAULT_CONFIG_PATH) -> Config:
+    """Load a config file once per process; nothing is read at import time."""
+    return Config(config_path)
+
+def __getattr__(name):
+    # ``from configs.configss import config`` keeps working, loading the default config on first use
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -92,7 +92,7 @@ def preprocess_fn(text, tokenizer, start_packer):
     labels = tokens  # Model learns to predict next tokens
     return inputs, labels
 
-def create_dataset(file_path, tokenizer, start_packer, is_training=False):
+def create_dataset(file_path, tokenizer, start_packer, is_training=False, seed=None, cache=True):
     """
     Create a tf.data.Dataset pipeline.
 
@@ -101,6 +101,9 @@ def create_dataset(file_path, tokenizer, start_packer, is_training=False):
         tokenizer: Tokenizer instance.
         start_packer: Token packer layer.
         is_training (bool): Whether the dataset is used for training.
+        seed (int): Shuffle seed; fixed so a resumed run sees the same batch order.
+        cache (bool): Cache the training lines in memory. Turn it off with step checkpoints: they
+            save the iterator, and the cache would put the whole corpus into every checkpoint.
 
     Returns:
         tf.data.Dataset: Preprocessed batched dataset.
@@ -108,7 +111,12 @@ def create_dataset(file_path, tokenizer, start_packer, is_training=False):
     ds = tf.data.TextLineDataset(file_path) # Load text lines from file
 
     if is_training:
-        ds = ds.cache().shuffle(10000) # Shuffle and cache dataset for training
+        # Known epoch length (for the step loop and progress bar) without a pass over the pipeline
+        with open(file_path, "rb") as f:
+            ds = ds.apply(tf.data.experimental.assert_cardinality(sum(1 for _ in f)))
+        if cache:
+            ds = ds.cache()
+        ds = ds.shuffle(10000, seed=seed) # Shuffle dataset for training
 
     ds = (
         ds.map(lambda x: preprocess_fn(x, tokenizer, start_packer), num_parallel_calls=AUTOTUNE)
@@ -143,7 +151,11 @@ def main():
     tokenizer, start_packer = build_tokenizer(vocab_path, seq_len=SEQ_LEN)
 
     # Create datasets
-    train_ds = create_dataset(train_clean, tokenizer, start_packer, is_training=True)
+    step_checkpoints = (config.training.get("checkpoint") or {}).get("every_n_steps")
+    train_ds = create_dataset(
+        train_clean, tokenizer, start_packer, is_training=True, seed=config.training["seed"],
+        cache=not step_checkpoints
+    )
     val_ds = create_dataset(valid_clean, tokenizer, start_packer)
     test_ds = create_dataset(test_clean, tokenizer, start_packer)
 
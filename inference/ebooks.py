@@ -34,6 +34,7 @@ def process_folder(input_folder, output_folder):
     print("Conversion complete!")
 
 # Example usage:
-input_folder = "D:/Documents/Nietzsche"  # Folder containing your EPUB files
-output_folder = "D:/Documents/text_files"  # Folder where TXT files will be saved
-process_folder(input_folder, output_folder)
\ No newline at end of file
+if __name__ == "__main__":
+    input_folder = "D:/Documents/Nietzsche"  # Folder containing your EPUB files
+    output_folder = "D:/Documents/text_files"  # Folder where TXT files will be saved
+    process_folder(input_folder, output_folder)
@@ -0,0 +1,93 @@
+"""
+Export the transformer decoder as a lean inference artifact.
+
+The trained model (``training/train_transformer_decoder.py``) returns
+``[logits, hidden_states]`` with logits at every position. The export keeps only
+the logits and, with ``--last-position-only``, applies the vocabulary head to the
+last real token of each row only: generation needs ``(batch, vocab)`` next-token
+logits, not ``(batch, seq_len, vocab)``. That export takes two inputs,
+``input_tokens`` (right-padded) and ``lengths`` (real tokens per row).
+
+Formats:
+- ``savedmodel``: TensorFlow SavedModel with a ``serve`` endpoint (TF Serving, TFLite converter);
+- ``onnx``: ONNX graph via ``tf2onnx`` (optional dependency);
+- ``keras``: ``.keras`` file of the inference graph.
+
+Usage:
+    python -m inference.export_decoder --weights exports/transformer_decoder_model.keras \\
+        --out exports/decoder_serving --format savedmodel --last-position-only
+    python -m inference.export_decoder --weights ... --out exports/decoder.onnx --format onnx --seq-len 128
+"""
+
+import os
+import argparse
+from models.transformer_decoder_model import create_inference_model, create_model
+
+FORMATS = ("savedmodel", "onnx", "keras")
+
+
+def load_trained_decoder(weights_path: str):
+    """Rebuilds the training graph from the config and loads trained weights (``.keras`` or ``.weights.h5``)."""
+    model = create_model()
+    model.load_weights(weights_path)
+    return model
+
+
+def export_decoder(model, out_path: str, export_format: str = "savedmodel", seq_len=None,
+                   last_position_only: bool = False, opset: int = 17):
+    """
+    Writes the logits-only inference graph of a trained decoder.
+
+    Args:
+        model (keras.Model): Trained model from ``create_model``.
+        out_path (str): Output directory (SavedModel) or file (``.onnx``/``.keras``).
+        export_format (str): ``"savedmodel"``, ``"onnx"`` or ``"keras"``.
+        seq_len (int): Fixed sequence length, or ``None`` for a dynamic one.
+        last_position_only (bool): Return next-token logits only (adds the ``lengths`` input).
+        opset (int): ONNX opset version.
+
+    Returns:
+        keras.Model: The exported inference model.
+    """
+    if export_format not in FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format} (choose from {FORMATS})")
+    inference_model = create_inference_model(model, seq_len=seq_len, last_position_only=last_position_only)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+
+    if export_format == "keras":
+        inference_model.save(out_path)
+    elif export_format == "savedmodel":
+        inference_model.export(out_path)
+    else:
+        import tensorflow as tf
+        try:
+            import tf2onnx
+        except ImportError as e:
+            raise ImportError("ONNX export needs tf2onnx: pip install tf2onnx") from e
+
+        spec = [tf.TensorSpec((None, seq_len), tf.int32, name="input_tokens")]
+        if last_position_only:
+            spec.append(tf.TensorSpec((None,), tf.int32, name="lengths"))
+        tf2onnx.convert.from_keras(inference_model, input_signature=spec, opset=opset, output_path=out_path)
+    return inference_model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a logits-only inference graph of the transformer decoder")
+    parser.add_argument("--weights", type=str, required=True, help="Trained model (.keras) or weights (.weights.h5)")
+    parser.add_argument("--out", type=str, required=True, help="Output path")
+    parser.add_argument("--format", choices=FORMATS, default="savedmodel")
+    parser.add_argument("--seq-len", type=int, default=0, help="Fixed sequence length (0 = dynamic)")
+    parser.add_argument("--last-position-only", action="store_true", help="Only return next-token logits")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    exported = export_decoder(
+        load_trained_decoder(args.weights),
+        args.out,
+        export_format=args.format,
+        seq_len=args.seq_len or None,
+        last_position_only=args.last_position_only,
+        opset=args.opset,
+    )
+    print(f"✅ Exported {exported.name} ({exported.count_params():,} params) to {args.out}")
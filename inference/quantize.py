@@ -0,0 +1,285 @@
+"""
+Post-training int8 quantization of the exported decoder and merged LoRA GPT-2 for CPU serving.
+
+Variants, each written next to the others in ``--out-dir``:
+- ``float32``:          the export as trained (baseline);
+- ``weight_only_int8``: every kernel/embedding stored as int8 with a float32 scale per output
+                        channel (per row for embeddings); dequantized to float32 when loaded, so
+                        the artifact and load I/O shrink ~4x while inference runs in float32;
+- ``dynamic_int8``:     Keras ``model.quantize("int8")``: int8 kernels kept in memory and
+                        activations quantized per token on the fly, so matmuls read int8 weights.
+
+Neither scheme needs activation statistics up front (dynamic int8 computes its activation
+scales per batch), so the calibration lines from the cleaned corpus serve to measure each
+variant: perplexity with the training ``Perplexity`` metric, tokens/sec over the non-padding
+tokens, artifact size and load time. ``--max-ppl-increase`` picks the smallest variant whose
+perplexity stays within the budget.
+
+Usage:
+    python -m inference.quantize --kind decoder --model exports/transformer_decoder_model.keras --out-dir exports/quantized
+    python -m inference.quantize --kind gpt2 --model exports2/gpt2_lora_merged.keras --out-dir exports2/quantized
+"""
+
+import os
+import json
+import time
+import zipfile
+import argparse
+import numpy as np
+
+MODES = ("float32", "weight_only_int8", "dynamic_int8")
+KINDS = ("decoder", "gpt2")
+INT8_FORMAT_VERSION = 1
+
+
+def quantize_int8(weights: np.ndarray, channel_axis: int = -1):
+    """
+    Symmetric int8 quantization with one scale per channel.
+
+    Args:
+        weights (np.ndarray): Float kernel or embedding matrix.
+        channel_axis (int): Axis that keeps its own scale (output units for kernels, rows for embeddings).
+
+    Returns:
+        tuple: (int8 values, float32 scales broadcastable against the values).
+    """
+    axes = tuple(a for a in range(weights.ndim) if a != channel_axis % weights.ndim)
+    scale = np.max(np.abs(weights), axis=axes, keepdims=True) / 127.0
+    scale = np.where(scale == 0, 1.0, scale).astype(np.float32)
+    return np.clip(np.round(weights / scale), -127, 127).astype(np.int8), scale
+
+
+def _is_quantizable(variable) -> bool:
+    return len(variable.shape) >= 2 and "float" in str(variable.dtype)
+
+
+def save_int8_weights(model, path: str, **metadata) -> dict:
+    """
+    Saves a model's weights with every kernel and embedding matrix in int8.
+
+    Biases, layer norms and other vectors stay float32 (they are a negligible share of the size).
+    The file is a ``.npz`` archive with the variable paths in its metadata, like adapter files.
+
+    Returns:
+        dict: The stored metadata.
+    """
+    from keras import ops
+
+    arrays, variables = {}, []
+    for i, variable in enumerate(model.weights):
+        value = ops.convert_to_numpy(variable)
+        quantized = _is_quantizable(variable)
+        if quantized:
+            channel_axis = 0 if variable.path.endswith("embeddings") else -1
+            arrays[f"{i}/q"], arrays[f"{i}/scale"] = quantize_int8(value, channel_axis)
+        else:
+            arrays[f"{i}/value"] = value
+        variables.append({"path": variable.path, "int8": quantized})
+
+    meta = {"version": INT8_FORMAT_VERSION, "variables": variables, **metadata}
+    np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+    return meta
+
+
+def load_int8_weights(model, path: str) -> dict:
+    """Dequantizes the weights of a ``save_int8_weights`` file into a model of the same architecture."""
+    with np.load(path) as archive:
+        meta = json.loads(str(archive["__meta__"]))
+        if meta.get("version") != INT8_FORMAT_VERSION:
+            raise ValueError(f"Unsupported int8 format version {meta.get('version')} in {path}")
+        if len(meta["variables"]) != len(model.weights):
+            raise ValueError(f"{path} holds {len(meta['variables'])} variables, {model.name} has {len(model.weights)}")
+        for i, (variable, stored) in enumerate(zip(model.weights, meta["variables"])):
+            if stored["int8"]:
+                variable.assign(archive[f"{i}/q"].astype(np.float32) * archive[f"{i}/scale"])
+            else:
+                variable.assign(archive[f"{i}/value"])
+    return meta
+
+
+def build_architecture(kind: str, source_path: str):
+    """
+    Builds an untrained model with the architecture of an export.
+
+    The decoder's custom layers are rebuilt with ``create_model`` from the config; a merged GPT-2
+    ``.keras`` file is rebuilt from its stored config without reading its weights.
+    """
+    if kind == "decoder":
+        from models.transformer_decoder_model import create_model
+
+        return create_model()
+
+    import keras
+
+    with zipfile.ZipFile(source_path) as archive:
+        config = json.loads(archive.read("config.json"))
+    return keras.saving.deserialize_keras_object(config)
+
+
+def quantize_export(kind: str, source_path: str, mode: str, out_dir: str) -> str:
+    """
+    Writes one variant of an export and returns the artifact path (the source itself for ``float32``).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unsupported quantization mode: {mode} (choose from {MODES})")
+    if mode == "float32":
+        return source_path
+
+    model = build_architecture(kind, source_path)
+    model.load_weights(source_path)
+    os.makedirs(out_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(source_path))[0]
+    if mode == "weight_only_int8":
+        path = os.path.join(out_dir, f"{name}_int8_weights.npz")
+        save_int8_weights(model, path, kind=kind, source=os.path.basename(source_path))
+    else:
+        path = os.path.join(out_dir, f"{name}_dynamic_int8.weights.h5")
+        model.quantize("int8")
+        model.save_weights(path)
+    return path
+
+
+def load_variant(kind: str, source_path: str, mode: str, artifact_path: str):
+    """Loads a variant the way a serving process would: architecture first, then the artifact's weights."""
+    model = build_architecture(kind, source_path)
+    if mode == "weight_only_int8":
+        load_int8_weights(model, artifact_path)
+    else:
+        if mode == "dynamic_int8":
+            model.quantize("int8")  # Int8 variables must exist before the weights are read
+        model.load_weights(artifact_path)
+    return model
+
+
+def calibration_batches(kind: str, lines: list, batch_size: int):
+    """
+    Tokenizes calibration lines the way each model was trained.
+
+    Returns:
+        list: ``(inputs, labels, sample_weight)`` batches; padding has zero weight.
+    """
+    batches = []
+    if kind == "decoder":
+        from configs.configss import get_config
+        from data.prerocessing_pipeline import SEQ_LEN, build_tokenizer, preprocess_fn
+
+        tokenizer, start_packer = build_tokenizer(get_config().paths["vocab_path"], seq_len=SEQ_LEN)
+        for start in range(0, len(lines), batch_size):
+            inputs, labels = preprocess_fn(lines[start:start + batch_size], tokenizer, start_packer)
+            batches.append((inputs, labels, (np.asarray(labels) != 0).astype("float32")))
+    else:
+        from models.presets import load_preprocessor
+
+        preprocessor = load_preprocessor()
+        for start in range(0, len(lines), batch_size):
+            batches.append(preprocessor(lines[start:start + batch_size]))
+    return batches
+
+
+def evaluate_lm(model, batches, mask_token_id=0) -> dict:
+    """
+    Perplexity (training metric) and forward throughput in non-padding tokens/sec.
+
+    ``mask_token_id`` is the decoder's ``[PAD]``; GPT-2 batches carry a padding mask instead
+    (its token 0 is a real token), so pass ``None`` for them.
+    """
+    import tensorflow as tf
+    from utils.metrics import get_metrics
+
+    perplexity = get_metrics(mask_token_id=mask_token_id)[0]
+    forward = tf.function(lambda x: model(x, training=False))
+    forward(batches[0][0])  # Trace outside the timed loop
+
+    seconds, tokens = 0.0, 0
+    for inputs, labels, sample_weight in batches:
+        start = time.perf_counter()
+        outputs = forward(inputs)
+        logits = outputs[0] if isinstance(outputs, (list, tuple)) else outputs
+        logits = np.asarray(logits)
+        seconds += time.perf_counter() - start
+        perplexity.update_state(labels, logits, sample_weight=sample_weight)
+        tokens += int(np.sum(sample_weight))
+    return {"perplexity": float(perplexity.result()), "tokens_per_s": tokens / seconds if seconds else 0.0}
+
+
+def _size_mb(path: str) -> float:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 2**20
+    return os.path.getsize(path) / 2**20
+
+
+def compare_variants(kind: str, source_path: str, lines: list, out_dir: str, modes=MODES,
+                     batch_size: int = 16, max_ppl_increase: float = 2.0) -> dict:
+    """
+    Quantizes an export into each mode and measures every variant on the calibration lines.
+
+    Args:
+        kind (str): ``"decoder"`` (``create_model`` export) or ``"gpt2"`` (merged LoRA export).
+        source_path (str): Float32 ``.keras`` export.
+        lines (list): Calibration text lines.
+        out_dir (str): Where quantized artifacts and the report are written.
+        modes (tuple): Variants to build; ``float32`` is always measured as the baseline.
+        batch_size (int): Evaluation batch size.
+        max_ppl_increase (float): Largest acceptable perplexity increase over float32, in percent.
+
+    Returns:
+        dict: Per-variant ``size_mb``, ``load_s``, ``perplexity``, ``ppl_increase_pct``,
+        ``tokens_per_s`` and ``speedup``, plus the ``recommended`` variant.
+    """
+    batches = calibration_batches(kind, lines, batch_size)
+    mask_token_id = 0 if kind == "decoder" else None
+    results = {}
+    for mode in ("float32",) + tuple(m for m in modes if m != "float32"):
+        artifact = quantize_export(kind, source_path, mode, out_dir)
+        start = time.perf_counter()
+        model = load_variant(kind, source_path, mode, artifact)
+        load_s = time.perf_counter() - start
+        results[mode] = {"artifact": artifact, "size_mb": _size_mb(artifact), "load_s": load_s, **evaluate_lm(model, batches, mask_token_id)}
+        del model
+
+    base = results["float32"]
+    for r in results.values():
+        r["ppl_increase_pct"] = 100 * (r["perplexity"] / base["perplexity"] - 1)
+        r["speedup"] = r["tokens_per_s"] / base["tokens_per_s"] if base["tokens_per_s"] else 0.0
+    acceptable = [m for m, r in results.items() if r["ppl_increase_pct"] <= max_ppl_increase]
+    report = {
+        "kind": kind,
+        "source": source_path,
+        "calibration_lines": len(lines),
+        "max_ppl_increase_pct": max_ppl_increase,
+        "variants": results,
+        "recommended": min(acceptable, key=lambda m: results[m]["size_mb"]),
+    }
+    with open(os.path.join(out_dir, "quantization_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Int8 quantization of decoder and merged LoRA exports for CPU serving")
+    parser.add_argument("--kind", choices=KINDS, required=True)
+    parser.add_argument("--model", type=str, required=True, help="Float32 .keras export")
+    parser.add_argument("--out-dir", type=str, required=True)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--calibration-file", type=str, default=None,
+                        help="Cleaned corpus lines (default: valid_clean.txt in the config's clean_data_dir)")
+    parser.add_argument("--num-samples", type=int, default=256)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--max-ppl-increase", type=float, default=2.0, help="Acceptable perplexity increase in percent")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CUDA_VISIBLE_DEVICES", "-1")  # Measure what CPU serving sees
+    from configs.configss import get_config
+    from data.prerocessing_pipeline import load_and_clean_lines
+
+    calibration_file = args.calibration_file or os.path.join(get_config().paths["clean_data_dir"], "valid_clean.txt")
+    lines = load_and_clean_lines(calibration_file)[:args.num_samples]
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    report = compare_variants(args.kind, args.model, lines, args.out_dir, tuple(args.modes),
+                              args.batch_size, args.max_ppl_increase)
+    print(f"{'variant':<18} {'size MB':>9} {'load s':>8} {'ppl':>9} {'Δppl %':>8} {'tok/s':>10} {'speedup':>8}")
+    for mode, r in report["variants"].items():
+        print(f"{mode:<18} {r['size_mb']:>9.1f} {r['load_s']:>8.2f} {r['perplexity']:>9.3f} "
+              f"{r['ppl_increase_pct']:>8.2f} {r['tokens_per_s']:>10.0f} {r['speedup']:>8.2f}")
+    print(f"\n✅ Smallest variant within +{args.max_ppl_increase}% perplexity: {report['recommended']}")
@@ -11,6 +11,10 @@ class TokenAndPositionEmbedding(layers.Layer):
     - An embedding vector for each position in the input sequence.
     
     The final embedding is a sum of the token embedding and the positional embedding.
+
+    Called with ``reverse=True`` the layer maps hidden states back to vocabulary logits with the
+    transposed token embedding matrix, so a model can tie its output projection to its input
+    embeddings (as ``keras_nlp.layers.ReversibleEmbedding`` does).
     """
     def __init__(self, maxlen: int, vocab_size: int, embed_dim: int):
         """
@@ -26,16 +30,22 @@ class TokenAndPositionEmbedding(layers.Layer):
         self.pos_emb = layers.Embedding(input_dim=maxlen, output_dim=embed_dim)
 
     
-    def call(self, x):
+    def call(self, x, reverse: bool = False):
         """
         Applies token and positional embeddings to the input.
 
         Args:
-            x (tf.Tensor): Input tensor of shape (batch_size, sequence_length).
+            x (tf.Tensor): Input tensor of shape (batch_size, sequence_length), or hidden states
+                of shape (..., embed_dim) when ``reverse`` is set.
+            reverse (bool): Project hidden states onto the token embeddings instead.
 
         Returns:
-            tf.Tensor: Output tensor of shape (batch_size, sequence_length, embed_dim).
+            tf.Tensor: Output tensor of shape (batch_size, sequence_length, embed_dim), or
+            (..., vocab_size) logits when ``reverse`` is set.
         """
+        if reverse:
+            return self._reverse(x)
+
         seq_len = ops.shape(x)[-1] # Get the sequence length from the input tensor shape
 
         # Create position indices [0, 1, 2, ..., sequence_length - 1]
@@ -48,4 +58,17 @@ class TokenAndPositionEmbedding(layers.Layer):
         token_embeddings = self.token_emb(x)
 
         # Combine both
-        return token_embeddings + position_embeddings
\ No newline at end of file
+        return token_embeddings + position_embeddings
+
+    def _reverse(self, x):
+        """Logits of hidden states against every token embedding (the tied output projection)."""
+        mode = self.token_emb.quantization_mode
+        if mode is None:
+            # Same variable as the input lookup: its gradient sums both uses
+            return ops.matmul(x, ops.transpose(self.token_emb.embeddings))
+        if mode == "int8":
+            # Int8 rows with one scale per token (``model.quantize("int8")``): multiply by the
+            # int8 matrix and de-scale each vocabulary column of the logits
+            kernel = ops.cast(self.token_emb.embeddings, x.dtype)
+            return ops.divide(ops.matmul(x, ops.transpose(kernel)), ops.cast(self.token_emb.embeddings_scale, x.dtype))
+        raise NotImplementedError(f"Tied output projection does not support {mode!r} quantized embeddings")
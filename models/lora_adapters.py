@@ -0,0 +1,171 @@
+import json
+import numpy as np
+from tensorflow import keras
+from models.lora_layer import LoraLayer, find_lora_layers, replace_layer, reset_traced_functions
+from models.presets import PRESET, SEQ_LENGTH, load_base_model  # Re-exported for existing callers
+from models.presets import new_causal_lm
+
+ADAPTER_FORMAT_VERSION = 1
+
+
+def _lora_slots(model: keras.layers.Layer, prefix: str = ""):
+    """
+    Yields ``(parent_path, parent, attr, layer)`` for every layer attribute of the model tree.
+
+    The parent path is built from layer names (e.g. ``gpt2_backbone/transformer_layer_0/self_attention``),
+    which is stable across instances of the same architecture. The model itself is the empty path.
+    """
+    seen = set()
+    stack = [(prefix, model)]
+    while stack:
+        path, parent = stack.pop()
+        if id(parent) in seen:
+            continue
+        seen.add(id(parent))
+        children = [value for value in vars(parent).values() if isinstance(value, keras.layers.Layer)]
+        for attr, value in vars(parent).items():
+            if isinstance(value, keras.layers.Layer):
+                yield path, parent, attr, value
+        children += list(parent._flatten_layers(include_self=False, recursive=False))
+        for child in children:
+            if not isinstance(child, LoraLayer):  # Adapters and their wrapped layer are leaves here
+                stack.append((f"{path}/{child.name}" if path else child.name, child))
+
+
+def _find_parent(model: keras.layers.Layer, parent_path: str):
+    for path, parent, _, _ in _lora_slots(model):
+        if path == parent_path:
+            return parent
+    raise KeyError(f"No layer at {parent_path!r} in {model.name}")
+
+
+def save_lora_adapters(model: keras.layers.Layer, path: str, preset: str = PRESET, **metadata) -> dict:
+    """
+    Saves only the LoRA ``A``/``B`` kernels of a model plus where each adapter attaches.
+
+    The file is a ``.npz`` archive of a few MB, instead of the hundreds of MB of a full
+    merged GPT-2 export. Adapters must be unmerged when saved.
+
+    Args:
+        model (keras.layers.Layer): Model containing ``LoraLayer`` wrappers.
+        path (str): Output ``.npz`` path.
+        preset (str): Base preset the adapters were trained on (loaded by ``load_lora_model``).
+        **metadata: Extra JSON-serializable fields stored with the adapters.
+
+    Returns:
+        dict: The stored metadata.
+    """
+    arrays = {}
+    adapters = []
+    for parent_path, _, attr, layer in _lora_slots(model):
+        if not isinstance(layer, LoraLayer):
+            continue
+        if layer.merged:
+            raise ValueError(f"{parent_path}/{attr} is merged; unmerge the adapters before saving")
+        key = f"{parent_path}/{attr}"
+        arrays[f"{key}/A"] = keras.ops.convert_to_numpy(layer.A.kernel)
+        arrays[f"{key}/B"] = keras.ops.convert_to_numpy(layer.B.kernel)
+        adapters.append({"parent": parent_path, "attr": attr, "rank": layer.rank, "alpha": layer.alpha})
+
+    if not adapters:
+        raise ValueError(f"{model.name} has no LoRA layers to save")
+
+    meta = {"version": ADAPTER_FORMAT_VERSION, "preset": preset, "adapters": adapters, **metadata}
+    np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+    return meta
+
+
+def read_adapter_metadata(path: str) -> dict:
+    """Returns the metadata stored in an adapter file without loading the kernels."""
+    with np.load(path) as archive:
+        return json.loads(str(archive["__meta__"]))
+
+
+def detach_lora_adapters(model: keras.layers.Layer) -> int:
+    """
+    Restores the original layers wherever a ``LoraLayer`` is attached (merged adapters are
+    subtracted first), leaving the base model untouched: its weights are exactly the base
+    weights again, so switching adapters does not grow the model.
+
+    Raises:
+        RuntimeError: If a ``LoraLayer`` is still part of the model afterwards.
+
+    Returns:
+        int: Number of adapters detached.
+    """
+    detached = 0
+    for _, parent, attr, layer in list(_lora_slots(model)):
+        if isinstance(layer, LoraLayer):
+            layer.unmerge()
+            replace_layer(parent, attr, layer.original_layer)
+            detached += 1
+    leftover = find_lora_layers(model)
+    if leftover:
+        # A wrapper still tracked would keep its weights in the model and be merged by the model-level helpers
+        raise RuntimeError(f"{model.name} still holds LoRA layers after detaching: {[layer.name for layer in leftover]}")
+    if detached:
+        reset_traced_functions(model)  # Traced generate/predict still call the adapters
+    return detached
+
+
+def attach_lora_adapters(model: keras.layers.Layer, path: str, merge: bool = False) -> dict:
+    """
+    Attaches the adapters of a file to a base model, replacing any adapters already attached.
+
+    Args:
+        model (keras.layers.Layer): Base model, typically from ``load_base_model``.
+        path (str): Adapter file written by ``save_lora_adapters``.
+        merge (bool): Fold the adapters into the kernels for base-model inference cost.
+
+    Returns:
+        dict: The adapter metadata.
+    """
+    meta = read_adapter_metadata(path)
+    if meta.get("version") != ADAPTER_FORMAT_VERSION:
+        raise ValueError(f"Unsupported adapter format version {meta.get('version')} in {path}")
+
+    detach_lora_adapters(model)
+    with np.load(path) as archive:
+        for adapter in meta["adapters"]:
+            parent = _find_parent(model, adapter["parent"])
+            original = getattr(parent, adapter["attr"])
+            key = f"{adapter['parent']}/{adapter['attr']}"
+            A, B = archive[f"{key}/A"], archive[f"{key}/B"]
+
+            lora = LoraLayer(original, rank=adapter["rank"], alpha=adapter["alpha"], trainable=False)
+            # Build the adapter kernels from the saved shapes: A maps the input's last axis to the
+            # rank, B consumes a rank-sized last axis with the original layer's einsum equation
+            lora.A.build((None, A.shape[0]))
+            equation = getattr(lora.B, "equation", None)  # None for Dense
+            b_rank = len(equation.split(",")[0]) if equation else 2
+            lora.B.build((1,) * (b_rank - 1) + (adapter["rank"],))
+            lora.A.kernel.assign(A)
+            lora.B.kernel.assign(B)
+
+            replace_layer(parent, adapter["attr"], lora)
+            if merge:
+                lora.merge()
+    reset_traced_functions(model)
+    return meta
+
+
+def load_lora_model(adapter_path: str, sequence_length: int = SEQ_LENGTH, merge: bool = False,
+                    shared: bool = False):
+    """
+    Returns a GPT-2 causal LM for the adapter's preset with the adapter attached.
+
+    The model is a private copy (``new_causal_lm``; only the first copy of a preset reads it from
+    disk), so adapters loaded by other callers or a ``MultiAdapterModel`` never touch it.
+
+    Args:
+        adapter_path (str): Adapter file written by ``save_lora_adapters``.
+        sequence_length (int): Preprocessor sequence length.
+        merge (bool): Fold the adapters into the kernels for base-model inference cost.
+        shared (bool): Attach to the process-wide ``load_base_model`` instance instead, which
+            saves a copy of the weights. Every caller then holds the same model: the next
+            adapter loaded this way replaces this one under all of them.
+    """
+    preset = read_adapter_metadata(adapter_path).get("preset", PRESET)
+    model = load_base_model(preset, sequence_length) if shared else new_causal_lm(preset, sequence_length)
+    attach_lora_adapters(model, adapter_path, merge=merge)
+    return model
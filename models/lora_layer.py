@@ -9,11 +9,24 @@ class LoraLayer(keras.layers.Layer):
     LoRA injects trainable low-rank matrices (A and B) into the original weight matrix of a frozen layer,
     allowing efficient fine-tuning of large pre-trained models with minimal trainable parameters.
 
+    The adapter is applied in three ways:
+    - unmerged (default): ``original(x) + B(A(x)) * alpha / rank``, in training and at inference.
+      ``enabled = False`` turns the adapter off, which gives the base model for A/B comparisons.
+    - merged: ``merge()`` folds ``A @ B * alpha / rank`` into the frozen kernel, so the forward pass
+      costs exactly one matmul, as in the base model. ``unmerge()`` subtracts it again.
+
+    ``enabled`` and ``merged`` are Python flags read while tracing, so a model's cached
+    ``generate``/``predict``/``evaluate``/``fit`` functions keep the branch they were traced with.
+    The model-level helpers below reset those functions; after toggling single layers, call
+    ``reset_traced_functions(model)``.
+
     Attributes:
         original_layer (keras.layers.Layer): The frozen original dense or einsum layer.
         rank (int): The rank of the low-rank adapter matrices.
         alpha (int): Scaling factor to control the LoRA output magnitude.
         trainable (bool): Whether the LoRA adapters are trainable.
+        enabled (bool): Whether the unmerged adapter is added to the output.
+        merged (bool): Whether the adapter is currently folded into the original kernel.
     """
 
     def __init__(
@@ -43,6 +56,8 @@ class LoraLayer(keras.layers.Layer):
         self.rank = rank
         self.alpha = alpha
         self._scale = alpha / rank
+        self.enabled = True
+        self.merged = False
 
         # Retrieve output shape and einsum equation (if applicable)
         self._equation = original_layer_config.get("equation")
@@ -63,13 +78,31 @@ class LoraLayer(keras.layers.Layer):
             name=f"{name}_lora_A",
         )
 
-        self.B = keras.layers.EinsumDense(
-            equation=self._equation,
-            output_shape=self._output_shape,
-            kernel_initializer="zeros",
-            trainable=trainable,
-            name=f"{name}_lora_B",
-        )
+        if self._equation is None:
+            # Dense: B maps the rank back to the layer's units. The update is added after the
+            # layer, which only equals a kernel update when there is no activation in between.
+            if original_layer_config.get("activation", "linear") != "linear":
+                raise ValueError(f"{name}: LoRA cannot wrap a Dense layer with a non-linear activation")
+            self.B = keras.layers.Dense(
+                units=original_layer_config["units"],
+                use_bias=False,
+                kernel_initializer="zeros",
+                trainable=trainable,
+                name=f"{name}_lora_B",
+            )
+        else:
+            input_axes, kernel_axes = self._equation.split("->")[0].split(",")
+            if set(input_axes) & set(kernel_axes) != {input_axes[-1]}:
+                raise ValueError(
+                    f"{name}: LoRA needs a layer contracting only the last input axis (equation {self._equation})"
+                )
+            self.B = keras.layers.EinsumDense(
+                equation=self._equation,
+                output_shape=self._output_shape,
+                kernel_initializer="zeros",
+                trainable=trainable,
+                name=f"{name}_lora_B",
+            )
 
     def call(self, inputs, training=False):
         """
@@ -82,13 +115,144 @@ class LoraLayer(keras.layers.Layer):
         Returns:
             tf.Tensor: Output tensor with or without LoRA adaptation.
         """
-        # Forward pass through the frozen original layer
+        # Forward pass through the frozen original layer (already includes a merged adapter)
         original_output = self.original_layer(inputs)
 
-        if self.trainable and training:
+        if self.enabled and not self.merged:
             # Compute LoRA output and add it to the original output
             lora_output = self.B(self.A(inputs)) * self._scale
             return original_output + lora_output
 
-        # During inference or if LoRA is not trainable
+        # Adapter merged into the kernel, or disabled for base-model comparisons
         return original_output
+
+    def delta_kernel(self) -> tf.Tensor:
+        """
+        Returns the adapter as a dense kernel update, ``A @ B * alpha / rank``.
+
+        ``A`` is ``(input_dim, rank)`` and ``B`` is ``(rank, *output_shape)``, so the result has the
+        shape of the original kernel (e.g. ``(hidden, num_heads, head_dim)`` for attention projections).
+        """
+        return tf.tensordot(self.A.kernel, self.B.kernel, axes=1) * self._scale
+
+    def merge(self) -> None:
+        """
+        Folds the adapter into the frozen kernel so inference costs the same as the base model.
+
+        Training a merged layer does not update the adapter; call ``unmerge()`` first.
+        """
+        if self.merged:
+            return
+        if not self.A.built or not self.B.built:
+            raise ValueError(f"{self.name}: call the layer once before merging (adapter weights are not built)")
+        self.original_layer.kernel.assign_add(tf.cast(self.delta_kernel(), self.original_layer.kernel.dtype))
+        self.merged = True
+
+    def unmerge(self) -> None:
+        """
+        Subtracts a merged adapter from the kernel again (exact up to float rounding).
+        """
+        if not self.merged:
+            return
+        self.original_layer.kernel.assign_sub(tf.cast(self.delta_kernel(), self.original_layer.kernel.dtype))
+        self.merged = False
+
+
+TRACED_FUNCTIONS = ("generate_function", "predict_function", "test_function", "train_function")
+
+
+def reset_traced_functions(model: keras.layers.Layer) -> None:
+    """
+    Drops a model's cached traced functions so the next call re-traces with the current layers.
+
+    Needed whenever an adapter is merged, unmerged, switched on or off, attached or detached.
+    """
+    for attr in TRACED_FUNCTIONS:
+        if getattr(model, attr, None) is not None:
+            setattr(model, attr, None)
+
+
+def replace_layer(parent: keras.layers.Layer, attr: str, layer: keras.layers.Layer) -> None:
+    """
+    Sets ``parent.<attr>`` to ``layer`` and stops tracking the layer it replaces.
+
+    Keras tracks a sublayer when it is assigned and keeps it after the attribute is reassigned,
+    so a plain ``setattr`` leaves the replaced layer (and its weights) in the model: its variables
+    stay in ``model.weights`` and saved files, and a replaced ``LoraLayer`` is still found by
+    ``find_lora_layers``. Every wrap and unwrap goes through here.
+    """
+    replaced = getattr(parent, attr)
+    tracker = getattr(parent, "_tracker", None)
+    if tracker is not None:
+        tracker.locked = False  # Allow modifications
+        if replaced is not layer:
+            tracker.untrack(replaced)
+    setattr(parent, attr, layer)
+
+
+def find_lora_layers(model: keras.layers.Layer) -> list:
+    """
+    Returns every ``LoraLayer`` inside a model (or any layer), in traversal order.
+    """
+    return [layer for layer in model._flatten_layers() if isinstance(layer, LoraLayer)]
+
+
+def merge_lora_layers(model: keras.layers.Layer) -> int:
+    """
+    Merges every adapter of a model into its base kernels.
+
+    Returns:
+        int: Number of LoRA layers merged.
+    """
+    lora_layers = find_lora_layers(model)
+    for layer in lora_layers:
+        layer.merge()
+    reset_traced_functions(model)
+    return len(lora_layers)
+
+
+def unmerge_lora_layers(model: keras.layers.Layer) -> int:
+    """
+    Restores the unmerged base kernels of a model, e.g. to continue training or compare adapters.
+
+    Returns:
+        int: Number of LoRA layers unmerged.
+    """
+    lora_layers = find_lora_layers(model)
+    for layer in lora_layers:
+        layer.unmerge()
+    reset_traced_functions(model)
+    return len(lora_layers)
+
+
+def set_lora_enabled(model: keras.layers.Layer, enabled: bool) -> None:
+    """
+    Switches the unmerged adapters of a model on or off (``False`` serves the base model).
+    """
+    for layer in find_lora_layers(model):
+        if layer.merged:
+            raise ValueError(f"{layer.name}: unmerge the adapters before disabling them")
+        layer.enabled = enabled
+    reset_traced_functions(model)
+
+
+def unwrap_lora_layers(model: keras.layers.Layer) -> int:
+    """
+    Merges every adapter and replaces each ``LoraLayer`` with its original layer in place.
+
+    The resulting model has exactly the base architecture (and can be saved without the custom
+    layer); the adapters cannot be unmerged afterwards.
+
+    Returns:
+        int: Number of LoRA layers replaced.
+    """
+    replaced = 0
+    for parent in list(model._flatten_layers()):
+        for attr, value in list(vars(parent).items()):
+            if not isinstance(value, LoraLayer):
+                continue
+            value.merge()
+            replace_layer(parent, attr, value.original_layer)
+            replaced += 1
+    reset_traced_functions(model)
+    return replaced
@@ -1,57 +1,166 @@
-import tensorflow as tf
-import keras_nlp as keras_hub  # Or use: import keras_nlp.models as keras_hub
-from lora_layer import LoraLayer  # Assuming you've saved it as lora_layer.py
+"""
+GPT-2 with LoRA adapters injected into configurable target modules.
+
+Importing this module is free: TensorFlow, KerasNLP and the preset are only loaded
+when a model is built. ``build_lora_model`` returns a fresh model for training;
+``get_lora_model`` (and the legacy ``lora_model`` module attribute) builds the
+default configuration once per process.
+"""
+
+import numpy as np
+from models.presets import PRESET, SEQ_LENGTH
 
 # Step 2: Set LoRA parameters
 RANK = 4
 ALPHA = 32.0
-SEQ_LENGTH = 128
-PRESET = "gpt2_base_en"
-
-# Step 3: Load GPT-2 with preprocessor
-preprocessor = keras_hub.models.GPT2CausalLMPreprocessor.from_preset(
-    PRESET,
-    sequence_length=SEQ_LENGTH,
-)
-lora_model = keras_hub.models.GPT2CausalLM.from_preset(
-    PRESET,
-    preprocessor=preprocessor,
-)
-
-# Step 4: Apply LoRA to selected attention layers (query and value projections)
-for layer_idx in range(lora_model.backbone.num_layers):
-    decoder_layer = lora_model.backbone.get_layer(f"transformer_layer_{layer_idx}")
-    self_attention_layer = decoder_layer._self_attention_layer
-
-    # Allow modifications
-    self_attention_layer._tracker.locked = False
-
-    # Replace query and value dense layers with LoRA-wrapped versions
-    self_attention_layer._query_dense = LoraLayer(
-        self_attention_layer._query_dense,
-        rank=RANK,
-        alpha=ALPHA,
-        trainable=True,
-    )
-    self_attention_layer._value_dense = LoraLayer(
-        self_attention_layer._value_dense,
-        rank=RANK,
-        alpha=ALPHA,
-        trainable=True,
-    )
-
-print("✅ LoRA layers successfully injected into GPT-2 model.")
-
-output = lora_model(preprocessor(["LoRA is very useful for quick LLM finetuning"])[0])
-print("✅ Inference successful")
-
-for layer in lora_model._flatten_layers():
-    lst_of_sublayers = list(layer._flatten_layers())
-
-    if len(lst_of_sublayers) == 1:  # "leaves of the model"
-        if layer.name in ["lora_A", "lora_B"]:
-            layer.trainable = True
-        else:
-            layer.trainable = False
-
-print("✅ Only LoRA layers are set as trainable")
+
+# Layer attributes LoRA can wrap in a GPT-2 decoder layer. The attention output projection
+# contracts two axes and the intermediate feed-forward layer has a GELU activation, so neither
+# has a plain kernel update and they are not offered.
+TARGET_MODULES = ("_query_dense", "_key_dense", "_value_dense", "_feedforward_output_dense")
+DEFAULT_TARGETS = {
+    "_query_dense": {"rank": RANK, "alpha": ALPHA},
+    "_value_dense": {"rank": RANK, "alpha": ALPHA},
+}
+ADAM_SLOTS = 2  # First and second moment per trainable weight
+
+
+def inject_lora(model, targets: dict = None) -> int:
+    """
+    Wraps every layer stored under one of the target attribute names with a trainable ``LoraLayer``.
+
+    Args:
+        model (keras.Model): Model to modify in place (e.g. ``GPT2CausalLM``).
+        targets (dict): Attribute name -> ``{"rank": int, "alpha": float}``, e.g.
+            ``{"_query_dense": {"rank": 4, "alpha": 32}, "_feedforward_output_dense": {"rank": 8, "alpha": 16}}``.
+
+    Returns:
+        int: Number of layers wrapped.
+    """
+    from models.lora_layer import LoraLayer, replace_layer
+    from models.lora_adapters import _lora_slots
+
+    targets = DEFAULT_TARGETS if targets is None else targets
+    unknown = set(targets) - set(TARGET_MODULES)
+    if unknown:
+        raise ValueError(f"Unsupported LoRA targets {sorted(unknown)}; choose from {TARGET_MODULES}")
+
+    wrapped = 0
+    for _, parent, attr, layer in list(_lora_slots(model)):
+        if attr not in targets or isinstance(layer, LoraLayer):
+            continue
+        replace_layer(parent, attr, LoraLayer(layer, rank=targets[attr]["rank"], alpha=targets[attr]["alpha"], trainable=True))
+        wrapped += 1
+    if not wrapped:
+        raise ValueError(f"No layers named {sorted(targets)} found in {model.name}")
+    return wrapped
+
+
+def freeze_except_lora(model) -> None:
+    """
+    Makes only the LoRA ``A``/``B`` kernels trainable.
+
+    Trainability is set on the leaves of the layer tree: freezing a parent would hide the adapters'
+    weights from ``trainable_weights`` as well.
+    """
+    from models.lora_layer import find_lora_layers
+
+    adapter_layers = {id(sub) for lora in find_lora_layers(model) for sub in (lora.A, lora.B)}
+    for layer in model._flatten_layers():
+        if len(list(layer._flatten_layers())) == 1:  # "leaves of the model"
+            layer.trainable = id(layer) in adapter_layers
+
+
+def _count(weights) -> int:
+    return int(sum(np.prod(w.shape) for w in weights))
+
+
+def lora_parameter_report(model, bytes_per_param: int = 4, optimizer_slots: int = ADAM_SLOTS) -> dict:
+    """
+    Trainable versus total parameters and the training memory they imply.
+
+    Gradients and optimizer state (``optimizer_slots`` per trainable weight, 2 for Adam/AdamW)
+    are only held for trainable weights, so this is what a LoRA configuration saves over full
+    fine-tuning.
+
+    Args:
+        model (keras.Model): Model after ``inject_lora`` and ``freeze_except_lora``.
+        bytes_per_param (int): 4 for float32 weights and optimizer state.
+        optimizer_slots (int): Optimizer state tensors per trainable weight.
+
+    Returns:
+        dict: Parameter counts, trainable share, per-target adapter sizes and memory in MB.
+    """
+    from models.lora_layer import LoraLayer, find_lora_layers
+    from models.lora_adapters import _lora_slots
+
+    trainable = _count(model.trainable_weights)
+    total = _count(model.weights)
+    adapters = _count(w for lora in find_lora_layers(model) for w in lora.A.weights + lora.B.weights)
+    by_target = {}
+    for _, _, attr, layer in _lora_slots(model):
+        if isinstance(layer, LoraLayer):
+            by_target[attr] = by_target.get(attr, 0) + _count(layer.A.weights + layer.B.weights)
+
+    mb = bytes_per_param / 2**20
+    report = {
+        "trainable_params": trainable,
+        "total_params": total,
+        "trainable_pct": round(100 * trainable / total, 3) if total else 0.0,
+        "adapter_params_by_target": by_target,
+        "weights_mb": round(total * mb, 1),
+        "gradients_mb": round(trainable * mb, 1),
+        "optimizer_state_mb": round(trainable * optimizer_slots * mb, 1),
+        "full_finetune_optimizer_state_mb": round((total - adapters) * optimizer_slots * mb, 1),
+    }
+    if trainable != adapters:
+        # Anything trainable beyond the adapters costs optimizer memory without being intended
+        report["unexpected_trainable_params"] = trainable - adapters
+    return report
+
+
+def build_lora_model(targets: dict = None, preset: str = PRESET, sequence_length: int = SEQ_LENGTH):
+    """
+    Builds GPT-2 from a (cached) preset, injects LoRA into the target modules and freezes everything else.
+
+    Every call returns a new model; the preset itself is loaded once per process (``models.presets``).
+
+    Args:
+        targets (dict): Attribute name -> ``{"rank", "alpha"}`` (default: query/value, rank 4, alpha 32).
+        preset (str): KerasNLP preset name.
+        sequence_length (int): Preprocessor sequence length.
+
+    Returns:
+        tuple: (model, preprocessor, report) with the ``lora_parameter_report`` of the model.
+    """
+    from models.presets import load_preprocessor, new_causal_lm
+
+    # Step 3: Load GPT-2 with preprocessor
+    preprocessor = load_preprocessor(preset, sequence_length)
+    model = new_causal_lm(preset, sequence_length)
+
+    # Step 4: Apply LoRA to the selected layers and build the adapter weights with one forward pass
+    inject_lora(model, targets)
+    model(preprocessor(["LoRA is very useful for quick LLM finetuning"])[0])
+    freeze_except_lora(model)
+    return model, preprocessor, lora_parameter_report(model)
+
+
+_default_model = None
+
+
+def get_lora_model():
+    """Returns the default LoRA model (query/value, rank 4), built on first use."""
+    global _default_model
+    if _default_model is None:
+        _default_model = build_lora_model()
+        print("✅ LoRA layers successfully injected into GPT-2 model.")
+        print(f"✅ Only LoRA layers are set as trainable: {_default_model[2]}")
+    return _default_model
+
+
+def __getattr__(name):
+    # Legacy module attributes (``from models.lora_model import lora_model``) build the model lazily
+    if name in ("lora_model", "preprocessor", "report"):
+        return dict(zip(("lora_model", "preprocessor", "report"), get_lora_model()))[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,225 @@
+import threading
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from models.lora_adapters import PRESET, SEQ_LENGTH, _lora_slots, read_adapter_metadata
+from models.presets import new_causal_lm
+from models.lora_layer import replace_layer, reset_traced_functions
+
+TARGETS = ("_query_dense", "_value_dense")
+MAX_ADAPTERS = 16
+MAX_RANK = 16
+
+
+def _nbytes(variable) -> int:
+    dtype = getattr(variable.dtype, "as_numpy_dtype", variable.dtype)  # tf.DType or dtype name
+    return int(np.prod(variable.shape)) * np.dtype(dtype).itemsize
+
+
+class AdapterRouter:
+    """
+    Per-row adapter selection shared by every ``MultiLoraLayer`` of a model.
+
+    Holds one adapter slot per batch row (slot 0 is the bare base model). A single id
+    applies to every row of the batch.
+    """
+
+    def __init__(self):
+        self.ids = tf.Variable([0], shape=tf.TensorShape([None]), dtype=tf.int32, trainable=False)
+
+    def set(self, ids) -> None:
+        self.ids.assign(tf.convert_to_tensor(ids, dtype=tf.int32))
+
+
+class MultiLoraLayer(keras.layers.Layer):
+    """
+    Wraps a frozen Dense or EinsumDense layer with a bank of LoRA adapters applied per batch row.
+
+    All adapters share the original kernel; each slot only stores its ``A`` (``input_dim x rank``) and
+    ``B`` (``rank x output``) kernels, zero-padded to ``max_rank`` with ``alpha / rank`` folded into ``B``.
+    For row ``i`` using slot ``s``: ``y_i = original(x_i) + (x_i @ A[s]) @ B[s]``. Slot 0 stays zero,
+    so rows routed to it get exactly the base model's output.
+
+    Attributes:
+        original_layer (keras.layers.Layer): The frozen original dense or einsum layer.
+        router (AdapterRouter): Source of the per-row slot ids.
+        max_adapters (int): Number of adapter slots, including the base slot 0.
+        max_rank (int): Largest adapter rank a slot can hold.
+    """
+
+    def __init__(self, original_layer, router: AdapterRouter, max_adapters: int = MAX_ADAPTERS,
+                 max_rank: int = MAX_RANK, **kwargs):
+        """
+        Initializes the MultiLoraLayer.
+
+        Args:
+            original_layer (keras.layers.Layer): The built Dense or EinsumDense layer to wrap.
+            router (AdapterRouter): Router shared by all wrapped layers of the model.
+            max_adapters (int): Number of adapter slots, including the base slot 0.
+            max_rank (int): Largest adapter rank a slot can hold.
+            **kwargs: Additional keyword arguments passed to the base Layer class.
+        """
+        kwargs.pop("name", None)
+        super().__init__(name=original_layer.name, trainable=False, **kwargs)
+        self.original_layer = original_layer
+        self.original_layer.trainable = False
+        self.router = router
+        self.max_adapters = max_adapters
+        self.max_rank = max_rank
+
+        kernel_shape = tuple(original_layer.kernel.shape)
+        self._output_shape = kernel_shape[1:]
+        output_size = int(np.prod(self._output_shape))
+        dtype = original_layer.kernel.dtype
+        self.A_bank = tf.Variable(tf.zeros((max_adapters, kernel_shape[0], max_rank), dtype), trainable=False)
+        self.B_bank = tf.Variable(tf.zeros((max_adapters, max_rank, output_size), dtype), trainable=False)
+
+    def set_slot(self, slot: int, A: np.ndarray, B: np.ndarray, alpha: float) -> None:
+        """Loads an adapter into a slot (``A``: ``(input_dim, rank)``, ``B``: ``(rank, *output_shape)``)."""
+        if slot <= 0 or slot >= self.max_adapters:
+            raise ValueError(f"Slot {slot} out of range 1..{self.max_adapters - 1}")
+        rank = A.shape[1]
+        if rank > self.max_rank:
+            raise ValueError(f"Adapter rank {rank} exceeds max_rank={self.max_rank}")
+        A_padded = np.zeros(self.A_bank.shape[1:], dtype=self.A_bank.dtype.as_numpy_dtype)
+        B_padded = np.zeros(self.B_bank.shape[1:], dtype=self.B_bank.dtype.as_numpy_dtype)
+        A_padded[:, :rank] = A
+        B_padded[:rank] = B.reshape(rank, -1) * (alpha / rank)
+        self.A_bank[slot].assign(A_padded)
+        self.B_bank[slot].assign(B_padded)
+
+    def clear_slot(self, slot: int) -> None:
+        self.A_bank[slot].assign(tf.zeros_like(self.A_bank[slot]))
+        self.B_bank[slot].assign(tf.zeros_like(self.B_bank[slot]))
+
+    def call(self, inputs):
+        """
+        Forward pass: the frozen layer plus each row's selected adapter.
+
+        Args:
+            inputs (tf.Tensor): Input tensor whose last axis is contracted by the original layer.
+
+        Returns:
+            tf.Tensor: Output tensor of the original layer's shape.
+        """
+        original_output = self.original_layer(inputs)
+        ids = tf.broadcast_to(self.router.ids, tf.shape(inputs)[:1])
+        A = tf.gather(self.A_bank, ids)  # (batch, input_dim, max_rank)
+        B = tf.gather(self.B_bank, ids)  # (batch, max_rank, output_size)
+        low_rank = tf.einsum("b...d,bdr->b...r", tf.cast(inputs, A.dtype), A)
+        delta = tf.einsum("b...r,bro->b...o", low_rank, B)
+        return original_output + tf.cast(tf.reshape(delta, tf.shape(original_output)), original_output.dtype)
+
+
+class MultiAdapterModel:
+    """
+    Serves many LoRA adapters over one frozen GPT-2 backbone.
+
+    The backbone is loaded once, as a private model (``new_causal_lm``) nobody else in the process
+    modifies; every targeted projection is replaced by a ``MultiLoraLayer`` whose adapter bank grows
+    by ``A`` + ``B`` per resident adapter, not by a model copy. A batch may mix adapters:
+    ``generate(prompts, adapters)`` routes each row to its own one.
+
+    Usage:
+        >>> server = MultiAdapterModel()
+        >>> server.add_adapter("zarathustra", "exports2/zarathustra.npz")
+        >>> server.generate(["God is", "The herd"], adapters=["zarathustra", None])
+    """
+
+    def __init__(self, preset: str = PRESET, sequence_length: int = SEQ_LENGTH, targets=TARGETS,
+                 max_adapters: int = MAX_ADAPTERS, max_rank: int = MAX_RANK):
+        """
+        Args:
+            preset (str): Base preset every adapter must have been trained on.
+            sequence_length (int): Preprocessor sequence length.
+            targets (tuple): Layer attributes to wrap (must cover the adapters' attach points).
+            max_adapters (int): Resident adapters plus the base slot.
+            max_rank (int): Largest adapter rank accepted.
+        """
+        self.preset = preset
+        self.model = new_causal_lm(preset, sequence_length, keep_weights=False)  # Loaded once, no spare copy
+        self.router = AdapterRouter()
+        self.slots = {}  # adapter name -> slot
+        self._lock = threading.Lock()  # The router is per model: one batch at a time
+        self.layers = {}
+        for parent_path, parent, attr, layer in list(_lora_slots(self.model)):
+            if attr in targets and not isinstance(layer, MultiLoraLayer):
+                wrapped = MultiLoraLayer(layer, self.router, max_adapters=max_adapters, max_rank=max_rank)
+                replace_layer(parent, attr, wrapped)
+                self.layers[f"{parent_path}/{attr}"] = wrapped
+        if not self.layers:
+            raise ValueError(f"No layers named {targets} found in {preset}")
+        reset_traced_functions(self.model)  # Functions traced before still call the unwrapped layers
+        self.max_adapters = max_adapters
+
+    def add_adapter(self, name: str, path: str) -> int:
+        """
+        Loads an adapter file (``save_lora_adapters`` format) into a free slot.
+
+        Returns:
+            int: The slot assigned to the adapter.
+        """
+        meta = read_adapter_metadata(path)
+        if meta.get("preset", PRESET) != self.preset:
+            raise ValueError(f"{path} was trained on {meta.get('preset')}, not {self.preset}")
+        used = set(self.slots.values())
+        if name in self.slots:
+            slot = self.slots[name]
+        else:
+            free = [s for s in range(1, self.max_adapters) if s not in used]
+            if not free:
+                raise RuntimeError(f"All {self.max_adapters - 1} adapter slots are in use")
+            slot = free[0]
+
+        with np.load(path) as archive, self._lock:
+            for layer in self.layers.values():
+                layer.clear_slot(slot)
+            for adapter in meta["adapters"]:
+                key = f"{adapter['parent']}/{adapter['attr']}"
+                if key not in self.layers:
+                    raise ValueError(f"Adapter targets {key}, which is not wrapped (targets: {sorted(self.layers)})")
+                self.layers[key].set_slot(slot, archive[f"{key}/A"], archive[f"{key}/B"], adapter["alpha"])
+        self.slots[name] = slot
+        return slot
+
+    def remove_adapter(self, name: str) -> None:
+        slot = self.slots.pop(name)
+        with self._lock:
+            for layer in self.layers.values():
+                layer.clear_slot(slot)
+
+    def slot_ids(self, adapters) -> list:
+        """Maps adapter names per row to slot ids (``None`` = base model)."""
+        return [0 if name is None else self.slots[name] for name in adapters]
+
+    def generate(self, prompts, adapters, max_length: int = None):
+        """
+        Generates for a batch of prompts, each row with its own adapter.
+
+        Args:
+            prompts (list): Prompt strings.
+            adapters (list): Adapter name per prompt (``None`` = base model).
+            max_length (int): Optional generation length.
+        """
+        if len(prompts) != len(adapters):
+            raise ValueError("One adapter name per prompt is required")
+        with self._lock:
+            self.router.set(self.slot_ids(adapters))
+            return self.model.generate(prompts, max_length=max_length)
+
+    def forward(self, token_ids, padding_mask, adapters):
+        """Returns next-token logits for tokenized rows, each with its own adapter."""
+        with self._lock:
+            self.router.set(self.slot_ids(adapters))
+            return self.model({"token_ids": token_ids, "padding_mask": padding_mask})
+
+    def memory_report(self) -> dict:
+        """Backbone size versus the resident adapter banks, in MB."""
+        backbone = sum(_nbytes(w) for w in self.model.weights)
+        bank = sum(_nbytes(v) for layer in self.layers.values() for v in (layer.A_bank, layer.B_bank))
+        return {
+            "backbone_mb": round(backbone / 2**20, 1),
+            "adapter_banks_mb": round(bank / 2**20, 2),
+            "per_adapter_mb": round(bank / self.max_adapters / 2**20, 3),
+            "resident_adapters": len(self.slots),
+        }
@@ -0,0 +1,99 @@
+"""
+In-process cache of KerasNLP GPT-2 presets.
+
+Loading a preset deserializes the tokenizer and the full backbone, which takes
+seconds. ``load_base_model`` loads each ``(preset, sequence_length)`` pair at most
+once per process and shares that instance. Code that modifies the model in place
+(LoRA injection, training, multi-adapter serving) gets its own copy from
+``new_causal_lm`` instead. The first private copy of a preset can keep the backbone's
+config and weights as loaded aside (one host copy of the weights), so later copies
+are built in memory without going back to disk. Processes that never ask for a
+copy keep only the models they use.
+``keras_nlp`` is only imported when a preset is first needed.
+"""
+
+PRESET = "gpt2_base_en"
+SEQ_LENGTH = 128
+
+_preprocessors = {}
+_base_models = {}
+_pristine = {}  # preset -> (backbone class, config, weights) as loaded from disk, for private copies
+
+
+def load_preprocessor(preset: str = PRESET, sequence_length: int = SEQ_LENGTH):
+    """Returns the cached ``GPT2CausalLMPreprocessor`` for a preset."""
+    key = (preset, sequence_length)
+    if key not in _preprocessors:
+        import keras_nlp as keras_hub
+
+        _preprocessors[key] = keras_hub.models.GPT2CausalLMPreprocessor.from_preset(
+            preset,
+            sequence_length=sequence_length,
+        )
+    return _preprocessors[key]
+
+
+def _load_preset(preset: str, sequence_length: int):
+    """Loads a preset from disk and returns the fresh model."""
+    import keras_nlp as keras_hub
+
+    return keras_hub.models.GPT2CausalLM.from_preset(
+        preset,
+        preprocessor=load_preprocessor(preset, sequence_length),
+    )
+
+
+def load_base_model(preset: str = PRESET, sequence_length: int = SEQ_LENGTH):
+    """
+    Returns the GPT-2 causal LM for a preset, loading it only on first use.
+
+    The instance is shared by every caller in the process: do not attach adapters
+    to it or train it, use ``new_causal_lm`` for that.
+
+    Args:
+        preset (str): KerasNLP preset name.
+        sequence_length (int): Preprocessor sequence length.
+
+    Returns:
+        keras_nlp.models.GPT2CausalLM: The cached model (with its preprocessor).
+    """
+    key = (preset, sequence_length)
+    if key not in _base_models:
+        _base_models[key] = _load_preset(preset, sequence_length)
+    return _base_models[key]
+
+
+def new_causal_lm(preset: str = PRESET, sequence_length: int = SEQ_LENGTH, keep_weights: bool = True):
+    """
+    Returns a private GPT-2 causal LM with the preset's weights, safe to modify or train.
+
+    Args:
+        preset (str): KerasNLP preset name.
+        sequence_length (int): Preprocessor sequence length.
+        keep_weights (bool): When the preset has to be loaded from disk, keep a host copy of
+            its weights so later copies are built in memory. ``False`` for a single long-lived
+            copy (e.g. a serving model), which then costs no extra memory.
+
+    Returns:
+        keras_nlp.models.GPT2CausalLM: A model no other caller holds.
+    """
+    if preset not in _pristine:
+        model = _load_preset(preset, sequence_length)
+        if keep_weights:
+            backbone = model.backbone
+            _pristine[preset] = (backbone.__class__, backbone.get_config(), backbone.get_weights())
+        return model
+
+    import keras_nlp as keras_hub
+
+    backbone_cls, config, weights = _pristine[preset]
+    backbone = backbone_cls.from_config(config)
+    backbone.set_weights(weights)
+    return keras_hub.models.GPT2CausalLM(backbone=backbone, preprocessor=load_preprocessor(preset, sequence_length))
+
+
+def clear_cache() -> None:
+    """Drops every cached preset (frees the memory once no model references them)."""
+    _preprocessors.clear()
+    _base_models.clear()
+    _pristine.clear()
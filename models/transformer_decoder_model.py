@@ -2,29 +2,39 @@ from tensorflow import keras
 from keras import layers, ops
 from models.transformer_decoder_block import TransformerBlock
 from models.embeddings import TokenAndPositionEmbedding
-from configs import config
+from configs.configss import get_config
 
-def create_model(maxlen, vocab_size, embed_dim, num_heads, feed_forward_dim):
+def create_model(maxlen=None, vocab_size=None, embed_dim=None, num_heads=None, feed_forward_dim=None, num_layers=None,
+                 tie_embeddings=None):
     """
     Builds and compiles a simple transformer-based language model.
 
+    Arguments left as ``None`` are read from the ``model`` section of the config.
+
     Args:
         maxlen (int): Maximum sequence length.
         vocab_size (int): Size of the vocabulary.
         embed_dim (int): Dimension of token and position embeddings.
         num_heads (int): Number of attention heads in the transformer block.
         feed_forward_dim (int): Dimension of the feed-forward network.
+        num_layers (int): Number of stacked transformer blocks.
+        tie_embeddings (bool): Compute logits with the transposed token embedding matrix instead of a
+            separate ``Dense(vocab_size)`` head, saving ``vocab_size * embed_dim`` parameters along with
+            their gradients, optimizer state and checkpoint bytes.
 
     Returns:
         keras.Model: Compiled Keras model ready for training.
     """
     # Access model hyperparameters
-    maxlen = config.model["max_sequence_length"]
-    vocab_size = config.model["vocab_size"]
-    embed_dim = config.model["embed_dim"]
-    num_heads = config.model["num_heads"]
-    ff_dim = config.model["feed_forward_dim"]
-    num_layers = config.model.get("num_transformer_blocks", 4)
+    config = get_config()
+    maxlen = maxlen or config.model["max_sequence_length"]
+    vocab_size = vocab_size or config.model["vocab_size"]
+    embed_dim = embed_dim or config.model["embed_dim"]
+    num_heads = num_heads or config.model["num_heads"]
+    ff_dim = feed_forward_dim or config.model["feed_forward_dim"]
+    num_layers = num_layers or config.model.get("num_transformer_blocks", 4)
+    if tie_embeddings is None:
+        tie_embeddings = config.model.get("tie_embeddings", False)
     
     # Input layer expecting integer token IDs
     inputs = layers.Input(shape=(maxlen,), dtype="int32", name="input_tokens")
@@ -38,10 +48,61 @@ def create_model(maxlen, vocab_size, embed_dim, num_heads, feed_forward_dim):
     for _ in range(num_layers):
         x = TransformerBlock(embed_dim, num_heads, ff_dim)(x)
 
-    # Final dense layer maps to vocabulary size for language modeling
-    logits = layers.Dense(vocab_size, name="output_logits")(x)
+    # Final projection to vocabulary size for language modeling: the shared token embeddings or a dense layer
+    if tie_embeddings:
+        logits = embedding_layer(x, reverse=True)
+    else:
+        logits = layers.Dense(vocab_size, name="output_logits")(x)
 
     # Define model with both logits and intermediate embeddings as output (for optional use)
     model = keras.Model(inputs=inputs, outputs=[logits, x], name="transformer_decoder")
 
-    return model
\ No newline at end of file
+    return model
+
+def output_head(model):
+    """Returns a callable mapping hidden states to logits: the ``output_logits`` layer, or the tied embeddings."""
+    if any(layer.name == "output_logits" for layer in model.layers):
+        return model.get_layer("output_logits")
+    embedding_layer = next(layer for layer in model.layers if isinstance(layer, TokenAndPositionEmbedding))
+    return lambda x: embedding_layer(x, reverse=True)
+
+
+def create_inference_model(model, seq_len=None, last_position_only=False):
+    """
+    Builds a logits-only inference graph that shares the layers (and weights) of a trained model.
+
+    The training graph also returns the final hidden states and computes vocabulary-sized logits at
+    every position. Generation only needs the next-token logits, so this graph drops the hidden-state
+    output and can apply the output head to the last position alone.
+
+    Args:
+        model (keras.Model): Model from ``create_model`` (trained weights loaded).
+        seq_len (int): Fixed sequence length, or ``None`` for any length up to ``maxlen``.
+        last_position_only (bool): Return ``(batch, vocab)`` logits of each row's last real token
+            instead of ``(batch, seq_len, vocab)``. Batches are right-padded, so the model then takes
+            a second input, ``lengths`` (``(batch,)`` int32 count of real tokens per row), and
+            gathers position ``lengths - 1``.
+
+    Returns:
+        keras.Model: Inference model with a single logits output.
+    """
+    embedding_layer = next(layer for layer in model.layers if isinstance(layer, TokenAndPositionEmbedding))
+    blocks = [layer for layer in model.layers if isinstance(layer, TransformerBlock)]
+    head = output_head(model)
+
+    inputs = layers.Input(shape=(seq_len,), dtype="int32", name="input_tokens")
+    model_inputs = inputs
+    x = embedding_layer(inputs)
+    for block in blocks:
+        x = block(x)
+    if last_position_only:
+        # Only the next-token position of each row goes through the vocabulary projection.
+        # Rows are right-padded, so that is position ``lengths - 1``, not the last column.
+        lengths = layers.Input(shape=(), dtype="int32", name="lengths")
+        positions = ops.reshape(ops.maximum(lengths - 1, 0), (-1, 1, 1))
+        x = ops.squeeze(ops.take_along_axis(x, positions, axis=1), axis=1)
+        model_inputs = [inputs, lengths]
+    logits = head(x)
+
+    suffix = "last" if last_position_only else "all"
+    return keras.Model(inputs=model_inputs, outputs=logits, name=f"transformer_decoder_inference_{suffix}")
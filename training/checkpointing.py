@@ -0,0 +1,180 @@
+"""
+Step-interval training checkpoints that can resume a run exactly where it stopped.
+
+``ModelCheckpoint`` writes a full ``.keras`` file at epoch boundaries: a preempted run
+loses everything since the last epoch, the optimizer and input pipeline restart from
+scratch, and every save blocks the training loop for the whole write. A
+``StepCheckpointer`` saves, every ``every_n_steps`` steps:
+- the model variables, including the dropout seed generator states;
+- the optimizer variables (iteration count and moments);
+- the ``tf.data`` iterator (position, shuffle buffer and its RNG state);
+- the global step;
+- a JSON training state from ``state_fn`` (e.g. callback progress and the experiment directory).
+
+A save copies all of it into a host-memory replica with the same object graph (CPU variables
+and a second iterator on the same dataset); only that copy blocks the training loop. A writer
+thread then writes the replica through ``tf.train.CheckpointManager`` (``max_to_keep``
+retention) while training continues. The next save waits for a write still in progress. The
+time the loop is blocked is recorded per save as the checkpoint stall. The replica costs one
+host copy of the model and optimizer variables. (TF's own asynchronous checkpointing cannot
+copy Keras 3 variables: it fails from the second save on.)
+
+Exact continuation needs a seeded input pipeline (``shuffle(..., seed=...)``, so the shuffle
+seeds are the same in the resumed process) and ``utils.seed.set_seed`` for op determinism.
+The iterator state holds every element buffered in the pipeline: keep ``cache()`` out of it
+(an in-memory cache is saved in full, i.e. the whole corpus in every checkpoint after the
+first epoch) and keep shuffle buffers as small as the shuffle quality allows.
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+import tensorflow as tf
+
+
+class StepCheckpointer:
+    def __init__(
+        self,
+        directory: str,
+        model: tf.keras.Model,
+        dataset: tf.data.Dataset,
+        every_n_steps: int = 500,
+        max_to_keep: int = 3,
+        async_write: bool = True,
+        state_fn: Optional[Callable[[], dict]] = None
+    ):
+        """
+        Args:
+            directory (str): Checkpoint directory (one per run; ``resume`` reads the latest file in it).
+            model (tf.keras.Model): Compiled model; its optimizer variables are created here if needed.
+            dataset (tf.data.Dataset): The (repeated) training dataset; train from ``iterator``.
+            every_n_steps (int): Steps between checkpoints.
+            max_to_keep (int): Number of most recent checkpoints kept on disk.
+            async_write (bool): Write files on a background thread.
+            state_fn: Returns a JSON-serializable dict saved with every checkpoint; ``state`` holds
+                the restored one.
+        """
+        optimizer = model.optimizer
+        if not optimizer.built:
+            optimizer.build(model.trainable_variables)  # Slots must exist before a restore fills them
+
+        self.every_n_steps = every_n_steps
+        self.async_write = async_write
+        self.state_fn = state_fn
+        self.state = {}
+        self.iterator = iter(dataset)
+        self.step = tf.Variable(0, dtype=tf.int64, trainable=False, name="global_step")
+        self._state = tf.Variable("{}", dtype=tf.string, trainable=False, name="training_state")
+        self._variables = list(model.variables) + list(optimizer.variables)
+        self.checkpoint = tf.train.Checkpoint(
+            step=self.step,
+            model_state=list(model.variables),  # Weights plus seed generator states
+            optimizer_state=list(optimizer.variables),  # Includes the learning rate
+            iterator=self.iterator,
+            training_state=self._state,
+        )
+
+        # Host replica the writer saves from: same object graph, so restores read it into ``checkpoint``
+        with tf.device("/cpu:0"):
+            self._host_variables = [
+                tf.Variable(tf.zeros(variable.shape, variable.dtype), trainable=False) for variable in self._variables
+            ]
+            self._host_iterator = iter(dataset)
+            self._host_step = tf.Variable(0, dtype=tf.int64, trainable=False)
+            self._host_state = tf.Variable("{}", dtype=tf.string, trainable=False)
+        n_model = len(model.variables)
+        host_checkpoint = tf.train.Checkpoint(
+            step=self._host_step,
+            model_state=self._host_variables[:n_model],
+            optimizer_state=self._host_variables[n_model:],
+            iterator=self._host_iterator,
+            training_state=self._host_state,
+        )
+        self.manager = tf.train.CheckpointManager(host_checkpoint, directory, max_to_keep=max_to_keep)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer") if async_write else None
+        self._pending = None
+        self.stalls = []
+        self.writes = []
+        self.last_saved_step = None
+
+    def restore(self) -> int:
+        """
+        Restores the latest checkpoint, if any.
+
+        Returns:
+            int: The step to continue from (0 when the directory holds no checkpoint).
+        """
+        latest = self.manager.latest_checkpoint
+        if latest is None:
+            print(f"[INFO] No checkpoint in {self.manager.directory}, starting from step 0")
+            return 0
+        self.checkpoint.restore(latest).assert_existing_objects_matched()
+        self.state = json.loads(self._state.numpy().decode("utf-8"))
+        self.last_saved_step = int(self.step.numpy())
+        print(f"[INFO] Resumed from {latest} at step {int(self.step.numpy())}")
+        return int(self.step.numpy())
+
+    def maybe_save(self, step: int) -> float:
+        """
+        Records ``step`` (steps completed) and saves a checkpoint when it falls on the interval.
+
+        Returns:
+            float: Seconds the training loop was blocked (0 when nothing was saved).
+        """
+        self.step.assign(step)
+        if not self.every_n_steps or step % self.every_n_steps:
+            return 0.0
+        return self.save(step)
+
+    def save(self, step: int) -> float:
+        """Saves a checkpoint now (written in the background with ``async_write``) and returns the stall in seconds."""
+        start = time.perf_counter()
+        self._wait()  # The replica is still being written
+        self.step.assign(step)
+        self._host_step.assign(step)
+        if self.state_fn is not None:
+            # NumPy scalars (callback "best" values) as plain numbers
+            self._host_state.assign(json.dumps(self.state_fn(), default=lambda value: value.item()))
+        for host_variable, variable in zip(self._host_variables, self._variables):
+            host_variable.assign(tf.convert_to_tensor(variable))
+        # Iterator position and buffers, as TF's own checkpoint copy does it
+        self._host_iterator._restore_from_tensors(self.iterator._serialize_to_tensors())
+        if self._writer is not None:
+            self._pending = self._writer.submit(self._write, step)
+        else:
+            self._write(step)
+        stall = time.perf_counter() - start
+        self.stalls.append(stall)
+        self.last_saved_step = step
+        return stall
+
+    def _write(self, step: int) -> None:
+        start = time.perf_counter()
+        self.manager.save(checkpoint_number=step)
+        self.writes.append(time.perf_counter() - start)
+
+    def _wait(self) -> None:
+        """Blocks until the write in progress is done (and raises its error, if any)."""
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            pending.result()
+
+    def close(self) -> dict:
+        """Waits for pending writes and returns the stall report."""
+        self._wait()
+        if self._writer is not None:
+            self._writer.shutdown()
+        return self.report()
+
+    def report(self) -> dict:
+        """Number of saves, how long they blocked the training loop and how long the writes took."""
+        return {
+            "saves": len(self.stalls),
+            "async": self.async_write,
+            "total_stall_s": sum(self.stalls),
+            "mean_stall_ms": 1000 * sum(self.stalls) / len(self.stalls) if self.stalls else 0.0,
+            "max_stall_ms": 1000 * max(self.stalls, default=0.0),
+            "mean_write_ms": 1000 * sum(self.writes) / len(self.writes) if self.writes else 0.0,
+            "kept": list(self.manager.checkpoints),
+        }
@@ -1,18 +1,23 @@
-import tensorflow as tf
-from tensorflow import keras
+"""
+Fine-tune GPT-2 with LoRA, save the adapters and optionally the merged model.
+
+Importing this module does not load TensorFlow or the preset; ``train_lora`` builds
+the model when called.
+"""
+
 import os
-from models.lora_model import lora_model
 
 # Constants (ensure these are defined beforehand)
 ALPHA = 32.0
 RANK = 4
-EPOCHS = 3  
-train_ds = ...  
-test_ds
-gpu_memory_callback = ...  
+EPOCHS = 3
+SAVE_MERGED = False  # Also export the full merged GPT-2
+EXPORT_DIR = "exports2"
 
 # Optimizer and Loss Setup
 def get_optimizer_and_loss():
+    from tensorflow import keras
+
     optimizer = keras.optimizers.AdamW(
         learning_rate=5e-5,
         weight_decay=0.01,
@@ -25,58 +30,73 @@ def get_optimizer_and_loss():
     loss = keras.losses.SparseCategoricalCrossentropy(from_logits=True)
     return optimizer, loss
 
-optimizer, loss = get_optimizer_and_loss()
-
-# Compile LoRA Model
-lora_model.compile(
-    optimizer=optimizer,
-    loss=loss,
-    weighted_metrics=["accuracy"],
-)
-
-# Train Model
-lora_model.fit(
-    train_ds,
-    epochs=EPOCHS,
-    callbacks=[gpu_memory_callback],  # Optional
-)
-
-# Merge LoRA Weights Into Base Model
-for layer_idx in range(lora_model.backbone.num_layers):
-    decoder_layer = lora_model.backbone.get_layer(f"transformer_layer_{layer_idx}")
-    self_attention_layer = decoder_layer._self_attention_layer
-
-    # --- Merge query dense layer ---
-    query_lora = self_attention_layer._query_dense
-    A = query_lora.A.kernel  # (hidden_dim, rank)
-    B = query_lora.B.kernel  # (rank, num_heads, head_dim)
-    merged_weights = tf.einsum("ab,bcd->acd", A, B) * (ALPHA / RANK)
-    query_lora.original_layer.kernel.assign_add(merged_weights)
-
-    # Replace with original layer (now updated)
-    self_attention_layer._query_dense = query_lora.original_layer
-
-    # --- Merge value dense layer ---
-    value_lora = self_attention_layer._value_dense
-    A = value_lora.A.kernel
-    B = value_lora.B.kernel
-    merged_weights = tf.einsum("ab,bcd->acd", A, B) * (ALPHA / RANK)
-    value_lora.original_layer.kernel.assign_add(merged_weights)
-
-    # Replace with original layer
-    self_attention_layer._value_dense = value_lora.original_layer
-
-print("✅ LoRA weights merged into base model successfully.")
-
-# Evaluate model
-test_loss, test_accuracy = lora_model.evaluate(test_ds)
-print(f"✅ Test Loss: {test_loss:.4f}")
-print(f"✅ Test Accuracy: {test_accuracy:.4f}")
-
-# Create export directory
-export_dir = "exports2"
-os.makedirs(export_dir, exist_ok=True)
-
-# Save the model
-lora_model.save(os.path.join(export_dir, "gpt2_lora_merged.keras"))
-print("✅ Model saved to 'exports/gpt2_lora_merged.keras'")
+def train_lora(train_ds, test_ds, epochs=EPOCHS, callbacks=None, targets=None,
+               export_dir=EXPORT_DIR, save_merged=SAVE_MERGED):
+    """
+    Train LoRA adapters on a fresh GPT-2, save them, then merge and evaluate.
+
+    Args:
+        train_ds (tf.data.Dataset): Preprocessed training batches.
+        test_ds (tf.data.Dataset): Preprocessed evaluation batches.
+        epochs (int): Training epochs.
+        callbacks (list): Optional Keras callbacks.
+        targets (dict): LoRA target modules (see ``models.lora_model.inject_lora``).
+        export_dir (str): Where adapters (and the merged model) are written.
+        save_merged (bool): Also export the full merged model.
+
+    Returns:
+        keras.Model: The merged model.
+    """
+    from models.lora_model import build_lora_model
+    from models.lora_layer import unwrap_lora_layers
+    from models.lora_adapters import save_lora_adapters
+
+    lora_model, _, report = build_lora_model(targets)
+    print(f"✅ LoRA model built: {report}")
+    optimizer, loss = get_optimizer_and_loss()
+
+    # Compile LoRA Model
+    lora_model.compile(
+        optimizer=optimizer,
+        loss=loss,
+        weighted_metrics=["accuracy"],
+    )
+
+    # Train Model
+    lora_model.fit(
+        train_ds,
+        epochs=epochs,
+        callbacks=callbacks or [],
+    )
+
+    # Save only the adapters (a few MB); attach them later with models.lora_adapters.load_lora_model
+    os.makedirs(export_dir, exist_ok=True)
+    adapter_path = os.path.join(export_dir, "gpt2_lora_adapters.npz")
+    save_lora_adapters(lora_model, adapter_path, epochs=epochs)
+    print(f"✅ LoRA adapters saved to '{adapter_path}'")
+
+    # Merge LoRA Weights Into Base Model (every wrapped projection) and drop the wrappers
+    unwrap_lora_layers(lora_model)
+
+    print("✅ LoRA weights merged into base model successfully.")
+
+    # Evaluate model
+    test_loss, test_accuracy = lora_model.evaluate(test_ds)
+    print(f"✅ Test Loss: {test_loss:.4f}")
+    print(f"✅ Test Accuracy: {test_accuracy:.4f}")
+
+    # Save the full merged model only when a standalone export is needed (hundreds of MB)
+    if save_merged:
+        merged_path = os.path.join(export_dir, "gpt2_lora_merged.keras")
+        lora_model.save(merged_path)
+        print(f"✅ Model saved to '{merged_path}'")
+    return lora_model
+
+if __name__ == "__main__":
+    from utils.logging import ThroughputCallback
+
+    train_ds = ...
+    test_ds = ...
+    # Step time, input wait, tokens/sec, evaluation time and (GPU) memory, written to TensorBoard
+    throughput = ThroughputCallback(log_dir=os.path.join(EXPORT_DIR, "logs"))
+    train_lora(throughput.instrument(train_ds), throughput.instrument(test_ds, split="eval"), callbacks=[throughput])
@@ -5,12 +5,13 @@ Features:
 - Loads training configuration from YAML
 - Sets reproducible seeds
 - Loads training, validation, and test datasets
-- Initializes and trains the model
+- Initializes and trains the model (``--resume`` continues from the latest step checkpoint)
 - Saves final model and evaluates it on val/test sets
 """
 
 import os
 import yaml
+import argparse
 import tensorflow as tf
 from training.trainer import Trainer
 from utils.logging import get_callbacks
@@ -19,14 +20,15 @@ from utils.seed import set_seed
 from models.transformer_decoder_model import create_model
 from configs.configss import config
 
+parser = argparse.ArgumentParser(description="Train the transformer decoder")
+parser.add_argument("--resume", action="store_true", help="Continue from the latest step checkpoint")
+args = parser.parse_args()
+
 # Set random seed for full reproducibility
-set_seed = config.training["seed"]
+set_seed(config.training["seed"])
 
 #Load training, validation, and test datasets
-data_dir = config["dataset"]["data_dir"]
-batch_size = config["dataset"]["batch_size"]
-
-train_ds, val_ds, test_ds = main()
+train_ds, val_ds, test_ds, _, _ = main()
 
 # Define model function that returns a compiled model
 def model_fn():
@@ -46,7 +48,7 @@ trainer = Trainer(
     config=config
 )
 
-model = trainer.train()
+model = trainer.train(resume=args.resume)
 
 # Evaluate final model on validation and test datasets
 print("\n✅ Evaluating model on validation set...")
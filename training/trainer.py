@@ -1,10 +1,20 @@
 """Trainer class for managing the training process of a Keras model."""
 
+import os
+import time
 import tensorflow as tf
 from utils.metrics import get_metrics
-from utils.logging import get_callbacks
+from utils.logging import ThroughputCallback, get_callbacks, new_experiment_dir
+from training.checkpointing import StepCheckpointer
 import keras
-from configs import config
+
+# Attributes holding a stateful callback's progress, saved with every step checkpoint
+CALLBACK_STATE = {
+    tf.keras.callbacks.ReduceLROnPlateau: ("best", "wait", "cooldown_counter"),
+    tf.keras.callbacks.EarlyStopping: ("best", "wait", "best_epoch", "stopped_epoch"),
+    tf.keras.callbacks.ModelCheckpoint: ("best",),
+    ThroughputCallback: ("global_step",),
+}
 
 class Trainer:
     def __init__(
@@ -26,11 +36,28 @@ class Trainer:
         self.config = config
         self.model = model_fn()           # Build the model
         self._compile_model()             # Compile with optimizer, loss, metrics
-        self.train_ds = train_ds
-        self.val_ds = val_ds
-        self.callbacks = get_callbacks(   # Initialize callbacks
-            monitor=config["training"].get("monitor", "val_loss")
+        self.checkpoint_cfg = config.training.get("checkpoint") or {}
+        self.raw_train_ds = train_ds
+        self.raw_val_ds = val_ds
+        # Callbacks are created when training starts: a resumed run continues its experiment directory
+        self.callbacks = []
+
+    def _setup_callbacks(self, experiment_dir: str = None):
+        """
+        Initializes the callbacks, in a new experiment directory unless one is given.
+
+        The datasets get the throughput callback's in-graph counter, so it can time the input
+        pipeline and count tokens. The step loop fetches (and checkpoints) the raw training
+        iterator and reports batches itself.
+        """
+        self.experiment_dir = experiment_dir or new_experiment_dir()
+        self.callbacks = get_callbacks(
+            monitor=self.config["training"].get("monitor", "val_loss"),
+            experiment_dir=self.experiment_dir
         )
+        self.throughput = next((cb for cb in self.callbacks if isinstance(cb, ThroughputCallback)), None)
+        self.train_ds = self.throughput.instrument(self.raw_train_ds) if self.throughput else self.raw_train_ds
+        self.val_ds = self.throughput.instrument(self.raw_val_ds, split="eval") if self.throughput else self.raw_val_ds
 
     def _compile_model(self):
         """
@@ -67,13 +94,25 @@ class Trainer:
             metrics=get_metrics()
         )
 
-    def train(self) -> tf.keras.Model:
+    def train(self, resume: bool = False) -> tf.keras.Model:
         """
         Execute the model training loop.
 
+        With ``training.checkpoint.every_n_steps`` set, training runs step by step with resumable
+        checkpoints (see ``train_steps``); otherwise it is a plain ``fit``.
+
+        Args:
+            resume (bool): Continue from the latest step checkpoint.
+
         Returns:
             Trained Keras model.
         """
+        if self.checkpoint_cfg.get("every_n_steps"):
+            return self.train_steps(resume=resume)
+        if resume:
+            raise ValueError("resume needs step checkpoints: set training.checkpoint.every_n_steps")
+
+        self._setup_callbacks()
         self.model.fit(
             self.train_ds,
             validation_data=self.val_ds,
@@ -81,3 +120,138 @@ class Trainer:
             verbose=1,
             callbacks=self.callbacks
         )
+        return self.model
+
+    def _steps_per_epoch(self, state: dict) -> int:
+        """
+        Batches per epoch: ``training.steps_per_epoch``, the count stored with the checkpoint being
+        resumed, or the dataset's cardinality. A dataset of unknown size is counted once, with a
+        full pass over the input pipeline, and the count is stored with every checkpoint.
+        """
+        steps = self.config.training.get("steps_per_epoch") or state.get("steps_per_epoch")
+        if steps:
+            return steps
+        steps = int(self.raw_train_ds.cardinality())
+        if steps < 0:
+            print("[INFO] Counting the training batches (set training.steps_per_epoch to skip this pass)")
+            steps = int(self.raw_train_ds.reduce(0, lambda n, _: n + 1))
+        return steps
+
+    def _callback_state(self) -> dict:
+        """Experiment directory, epoch length and stateful callback progress, stored with every step checkpoint."""
+        state = {"experiment_dir": self.experiment_dir, "steps_per_epoch": self.steps_per_epoch}
+        for callback in self.callbacks:
+            for callback_cls, attrs in CALLBACK_STATE.items():
+                if isinstance(callback, callback_cls):
+                    state[callback_cls.__name__] = {attr: getattr(callback, attr) for attr in attrs}
+        return state
+
+    def _restore_callback_state(self, state: dict):
+        """
+        Puts restored callback progress back (after ``on_train_begin``, which resets it).
+
+        ``EarlyStopping`` keeps its best weights in memory only; they are the weights the
+        ``ModelCheckpoint`` saved as the best model (same monitor), so they are reloaded from there.
+        """
+        for callback in self.callbacks:
+            for callback_cls, attrs in CALLBACK_STATE.items():
+                if isinstance(callback, callback_cls) and callback_cls.__name__ in state:
+                    for attr in attrs:
+                        setattr(callback, attr, state[callback_cls.__name__][attr])
+
+        early_stopping = next((cb for cb in self.callbacks if isinstance(cb, tf.keras.callbacks.EarlyStopping)), None)
+        best_model = next((cb for cb in self.callbacks if isinstance(cb, tf.keras.callbacks.ModelCheckpoint)), None)
+        if (early_stopping and early_stopping.restore_best_weights and early_stopping.best is not None
+                and best_model and os.path.exists(best_model.filepath)):
+            # The .keras file also holds optimizer variables and seed states: put the restored ones back
+            variables = self.model.variables + self.model.optimizer.variables
+            current = [variable.numpy() for variable in variables]
+            self.model.load_weights(best_model.filepath)
+            early_stopping.best_weights = self.model.get_weights()
+            for variable, value in zip(variables, current):
+                variable.assign(value)
+
+    def train_steps(self, resume: bool = False) -> tf.keras.Model:
+        """
+        Train one batch at a time with step-interval checkpoints of the full training state.
+
+        A single iterator over the repeated training dataset runs through all epochs, so its
+        checkpointed state (position, shuffle buffer and seed) determines every remaining batch;
+        resuming continues with the same batches, weights, optimizer moments and dropout seeds.
+        Running metric averages restart at the resumed step. Callbacks, validation and the epoch
+        logs work as with ``fit``; the epoch logs also carry the checkpoint stall time.
+
+        Checkpoints also carry the callbacks' progress (best values, patience counters) and the
+        experiment directory, which a resumed run keeps writing to. A save that falls on an epoch's
+        last step is taken after that epoch's validation and ``on_epoch_end``, so resuming from it
+        starts the next epoch without skipping either.
+
+        Args:
+            resume (bool): Continue from the latest checkpoint in ``training.checkpoint.dir``.
+
+        Returns:
+            Trained Keras model.
+        """
+        epochs = self.config.training["epochs"]
+        checkpointer = StepCheckpointer(
+            self.checkpoint_cfg.get("dir", "experiments/step_checkpoints"),
+            self.model,
+            self.raw_train_ds.repeat(),
+            every_n_steps=self.checkpoint_cfg["every_n_steps"],
+            max_to_keep=self.checkpoint_cfg.get("max_to_keep", 3),
+            async_write=self.checkpoint_cfg.get("async_write", True),
+            state_fn=self._callback_state,
+        )
+        step = checkpointer.restore() if resume else 0
+        steps_per_epoch = self.steps_per_epoch = self._steps_per_epoch(checkpointer.state)
+        iterator = checkpointer.iterator
+        self._setup_callbacks(checkpointer.state.get("experiment_dir"))
+
+        callbacks = keras.callbacks.CallbackList(
+            self.callbacks, add_history=True, add_progbar=True,
+            model=self.model, epochs=epochs, steps=steps_per_epoch, verbose=1
+        )
+        self.model.stop_training = False
+        callbacks.on_train_begin()
+        self._restore_callback_state(checkpointer.state)
+        stall_s = 0.0
+        for epoch in range(step // steps_per_epoch, epochs):
+            callbacks.on_epoch_begin(epoch)
+            self.model.reset_metrics()
+            logs = {}
+            for batch in range(step % steps_per_epoch, steps_per_epoch):
+                callbacks.on_train_batch_begin(batch)
+                start = time.perf_counter()
+                data = next(iterator)
+                if self.throughput:
+                    self.throughput.record_batch(data, time.perf_counter() - start)
+                x, y, sample_weight = keras.utils.unpack_x_y_sample_weight(data)
+                # Metrics accumulate over the epoch (reset at epoch begin)
+                logs = self.model.train_on_batch(x, y, sample_weight=sample_weight, return_dict=True)
+                step += 1
+                callbacks.on_train_batch_end(batch, logs)
+                if step % steps_per_epoch:  # The epoch's last step is saved once its callbacks ran
+                    stall_s += checkpointer.maybe_save(step)
+                if self.model.stop_training:
+                    break
+
+            epoch_logs = dict(logs)
+            val_logs = self.model.evaluate(self.val_ds, callbacks=self.callbacks, return_dict=True, verbose=0)
+            epoch_logs.update({f"val_{name}": value for name, value in val_logs.items()})
+            epoch_logs["checkpoint_stall_s"] = stall_s
+            callbacks.on_epoch_end(epoch, epoch_logs)
+            # Counted in the next epoch's logs
+            stall_s = 0.0 if step % steps_per_epoch else checkpointer.maybe_save(step)
+            if self.model.stop_training:
+                break
+        # Final state, also when early stopping ended the run (before it restores the best weights)
+        if checkpointer.last_saved_step != step:
+            checkpointer.save(step)
+        callbacks.on_train_end()
+
+        report = checkpointer.close()
+        print(
+            f"[INFO] Checkpoints: {report['saves']} saves, {report['total_stall_s']:.2f}s total stall "
+            f"(mean {report['mean_stall_ms']:.1f} ms, max {report['max_stall_ms']:.1f} ms, async={report['async']})"
+        )
+        return self.model
@@ -1,12 +1,191 @@
 import os
+import time
+import resource
 from datetime import datetime
+import numpy as np
 import tensorflow as tf
+from utils.memory import memory_report
+
+
+def count_tokens(element, pad_token_id: int = 0):
+    """
+    Examples and non-padding target tokens in one dataset element, as int64 tensors.
+
+    Handles ``(inputs, labels)`` batches (padding is ``pad_token_id``) and KerasNLP
+    ``(inputs, labels, sample_weight)`` batches (padding has zero weight). Plain TF ops, so it
+    runs inside a ``tf.data`` pipeline as well as on a batch the caller already holds.
+    """
+    labels = element[1]
+    if len(element) > 2 and element[2] is not None:
+        tokens = tf.math.count_nonzero(element[2], dtype=tf.int64)
+    else:
+        tokens = tf.math.count_nonzero(tf.not_equal(labels, pad_token_id), dtype=tf.int64)
+    return tf.cast(tf.shape(labels)[0], tf.int64), tokens
+
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """
+    Records where training time goes: step wall time, input wait versus compute, tokens/sec
+    (padding excluded), process RSS and peak memory, and evaluation time and examples/sec.
+
+    Keras fetches each batch inside the compiled train step, so the input pipeline is only
+    visible for datasets passed through ``instrument``: a last ``map`` counts each batch's
+    examples and tokens into TF variables in-graph (no host copy of the batch) and stamps
+    when the batch left the pipeline. The input wait of a step is the time from its start until its batch was handed
+    over; the rest is compute. Loops that fetch batches themselves time ``next()`` and report
+    the batch with ``record_batch``.
+
+    Window averages go to TensorBoard every ``log_every`` steps; epoch averages are added to the
+    epoch logs, so a ``CSVLogger`` placed after this callback writes them to the CSV log.
+    """
+    def __init__(self, log_dir: str = None, log_every: int = 50, pad_token_id: int = 0):
+        """
+        Args:
+            log_dir (str): TensorBoard directory (``None`` disables TensorBoard output).
+            log_every (int): Steps per TensorBoard window (memory is sampled once per window).
+            pad_token_id (int): Label id excluded from token counts.
+        """
+        super().__init__()
+        self.log_every = log_every
+        self.pad_token_id = pad_token_id
+        self.writer = tf.summary.create_file_writer(os.path.join(log_dir, "throughput")) if log_dir else None
+        self.global_step = 0
+        self._counters = {"train": [0.0, 0, 0], "eval": [0.0, 0, 0]}  # wait seconds, examples, tokens
+        # Updated by instrumented pipelines: [examples, tokens] so far, and when the last batch left
+        self._counts = {split: tf.Variable([0, 0], dtype=tf.int64, trainable=False) for split in self._counters}
+        self._handed_over = {split: tf.Variable(0.0, dtype=tf.float64, trainable=False) for split in self._counters}
+        self._counted = {split: np.zeros(2, dtype=np.int64) for split in self._counters}
+
+    def instrument(self, dataset: tf.data.Dataset, split: str = "train") -> tf.data.Dataset:
+        """
+        Appends the in-graph batch counter to a dataset (after its ``prefetch``, so the stamp is
+        taken when the training loop receives the batch). Pass ``split="eval"`` for validation data.
+        """
+        counts, handed_over, pad_token_id = self._counts[split], self._handed_over[split], self.pad_token_id
+
+        def count(*element):
+            counts.assign_add(tf.stack(count_tokens(element, pad_token_id)))
+            # A tensor-free host call for the clock: tf.timestamp() fails under op determinism
+            handed_over.assign(tf.numpy_function(time.time, [], tf.float64, stateful=True))
+            return element
+
+        return dataset.map(count)
+
+    def record_batch(self, element, wait_s: float, split: str = "train"):
+        """Counts a batch fetched by the caller's own loop, with the time spent waiting for it."""
+        examples, tokens = count_tokens(element, self.pad_token_id)
+        counters = self._counters[split]
+        counters[0] += wait_s
+        counters[1] += int(examples)
+        counters[2] += int(tokens)
+
+    def _take(self, split: str, since: float = None):
+        """
+        Wait seconds, examples and tokens counted since the last call. ``since`` is the wall time
+        the step began; an instrumented batch handed over after it was waited for.
+        """
+        values = list(self._counters[split])
+        self._counters[split][:] = [0.0, 0, 0]
+        counted = self._counts[split].numpy()
+        examples, tokens = counted - self._counted[split]
+        self._counted[split] = counted
+        values[1] += int(examples)
+        values[2] += int(tokens)
+        if since is not None and examples:
+            values[0] += max(float(self._handed_over[split].numpy()) - since, 0.0)
+        return tuple(values)
+
+    def _reset_window(self):
+        self._window = {"steps": 0, "step_s": 0.0, "wait_s": 0.0, "tokens": 0}
+
+    def on_train_begin(self, logs=None):
+        self._reset_window()
+        self._take("train")
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch = {"steps": 0, "step_s": 0.0, "wait_s": 0.0, "tokens": 0}
+        self._epoch_start = time.perf_counter()
+        self._eval = {}
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._step_start = time.perf_counter()
+        self._step_wall = time.time()  # Same clock as the pipeline's hand-over stamp
+
+    def on_train_batch_end(self, batch, logs=None):
+        step_s = time.perf_counter() - self._step_start
+        wait_s, _, tokens = self._take("train", since=self._step_wall)
+        wait_s = min(wait_s, step_s)
+        for totals in (self._window, self._epoch):
+            totals["steps"] += 1
+            totals["step_s"] += step_s
+            totals["wait_s"] += wait_s
+            totals["tokens"] += tokens
+
+        self.global_step += 1
+        if self.global_step % self.log_every == 0:
+            self._write(self._summary(self._window), self.global_step)
+            self._reset_window()
+
+    def on_test_begin(self, logs=None):
+        self._take("eval")
+        self._test_start = time.perf_counter()
+
+    def on_test_end(self, logs=None):
+        seconds = time.perf_counter() - self._test_start
+        _, examples, _ = self._take("eval")
+        self._eval = {"eval_time_s": seconds}
+        if examples and seconds:
+            self._eval["eval_examples_per_s"] = examples / seconds
+
+    def on_epoch_end(self, epoch, logs=None):
+        summary = self._summary(self._epoch)
+        summary["epoch_time_s"] = time.perf_counter() - self._epoch_start
+        summary.update(getattr(self, "_eval", {}))
+        self._eval = {}
+        self._write({f"epoch_{k}": v for k, v in summary.items()}, epoch)
+        if logs is not None:
+            logs.update(summary)  # Picked up by CSVLogger
+
+    @staticmethod
+    def _memory() -> dict:
+        memory = {
+            "rss_mb": memory_report()["rss_mb"],
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,  # kB on Linux
+        }
+        if tf.config.list_logical_devices("GPU"):
+            memory["gpu_peak_mb"] = tf.config.experimental.get_memory_info("GPU:0")["peak"] / 2**20
+        return memory
+
+    def _summary(self, totals: dict) -> dict:
+        steps, step_s, wait_s = totals["steps"], totals["step_s"], totals["wait_s"]
+        summary = {"step_time_ms": 1000 * step_s / steps if steps else 0.0}
+        if totals["tokens"]:
+            summary["tokens_per_s"] = totals["tokens"] / step_s
+            summary["input_wait_ms"] = 1000 * wait_s / steps
+            summary["compute_ms"] = 1000 * (step_s - wait_s) / steps
+            summary["input_wait_pct"] = 100 * wait_s / step_s
+        return {**summary, **self._memory()}
+
+    def _write(self, values: dict, step: int):
+        if self.writer is None:
+            return
+        with self.writer.as_default(step=step):
+            for name, value in values.items():
+                tf.summary.scalar(f"throughput/{name}", value)
+        self.writer.flush()
+
+
+def new_experiment_dir(base_dir: str = "experiments") -> str:
+    """Timestamped directory for a new experiment's logs and checkpoints (not created yet)."""
+    return os.path.join(base_dir, datetime.now().strftime("%Y%m%d-%H%M%S"))
 
 
 def get_callbacks(
     base_dir: str = "experiments",
     monitor: str = "val_loss",
-    model_name: str = "transformer_decoder_model"
+    model_name: str = "transformer_decoder_model",
+    throughput: bool = True,
+    experiment_dir: str = None
 ) -> list:
     """
     Creates standard Keras callbacks for training monitoring, checkpointing, and early stopping.
@@ -15,13 +194,15 @@ def get_callbacks(
         base_dir (str): Directory where experiment logs and checkpoints are stored.
         monitor (str): Metric to monitor for checkpointing, LR reduction, and early stopping.
         model_name (str): Name of the model used in checkpoint filename.
+        throughput (bool): Add a ``ThroughputCallback`` (step time, input wait, tokens/sec, memory).
+        experiment_dir (str): Experiment directory to use, e.g. the one of a resumed run (its CSV
+            log is appended to). ``None`` starts a new timestamped one under ``base_dir``.
 
     Returns:
         list: A list of tf.keras.callbacks.Callback instances.
     """
     # Timestamp for experiment versioning
-    timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    experiment_dir = os.path.join(base_dir, timestamp)
+    experiment_dir = experiment_dir or new_experiment_dir(base_dir)
 
     # Paths
     log_dir = os.path.join(experiment_dir, "logs")
@@ -32,8 +213,9 @@ def get_callbacks(
     os.makedirs(os.path.dirname(ckpt_path), exist_ok=True)
     os.makedirs(log_dir, exist_ok=True)
 
-    # Create callbacks
-    return [
+    # Create callbacks (throughput first so its epoch metrics reach the CSV log)
+    callbacks = [ThroughputCallback(log_dir=log_dir)] if throughput else []
+    return callbacks + [
         tf.keras.callbacks.TensorBoard(log_dir=log_dir),
         tf.keras.callbacks.ModelCheckpoint(
             filepath=ckpt_path,
@@ -44,7 +226,7 @@ def get_callbacks(
         ),
         tf.keras.callbacks.CSVLogger(
             filename=csv_log_path,
-            append=False
+            append=os.path.exists(csv_log_path)  # Resumed run: continue the same log
         ),
         tf.keras.callbacks.ReduceLROnPlateau(
             monitor=monitor,
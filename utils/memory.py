@@ -0,0 +1,100 @@
+"""
+Per-process memory accounting from ``/proc`` (Linux).
+
+RSS alone overstates the cost of an API worker when the index is memory-mapped:
+pages of ``embeddings``/``documents`` files are loaded into the page cache once and
+mapped read-only into every worker, yet each worker's RSS counts them in full.
+These helpers split a process's resident memory into what only it uses (unique /
+private pages) and what it shares with other processes, plus PSS (proportional
+set size: shared pages divided by the number of processes mapping them), whose
+sum over workers is the real memory bill.
+"""
+
+import os
+from typing import Dict, Iterable, List, Optional
+
+_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty", "Anonymous", "Swap")
+
+
+def _parse_kb(line: str):
+    key, _, rest = line.partition(":")
+    parts = rest.split()
+    if len(parts) == 2 and parts[1] == "kB" and key in _FIELDS:
+        return key, int(parts[0])
+    return None
+
+
+def read_smaps_totals(pid="self") -> Dict[str, int]:
+    """Memory fields summed over all mappings of a process, in kB."""
+    totals = {field: 0 for field in _FIELDS}
+    rollup = f"/proc/{pid}/smaps_rollup"
+    path = rollup if os.path.exists(rollup) else f"/proc/{pid}/smaps"
+    with open(path, "r") as f:
+        for line in f:
+            parsed = _parse_kb(line)
+            if parsed:
+                totals[parsed[0]] += parsed[1]
+    return totals
+
+
+def memory_report(pid="self") -> dict:
+    """
+    Resident memory of a process split into unique and shared parts, in MB.
+
+    Returns:
+        dict: ``rss_mb``, ``pss_mb``, ``unique_mb`` (private pages), ``shared_mb``
+        (pages also mapped by another process) and ``anon_mb`` (heap and stacks).
+    """
+    t = read_smaps_totals(pid)
+    return {
+        "pid": os.getpid() if pid == "self" else int(pid),
+        "rss_mb": round(t["Rss"] / 1024, 1),
+        "pss_mb": round(t["Pss"] / 1024, 1),
+        "unique_mb": round((t["Private_Clean"] + t["Private_Dirty"]) / 1024, 1),
+        "shared_mb": round((t["Shared_Clean"] + t["Shared_Dirty"]) / 1024, 1),
+        "anon_mb": round(t["Anonymous"] / 1024, 1),
+    }
+
+
+def mapped_files_report(prefixes: Iterable[str], pid="self") -> List[dict]:
+    """
+    Residency of the file mappings whose path starts with one of ``prefixes``
+    (e.g. the snapshot file or NumPy index directory), in MB per file.
+    """
+    prefixes = [os.path.abspath(p) for p in prefixes if p]
+    files: Dict[str, Dict[str, int]] = {}
+    current: Optional[Dict[str, int]] = None
+    with open(f"/proc/{pid}/smaps", "r") as f:
+        for line in f:
+            fields = line.split()
+            if fields and "-" in fields[0] and len(fields) >= 5 and ":" not in fields[0]:
+                # Mapping header: address perms offset dev inode [path]
+                path = fields[5] if len(fields) >= 6 else ""
+                current = None
+                if path and any(path.startswith(p) for p in prefixes):
+                    current = files.setdefault(path, {field: 0 for field in _FIELDS})
+                continue
+            if current is not None:
+                parsed = _parse_kb(line)
+                if parsed:
+                    current[parsed[0]] += parsed[1]
+
+    return [
+        {
+            "path": path,
+            "rss_mb": round(t["Rss"] / 1024, 1),
+            "pss_mb": round(t["Pss"] / 1024, 1),
+            "shared_mb": round((t["Shared_Clean"] + t["Shared_Dirty"]) / 1024, 1),
+        }
+        for path, t in sorted(files.items())
+    ]
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process (e.g. the workers of a ``uvicorn --workers`` master)."""
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir):
+        with open(os.path.join(task_dir, tid, "children"), "r") as f:
+            children.extend(int(c) for c in f.read().split())
+    return sorted(set(children))
@@ -0,0 +1,106 @@
+"""
+Versioned collections behind a stable alias.
+
+Re-ingesting into the collection the API is serving means readers see a half-built
+index. Instead every build goes into a new versioned collection
+(``nietzsche_books_v20261019T120000``), and a small alias file next to the Chroma
+storage says which version the alias ``nietzsche_books`` currently points to:
+
+    {db_path}/nietzsche_books_alias.json
+    {"alias": "nietzsche_books", "version": "...", "collection": "...", "published_at": ...}
+
+Publishing rewrites that file atomically; the API picks the change up (file watcher
+or admin endpoint) and switches to the new version without a restart.
+
+Usage:
+    python -m vector_DB.chroma_db --books-folder ... --db-path ... --alias nietzsche_books --new-version
+    python -m vector_DB.aliases publish --db-path ... --alias nietzsche_books --collection nietzsche_books_v2
+    python -m vector_DB.aliases show --db-path ... --alias nietzsche_books
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def alias_path(db_path: str, alias: str) -> str:
+    """Alias file location, one per alias, next to the Chroma storage."""
+    return os.path.join(db_path, f"{alias}_alias.json")
+
+
+def versioned_name(alias: str) -> str:
+    """New collection name for a fresh build behind ``alias`` (UTC timestamp suffix)."""
+    return f"{alias}_v{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}"
+
+
+def read_alias(db_path: str, alias: str) -> Optional[dict]:
+    """Return the alias record, or None when the alias was never published."""
+    path = alias_path(db_path, alias)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def publish_alias(db_path: str, alias: str, collection: str, **extra) -> dict:
+    """
+    Point ``alias`` at ``collection`` atomically.
+
+    Args:
+        db_path (str): Chroma storage folder holding the alias file.
+        alias (str): Stable name clients and the API use.
+        collection (str): Versioned collection to serve.
+        **extra: Optional serving artifacts of that version (``snapshot_path``,
+            ``numpy_index_dir``, ``lexical_index_dir``).
+
+    Returns:
+        dict: The published record.
+    """
+    record = {
+        "alias": alias,
+        "version": collection,
+        "collection": collection,
+        "published_at": time.time(),
+        **{key: value for key, value in extra.items() if value},
+    }
+    path = alias_path(db_path, alias)
+    os.makedirs(db_path, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+    return record
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage collection aliases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish_cmd = commands.add_parser("publish", help="Point an alias at a collection version")
+    publish_cmd.add_argument("--db-path", type=str, required=True, help="ChromaDB storage folder")
+    publish_cmd.add_argument("--alias", type=str, required=True)
+    publish_cmd.add_argument("--collection", type=str, required=True, help="Versioned collection name")
+    publish_cmd.add_argument("--snapshot-path", type=str, default=None)
+    publish_cmd.add_argument("--numpy-index-dir", type=str, default=None)
+    publish_cmd.add_argument("--lexical-index-dir", type=str, default=None)
+
+    show_cmd = commands.add_parser("show", help="Print the current alias record")
+    show_cmd.add_argument("--db-path", type=str, required=True)
+    show_cmd.add_argument("--alias", type=str, required=True)
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        record = publish_alias(
+            args.db_path,
+            args.alias,
+            args.collection,
+            snapshot_path=args.snapshot_path,
+            numpy_index_dir=args.numpy_index_dir,
+            lexical_index_dir=args.lexical_index_dir,
+        )
+        print(f"✅ {args.alias} -> {record['version']}")
+    else:
+        print(json.dumps(read_alias(args.db_path, args.alias), indent=2))
@@ -0,0 +1,591 @@
+"""
+Retrieval backends behind ``api.query.query_chromadb``.
+
+Both backends answer ``query``/``get`` with Chroma's result layout
+(``{"ids": [[...]], "documents": [[...]], "metadatas": [[...]], "distances": [[...]]}``)
+so the RAG pipeline does not care which one is serving:
+
+- ``ChromaBackend``: today's behaviour, a persistent Chroma collection (SQLite + HNSW).
+- ``NumpyBackend``: exact search over L2-normalized embeddings kept in a memory-mapped
+  ``.npy`` file. Scores are computed block by block with a matrix product and the
+  top-k is selected with ``argpartition``; metadata columns are integer-coded arrays
+  used for ``where`` filtering. For a few hundred thousand chunks this is fast and
+  needs no database per API worker. Rows are stored grouped by book, so a query
+  filtered on ``source`` only scores that book's contiguous slice of the matrix.
+- ``HybridBackend``: runs any of the above next to a BM25 index
+  (``vector_DB.lexical``) and fuses both rankings with reciprocal rank fusion.
+- ``SnapshotBackend`` (``vector_DB.snapshot``): the NumPy backend memory-mapped from
+  one checksummed snapshot file.
+
+A NumPy index directory is produced from an existing collection with
+``python -m vector_DB.backends --persist-dir ... --collection ... --out ...``.
+"""
+
+import os
+import json
+import logging
+import shutil
+import argparse
+from typing import Dict, List, Optional
+import numpy as np
+from vector_DB.index_dirs import new_version_dir, publish_version_dir, resolve
+from vector_DB.lexical import BM25Index, reciprocal_rank_fusion
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+SCORE_BLOCK_ROWS = 32768  # Rows scored per matmul; bounds the float32 temporary
+HYBRID_CANDIDATES = 4  # Each side of a hybrid query retrieves n_results * this many
+EXPORT_PAGE_SIZE = 2048
+PARTITION_COLUMN = "source"  # Rows are grouped by this metadata key on export
+
+
+class RetrievalBackend:
+    """Interface shared by all retrieval backends."""
+
+    def query(
+        self,
+        query_texts: Optional[List[str]] = None,
+        query_embeddings=None,
+        n_results: int = 3,
+        where: Optional[dict] = None,
+    ) -> dict:
+        """
+        Return the nearest chunks for each query, in Chroma's result layout.
+
+        Args:
+            query_texts (list): Query strings (embedded by the backend).
+            query_embeddings: Precomputed query embeddings, one row per query. They take
+                precedence over ``query_texts`` for vector search; the texts are still
+                used for lexical matching when both are given.
+            n_results (int): Number of chunks per query.
+            where (dict): Optional metadata filter, e.g. ``{"source": "ecce_homo.txt"}``.
+        """
+        raise NotImplementedError
+
+    def get(self, ids: List[str]) -> dict:
+        """Fetch chunks by id (``{"ids": [...], "documents": [...], "metadatas": [...]}``)."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Number of chunks served."""
+        raise NotImplementedError
+
+
+class ChromaBackend(RetrievalBackend):
+    """Thin wrapper over a persistent Chroma collection."""
+
+    def __init__(self, persist_directory: str, collection_name: str, embedding_function=None):
+        from vector_DB.chroma_client import persistent_client
+
+        self.client = persistent_client(persist_directory)
+        if embedding_function is None:
+            self.collection = self.client.get_collection(name=collection_name)
+        else:
+            self.collection = self.client.get_collection(
+                name=collection_name, embedding_function=embedding_function
+            )
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=3, where=None) -> dict:
+        kwargs = {"n_results": n_results}
+        if where:
+            kwargs["where"] = where
+        if query_embeddings is not None:
+            kwargs["query_embeddings"] = [list(map(float, e)) for e in query_embeddings]
+        else:
+            kwargs["query_texts"] = query_texts
+        return self.collection.query(**kwargs)
+
+    def get(self, ids: List[str]) -> dict:
+        return self.collection.get(ids=ids, include=["documents", "metadatas"])
+
+    def count(self) -> int:
+        return self.collection.count()
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Return a float32 copy of ``matrix`` with unit-length rows."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def topk_rows(embeddings: np.ndarray, queries: np.ndarray, k: int, rows: Optional[np.ndarray] = None):
+    """
+    Exact top-k inner-product search.
+
+    Args:
+        embeddings (np.ndarray): (N, D) normalized matrix, float16 or float32 (may be a memmap).
+        queries (np.ndarray): (Q, D) normalized float32 queries.
+        k (int): Results per query.
+        rows (np.ndarray): Optional subset of row indices to search (metadata filter).
+
+    Returns:
+        tuple: (indices, scores), each (Q, k') with k' = min(k, candidates), best first.
+    """
+    n = len(rows) if rows is not None else embeddings.shape[0]
+    k = min(k, n)
+    if k == 0:
+        return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+    best_idx = np.empty((len(queries), 0), dtype=np.int64)
+    best_scores = np.empty((len(queries), 0), dtype=np.float32)
+
+    for start in range(0, n, SCORE_BLOCK_ROWS):
+        stop = min(start + SCORE_BLOCK_ROWS, n)
+        if rows is None:
+            block = embeddings[start:stop]
+            block_idx = np.arange(start, stop)
+        else:
+            block_idx = rows[start:stop]
+            block = embeddings[block_idx]
+
+        scores = queries @ block.astype(np.float32, copy=False).T  # (Q, block)
+        if scores.shape[1] > k:
+            part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            scores = np.take_along_axis(scores, part, axis=1)
+            idx = block_idx[part]
+        else:
+            idx = np.broadcast_to(block_idx, scores.shape)
+
+        # Merge with the running top-k
+        best_scores = np.concatenate([best_scores, scores], axis=1)
+        best_idx = np.concatenate([best_idx, idx], axis=1)
+        if best_scores.shape[1] > k:
+            part = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(best_scores, part, axis=1)
+            best_idx = np.take_along_axis(best_idx, part, axis=1)
+
+    order = np.argsort(-best_scores, axis=1)
+    return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+class NumpyBackend(RetrievalBackend):
+    """
+    In-process exact search over a memory-mapped embedding matrix.
+
+    Index directory layout:
+        meta.json           format version, dtype, dimension, metadata column names
+        embeddings.npy      (N, D) L2-normalized float16/float32, memory-mapped read-only
+        ids.json            chunk ids, row-aligned
+        documents.bin       UTF-8 documents packed back to back
+        doc_offsets.npy     (N + 1,) uint64 byte offsets into documents.bin
+        meta_<col>.npy      (N,) int32 codes per metadata column (-1 = missing)
+        meta_<col>.json     code -> value table for that column
+
+    ``meta.json`` may also list ``partitions``: ``[value, start, stop)`` row ranges of
+    ``partition_column``. Filters on that column then select slices instead of
+    scanning a mask over every row.
+    """
+
+    def __init__(self, index_dir: str, embedding_function=None):
+        index_dir = resolve(index_dir)  # Every file from the same published version
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported NumPy index version {self.meta.get('version')} in {index_dir}")
+
+        self.embeddings = np.load(os.path.join(index_dir, "embeddings.npy"), mmap_mode="r")
+        with open(os.path.join(index_dir, "ids.json"), "r", encoding="utf-8") as f:
+            self.ids = json.load(f)
+        self._id_to_row = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+        documents_path = os.path.join(index_dir, "documents.bin")
+        # A zero-byte file (empty collection) cannot be memory-mapped
+        self._documents = (np.memmap(documents_path, dtype=np.uint8, mode="r")
+                           if os.path.getsize(documents_path) else np.empty(0, dtype=np.uint8))
+        self._doc_offsets = np.load(os.path.join(index_dir, "doc_offsets.npy"), mmap_mode="r")
+
+        self.columns: Dict[str, np.ndarray] = {}
+        self.column_values: Dict[str, List] = {}
+        for column in self.meta["metadata_columns"]:
+            self.columns[column] = np.load(os.path.join(index_dir, f"meta_{column}.npy"), mmap_mode="r")
+            with open(os.path.join(index_dir, f"meta_{column}.json"), "r", encoding="utf-8") as f:
+                self.column_values[column] = json.load(f)
+
+        self.partition_column = self.meta.get("partition_column")
+        self.partitions = {value: (start, stop) for value, start, stop in self.meta.get("partitions", [])}
+
+        self._embedding_function = embedding_function
+
+    @property
+    def embedding_function(self):
+        if self._embedding_function is None:
+            from vector_DB.embeddings import get_embedding_function
+            self._embedding_function = get_embedding_function()
+        return self._embedding_function
+
+    def count(self) -> int:
+        return self.embeddings.shape[0]
+
+    def document(self, row: int) -> str:
+        start, stop = int(self._doc_offsets[row]), int(self._doc_offsets[row + 1])
+        return self._documents[start:stop].tobytes().decode("utf-8")
+
+    def metadata(self, row: int) -> dict:
+        meta = {}
+        for column, codes in self.columns.items():
+            code = int(codes[row])
+            if code >= 0:
+                meta[column] = self.column_values[column][code]
+        return meta
+
+    @staticmethod
+    def _clauses(where: Optional[dict]) -> List[dict]:
+        if not where:
+            return []
+        return list(where["$and"]) if "$and" in where else [{k: v} for k, v in where.items()]
+
+    @staticmethod
+    def _wanted(condition) -> list:
+        if isinstance(condition, dict):
+            if "$eq" in condition:
+                return [condition["$eq"]]
+            if "$in" in condition:
+                return list(condition["$in"])
+            raise ValueError(f"Unsupported filter operator: {condition}")
+        return [condition]
+
+    def split_where(self, where: Optional[dict]):
+        """
+        Split a filter into partition row ranges and the remaining clauses.
+
+        Returns:
+            tuple: (ranges, residual) where ``ranges`` is a list of ``(start, stop)``
+            slices (None when the filter does not restrict the partition column).
+        """
+        ranges = None
+        residual = []
+        for clause in self._clauses(where):
+            for column, condition in clause.items():
+                if column == self.partition_column and self.partitions:
+                    selected = {self.partitions[v] for v in self._wanted(condition) if v in self.partitions}
+                    ranges = sorted(selected if ranges is None else selected & set(ranges))
+                else:
+                    residual.append({column: condition})
+        return ranges, residual
+
+    def filter_rows(self, where: Optional[dict]) -> Optional[np.ndarray]:
+        """
+        Translate a Chroma-style ``where`` into row indices.
+
+        Supports ``{"col": value}``, ``{"col": {"$eq": value}}``, ``{"col": {"$in": [...]}}``
+        and ``{"$and": [...]}`` over the stored metadata columns. Only rows of the
+        selected partitions are inspected.
+        """
+        if not where:
+            return None
+
+        ranges, residual = self.split_where(where)
+        if ranges is None:
+            rows = np.arange(self.count())
+        else:
+            rows = np.concatenate([np.arange(start, stop) for start, stop in ranges] or [np.empty(0, dtype=np.int64)])
+
+        for clause in residual:
+            for column, condition in clause.items():
+                if column not in self.columns:
+                    raise ValueError(f"Unknown metadata column in filter: {column}")
+                values = self.column_values[column]
+                codes = [values.index(v) for v in self._wanted(condition) if v in values]
+                rows = rows[np.isin(self.columns[column][rows], codes)]
+        return rows
+
+    def search(self, queries: np.ndarray, k: int, where: Optional[dict] = None):
+        """Top-k ``(indices, scores)`` for normalized queries, restricted by ``where``."""
+        ranges, residual = self.split_where(where)
+        if ranges is None or residual:
+            return topk_rows(self.embeddings, queries, k, rows=self.filter_rows(where))
+
+        # Partition-only filter: score each selected slice in place, then merge
+        best_idx = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start, stop in ranges:
+            idx, scores = topk_rows(self.embeddings[start:stop], queries, k)
+            best_idx = np.concatenate([best_idx, idx + start], axis=1)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+        order = np.argsort(-best_scores, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=3, where=None) -> dict:
+        if query_embeddings is None:
+            query_embeddings = self.embedding_function(query_texts)
+        queries = normalize_rows(query_embeddings)
+
+        indices, scores = self.search(queries, n_results, where=where)
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for row_idx, row_scores in zip(indices, scores):
+            rows = [int(r) for r in row_idx]
+            results["ids"].append([self.ids[r] for r in rows])
+            results["documents"].append([self.document(r) for r in rows])
+            results["metadatas"].append([self.metadata(r) for r in rows])
+            # Squared L2 between unit vectors, comparable with Chroma's default space
+            results["distances"].append([max(0.0, float(2.0 - 2.0 * s)) for s in row_scores])
+        return results
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        """Row of a chunk id, or None when it is not in the index."""
+        return self._id_to_row.get(chunk_id)
+
+    def get(self, ids: List[str]) -> dict:
+        rows = [r for r in map(self.row_of, ids) if r is not None]
+        return {
+            "ids": [self.ids[r] for r in rows],
+            "documents": [self.document(r) for r in rows],
+            "metadatas": [self.metadata(r) for r in rows],
+        }
+
+
+def matches_where(metadata: dict, where: Optional[dict]) -> bool:
+    """Evaluate the ``where`` subset supported by ``NumpyBackend.filter_rows`` on one metadata dict."""
+    if not where:
+        return True
+    clauses = where["$and"] if "$and" in where else [{k: v} for k, v in where.items()]
+    for clause in clauses:
+        for column, condition in clause.items():
+            value = metadata.get(column)
+            if isinstance(condition, dict):
+                if "$eq" in condition and value != condition["$eq"]:
+                    return False
+                if "$in" in condition and value not in condition["$in"]:
+                    return False
+            elif value != condition:
+                return False
+    return True
+
+
+class HybridBackend(RetrievalBackend):
+    """
+    Vector search fused with BM25 lexical search by reciprocal rank fusion.
+
+    Both sides retrieve ``n_results * HYBRID_CANDIDATES`` candidates; the fused top
+    ``n_results`` are returned. Lexical-only hits are fetched from the vector backend
+    by id (and checked against ``where``). ``distances`` hold the negated fused score,
+    so smaller is still better.
+    """
+
+    def __init__(self, vector_backend: RetrievalBackend, lexical_index: BM25Index,
+                 candidates: int = HYBRID_CANDIDATES):
+        self.vector = vector_backend
+        self.lexical = lexical_index
+        self.candidates = candidates
+
+    def count(self) -> int:
+        return self.vector.count()
+
+    def get(self, ids: List[str]) -> dict:
+        return self.vector.get(ids)
+
+    def query(self, query_texts=None, query_embeddings=None, n_results=3, where=None) -> dict:
+        n_candidates = n_results * self.candidates
+        vector_results = self.vector.query(
+            query_texts=query_texts,
+            query_embeddings=query_embeddings,
+            n_results=n_candidates,
+            where=where,
+        )
+        if query_texts is None:
+            return vector_results  # No text to match lexically
+
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for q, query_text in enumerate(query_texts):
+            known = {
+                chunk_id: (doc, meta)
+                for chunk_id, doc, meta in zip(
+                    vector_results["ids"][q], vector_results["documents"][q], vector_results["metadatas"][q]
+                )
+            }
+            lexical_ids = [chunk_id for chunk_id, _ in self.lexical.search(query_text, k=n_candidates)]
+
+            missing = [chunk_id for chunk_id in lexical_ids if chunk_id not in known]
+            if missing:
+                fetched = self.vector.get(missing)
+                for chunk_id, doc, meta in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                    if matches_where(meta or {}, where):
+                        known[chunk_id] = (doc, meta)
+                lexical_ids = [chunk_id for chunk_id in lexical_ids if chunk_id in known]
+
+            fused = reciprocal_rank_fusion([vector_results["ids"][q], lexical_ids], limit=n_results)
+            results["ids"].append([chunk_id for chunk_id, _ in fused])
+            results["documents"].append([known[chunk_id][0] for chunk_id, _ in fused])
+            results["metadatas"].append([known[chunk_id][1] for chunk_id, _ in fused])
+            results["distances"].append([-score for _, score in fused])
+        return results
+
+
+def export_numpy_index(
+    persist_directory: str,
+    collection_name: str,
+    out_dir: str,
+    dtype: str = "float16",
+    metadata_columns: Optional[List[str]] = None,
+) -> dict:
+    """
+    Export a Chroma collection into a ``NumpyBackend`` index directory.
+
+    Rows are written grouped by ``PARTITION_COLUMN`` (one contiguous slice per book).
+    The index is built in a fresh version directory and ``out_dir`` is switched to it
+    atomically (``vector_DB.index_dirs``), so workers serving the previous export keep
+    valid memory maps.
+
+    Args:
+        persist_directory (str): Path to the ChromaDB storage folder.
+        collection_name (str): Collection to export.
+        out_dir (str): Destination index path (a symlink to the published version).
+        dtype (str): ``"float16"`` (half the size) or ``"float32"``.
+        metadata_columns (list): Metadata keys to keep as filter columns (default: all seen).
+
+    Returns:
+        dict: The written ``meta.json`` content.
+    """
+    from vector_DB.chroma_client import persistent_client
+
+    collection = persistent_client(persist_directory).get_collection(name=collection_name)
+    total = collection.count()
+    build_dir = new_version_dir(out_dir)
+    try:
+        meta = _write_numpy_index(collection, collection_name, total, build_dir, dtype, metadata_columns)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    publish_version_dir(out_dir, build_dir)
+
+    logger.info(f"Exported {total} chunks from {collection_name} to {out_dir} ({os.path.basename(build_dir)})")
+    return meta
+
+
+def _write_numpy_index(collection, collection_name: str, total: int, out_dir: str, dtype: str,
+                       metadata_columns: Optional[List[str]]) -> dict:
+
+    # Pass 1: ids and metadata only, to lay rows out grouped by partition
+    ids, raw_metadatas = [], []
+    for offset in range(0, total, EXPORT_PAGE_SIZE):
+        page = collection.get(limit=EXPORT_PAGE_SIZE, offset=offset, include=["metadatas"])
+        ids.extend(page["ids"])
+        raw_metadatas.extend(m or {} for m in page["metadatas"])
+
+    order = sorted(range(len(ids)), key=lambda i: str(raw_metadatas[i].get(PARTITION_COLUMN, "")))
+    ids = [ids[i] for i in order]
+    raw_metadatas = [raw_metadatas[i] for i in order]
+
+    partitions = []
+    for row, meta in enumerate(raw_metadatas):
+        value = meta.get(PARTITION_COLUMN)
+        if value is None:
+            continue
+        if partitions and partitions[-1][0] == value:
+            partitions[-1][2] = row + 1
+        else:
+            partitions.append([value, row, row + 1])
+
+    # Pass 2: embeddings and documents, fetched by id in partition order
+    embeddings = None
+    offsets = [0]
+    with open(os.path.join(out_dir, "documents.bin"), "wb") as doc_file:
+        for start in range(0, len(ids), EXPORT_PAGE_SIZE):
+            page_ids = ids[start:start + EXPORT_PAGE_SIZE]
+            page = collection.get(ids=page_ids, include=["embeddings", "documents"])
+            position = {chunk_id: i for i, chunk_id in enumerate(page["ids"])}
+            rows = [position[chunk_id] for chunk_id in page_ids]
+
+            page_embeddings = normalize_rows(np.asarray(page["embeddings"])[rows])
+            if embeddings is None:
+                embeddings = np.lib.format.open_memmap(
+                    os.path.join(out_dir, "embeddings.npy"),
+                    mode="w+",
+                    dtype=dtype,
+                    shape=(total, page_embeddings.shape[1]),
+                )
+            embeddings[start:start + len(page_embeddings)] = page_embeddings.astype(dtype)
+
+            for row in rows:
+                encoded = (page["documents"][row] or "").encode("utf-8")
+                doc_file.write(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+
+    if embeddings is not None:
+        embeddings.flush()
+    else:  # Empty collection: a (0, 0) matrix still opens and searches to no results
+        np.save(os.path.join(out_dir, "embeddings.npy"), np.empty((0, 0), dtype=dtype))
+    np.save(os.path.join(out_dir, "doc_offsets.npy"), np.asarray(offsets, dtype=np.uint64))
+    with open(os.path.join(out_dir, "ids.json"), "w", encoding="utf-8") as f:
+        json.dump(ids, f)
+
+    if metadata_columns is None:
+        metadata_columns = sorted({key for meta in raw_metadatas for key in meta})
+    for column in metadata_columns:
+        values: List = []
+        lookup: Dict = {}
+        codes = np.full(len(raw_metadatas), -1, dtype=np.int32)
+        for row, meta in enumerate(raw_metadatas):
+            if column in meta:
+                value = meta[column]
+                if value not in lookup:
+                    lookup[value] = len(values)
+                    values.append(value)
+                codes[row] = lookup[value]
+        np.save(os.path.join(out_dir, f"meta_{column}.npy"), codes)
+        with open(os.path.join(out_dir, f"meta_{column}.json"), "w", encoding="utf-8") as f:
+            json.dump(values, f)
+
+    meta = {
+        "version": INDEX_FORMAT_VERSION,
+        "collection": collection_name,
+        "count": total,
+        "dimension": int(embeddings.shape[1]) if embeddings is not None else 0,
+        "dtype": dtype,
+        "metadata_columns": metadata_columns,
+        "partition_column": PARTITION_COLUMN,
+        "partitions": partitions,
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def open_backend(kind: str, persist_directory: str = None, collection_name: str = None,
+                 index_dir: str = None, embedding_function=None,
+                 lexical_index_dir: Optional[str] = None,
+                 snapshot_path: Optional[str] = None) -> RetrievalBackend:
+    """
+    Open a retrieval backend by name.
+
+    Args:
+        kind (str): ``"chroma"``, ``"numpy"`` or ``"snapshot"``.
+        persist_directory (str): Chroma storage folder (chroma backend).
+        collection_name (str): Chroma collection name (chroma backend).
+        index_dir (str): NumPy index directory (numpy backend).
+        embedding_function: Optional query embedding function.
+        lexical_index_dir (str): Optional BM25 index; when given the backend is
+            wrapped in a ``HybridBackend``.
+        snapshot_path (str): Snapshot file (snapshot backend).
+    """
+    if kind == "chroma":
+        backend = ChromaBackend(persist_directory, collection_name, embedding_function=embedding_function)
+    elif kind == "numpy":
+        backend = NumpyBackend(index_dir, embedding_function=embedding_function)
+    elif kind == "snapshot":
+        from vector_DB.snapshot import SnapshotBackend
+
+        backend = SnapshotBackend(snapshot_path, embedding_function=embedding_function)
+    else:
+        raise ValueError(f"Unsupported retrieval backend: {kind}")
+
+    if lexical_index_dir:
+        backend = HybridBackend(backend, BM25Index.load(lexical_index_dir))
+    return backend
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Export a Chroma collection to a NumPy index")
+    parser.add_argument("--persist-dir", type=str, required=True, help="ChromaDB storage folder")
+    parser.add_argument("--collection", type=str, default="nietzsche_books", help="Collection name")
+    parser.add_argument("--out", type=str, required=True, help="Output index directory")
+    parser.add_argument("--dtype", type=str, default="float16", choices=["float16", "float32"])
+    args = parser.parse_args()
+
+    meta = export_numpy_index(args.persist_dir, args.collection, args.out, dtype=args.dtype)
+    print(f"✅ NumPy index written to {args.out}: {meta}")
@@ -0,0 +1,161 @@
+"""
+Micro-batching of query embeddings across concurrent API requests.
+
+Without it every request embeds its single question inside ``collection.query``:
+many one-row ONNX runs, each sized to grab every core, contend for the CPU. The
+``EmbeddingBatcher`` queues question texts, and a collector thread drains the
+queue into batches (up to ``max_batch_size`` texts, or whatever arrived within
+``max_wait_ms`` of the first one). Each batch is embedded in one call on a small
+dedicated thread pool and every caller's future is resolved with its own row, so
+retrieval receives a precomputed embedding.
+
+A batch is only formed once a pool thread is free: while every worker is busy the
+texts keep queueing, and the next batch takes the whole backlog (up to
+``max_batch_size``). Batch size therefore grows with load instead of staying at
+whatever arrives within ``max_wait_ms``.
+"""
+
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 32
+MAX_WAIT_MS = 2.0
+EMBED_WORKERS = 1  # One ONNX run at a time; it parallelizes internally
+_SENTINEL = object()
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts from concurrent callers and embeds them in batches.
+
+    Usage:
+        >>> batcher = EmbeddingBatcher(get_embedding_function())
+        >>> embedding = await batcher.embed("What is the eternal recurrence?")
+        >>> batcher.close()
+    """
+
+    def __init__(
+        self,
+        embedding_fn,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+        workers: int = EMBED_WORKERS,
+    ):
+        """
+        Args:
+            embedding_fn: Callable mapping a list of texts to embeddings.
+            max_batch_size (int): Largest batch sent to the model.
+            max_wait_ms (float): How long the first text of a batch waits for company.
+            workers (int): Threads running embedding calls (batches in flight).
+        """
+        self.embedding_fn = embedding_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.texts_embedded = 0
+        self.batches = 0
+        self.embed_seconds = 0.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._free_workers = threading.BoundedSemaphore(workers)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed-batch")
+        self._collector = threading.Thread(target=self._collect_loop, name="embed-collector", daemon=True)
+        self._collector.start()
+
+    def submit(self, text: str) -> Future:
+        """Queue one text; the returned future resolves to its embedding."""
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    async def embed(self, text: str):
+        """Await the embedding of one text without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_many(self, texts: List[str]) -> list:
+        """Blocking helper: embed several texts through the shared batches."""
+        futures = [self.submit(text) for text in texts]
+        return [future.result() for future in futures]
+
+    def stats(self) -> dict:
+        return {
+            "texts_embedded": self.texts_embedded,
+            "batches": self.batches,
+            "mean_batch_size": round(self.texts_embedded / self.batches, 2) if self.batches else 0.0,
+            "embed_s": round(self.embed_seconds, 3),
+        }
+
+    def close(self) -> None:
+        """Stop collecting, finish queued batches and shut the pool down."""
+        self._queue.put(_SENTINEL)
+        self._collector.join()
+        self._executor.shutdown(wait=True)
+
+    def _collect_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _SENTINEL:
+                return
+            deadline = time.perf_counter() + self.max_wait
+            self._free_workers.acquire()  # Texts arriving meanwhile join this batch
+            batch: List[Tuple[str, Future]] = [item]
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _SENTINEL:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._executor.submit(self._run_batch, batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]) -> None:
+        try:
+            self._embed_batch(batch)
+        finally:
+            self._free_workers.release()
+
+    def _embed_batch(self, batch: List[Tuple[str, Future]]) -> None:
+        live = [(text, future) for text, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        try:
+            start = time.perf_counter()
+            embeddings = self.embedding_fn([text for text, _ in live])
+            self.embed_seconds += time.perf_counter() - start
+            self.texts_embedded += len(live)
+            self.batches += 1
+        except Exception as e:
+            for _, future in live:
+                future.set_exception(e)
+            return
+        for (_, future), embedding in zip(live, embeddings):
+            future.set_result(embedding)
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher(embedding_fn=None, **kwargs) -> EmbeddingBatcher:
+    """Return the process-wide batcher, creating it (with ``embedding_fn``) on first use."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            if embedding_fn is None:
+                from vector_DB.embeddings import get_embedding_function
+                embedding_fn = get_embedding_function()
+            _batcher = EmbeddingBatcher(embedding_fn, **kwargs)
+        return _batcher
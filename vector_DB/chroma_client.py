@@ -0,0 +1,45 @@
+"""
+One way to open a persistent Chroma client, so every client in a process shares the same settings.
+
+Chroma keeps one ``System`` (and its segment cache) per persist directory and process, and
+refuses to open a second client on the same directory with different settings. Every
+``PersistentClient`` in this repo is therefore created through ``persistent_client``.
+
+By default Chroma keeps the HNSW index of every collection it ever opened in memory until the
+process exits. With a memory limit set, segments are held in an LRU cache instead: once the
+loaded segments exceed ``memory_limit_bytes``, the least recently used ones are unloaded and
+read back from disk on their next query.
+"""
+
+import os
+import chromadb
+from chromadb.config import Settings
+
+# 0 keeps Chroma's default (no eviction). Same name as Chroma's own setting, which reads it too.
+MEMORY_LIMIT_BYTES = int(os.getenv("CHROMA_MEMORY_LIMIT_BYTES", "0"))
+
+
+def set_memory_limit(memory_limit_bytes: int) -> None:
+    """Sets the segment memory limit for clients opened from now on (call before the first one)."""
+    global MEMORY_LIMIT_BYTES
+    MEMORY_LIMIT_BYTES = memory_limit_bytes
+
+
+def chroma_settings() -> Settings:
+    """Client settings: an LRU segment cache bounded to ``MEMORY_LIMIT_BYTES`` when it is set."""
+    if not MEMORY_LIMIT_BYTES:
+        return Settings()
+    return Settings(chroma_segment_cache_policy="LRU", chroma_memory_limit_bytes=MEMORY_LIMIT_BYTES)
+
+
+def persistent_client(path: str):
+    """
+    Open a persistent Chroma client on ``path``.
+
+    Args:
+        path (str): Path to the ChromaDB storage folder.
+
+    Returns:
+        chromadb.PersistentClient: The client.
+    """
+    return chromadb.PersistentClient(path=path, settings=chroma_settings())
@@ -1,6 +1,60 @@
+"""
+Incremental ingestion of the Nietzsche library into a persistent ChromaDB collection.
+
+Every chunk gets a stable id derived from its book and content hash, and a JSON
+manifest records which files (and which chunk ids) are already ingested. A run
+therefore only embeds chunks that are new or changed, deletes chunks that
+disappeared from an edited book, and drops every chunk of a book that was
+removed from the folder. Re-running on an unchanged library is a no-op.
+
+Books are read and chunked on worker processes, while the chunks that need
+embedding flow through ``vector_DB.pipeline.EmbeddingPipeline``: fixed-size
+embedding batches on one thread, bulk upserts on another. Whenever the collection
+changes, the BM25 lexical index used for hybrid search is rebuilt next to it.
+
+Each chunk carries ``{"source": <file name>, "chapter": <number>}`` metadata so
+queries can be restricted to one book or chapter.
+
+With ``--dedup-threshold`` set, near-duplicate chunks (other editions, repeated
+licence boilerplate) are detected with MinHash/LSH (``vector_DB.dedup``) before
+embedding and only one copy is stored. Books that had duplicates dropped are
+re-checked whenever the library changes, so a copy comes back if the one it
+deferred to disappears.
+
+With ``--alias`` the collection is published behind a stable alias once ingestion
+succeeded (``vector_DB.aliases``); ``--new-version`` builds a fresh versioned
+collection for that, so the serving version is never modified in place. The new
+version is seeded with a copy of the version the alias serves (stored embeddings,
+manifest and MinHash signatures), so only what changed in the library is embedded,
+and after publishing all but the newest ``--keep-versions`` versions are dropped.
+
+Usage:
+    python -m vector_DB.chroma_db --books-folder /path/to/books --db-path /path/to/db
+"""
+
 import os
-import chromadb
-from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+import re
+import json
+import shutil
+import hashlib
+import logging
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+from vector_DB.aliases import publish_alias, read_alias, versioned_name
+from vector_DB.chroma_client import persistent_client
+from vector_DB.chunking import chunk_text  # Re-exported for existing callers
+from vector_DB.chunking import chapter_labels, iter_paragraphs, stream_chunks, structured_chunks
+from vector_DB.dedup import DEDUP_KEEP, KEEP_POLICIES, NUM_PERM, MinHasher, NearDuplicateIndex
+from vector_DB.embeddings import get_embedding_function
+from vector_DB.index_dirs import list_versions
+from vector_DB.lexical import build_lexical_index
+from vector_DB.pipeline import EmbeddingPipeline, get_max_batch_size
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # CONFIGs
 BOOKS_FOLDER = "/path/to/nietzsche_books"
@@ -8,65 +62,556 @@ DB_PATH = "/path/to/chroma_storage/nietzsche_db"  # fixed storage location
 COLLECTION_NAME = "nietzsche_books"
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
+CHUNKER = "fixed"  # "fixed" (500-char windows) or "structured" (paragraph/aphorism/sentence aware)
+MANIFEST_VERSION = 1
+METADATA_FIELDS = ["source", "chapter"]  # Changing this re-writes every chunk's metadata
+CHUNK_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # Leave cores for embedding
+EMBED_BATCH_SIZE = 64
+WRITE_BATCH_SIZE = 2048
+DEDUP_THRESHOLD = None  # e.g. 0.8 to drop near-duplicate chunks at ingest
+KEEP_VERSIONS = 2  # Versioned collections kept behind an alias: the served one and its predecessor
+
+
+def get_collection(db_path: str = DB_PATH, collection_name: str = COLLECTION_NAME):
+    """
+    Open (or create) the persistent Chroma collection used for ingestion.
+
+    Args:
+        db_path (str): Path to the ChromaDB storage folder.
+        collection_name (str): Name of the collection.
+
+    Returns:
+        chromadb.Collection: The collection handle.
+    """
+    client = persistent_client(db_path)
+    return client.get_or_create_collection(name=collection_name)
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 digest of a file, read in fixed-size blocks."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_ids_for(filename: str, chunks: List[str]) -> List[str]:
+    """
+    Derive stable chunk ids from the book name and each chunk's content hash.
+
+    Identical chunks inside the same book get an occurrence suffix so ids stay unique.
+
+    Args:
+        filename (str): Source file name of the book.
+        chunks (list): Text chunks of the book, in order.
+
+    Returns:
+        list: One id per chunk, e.g. ``"the_gay_science-3f2a9c0d1b7e4a55"``.
+    """
+    book_id = os.path.splitext(filename)[0]
+    seen: Dict[str, int] = {}
+    ids = []
+    for chunk in chunks:
+        digest = hashlib.sha1(chunk.encode("utf-8")).hexdigest()[:16]
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        suffix = f"-{occurrence}" if occurrence else ""
+        ids.append(f"{book_id}-{digest}{suffix}")
+    return ids
+
+
+def default_manifest_path(db_path: str, collection_name: str) -> str:
+    """Manifest lives next to the Chroma storage, one per collection."""
+    return os.path.join(db_path, f"{collection_name}_manifest.json")
+
+
+def default_lexical_index_path(db_path: str, collection_name: str) -> str:
+    """BM25 index directory for hybrid search, one per collection."""
+    return os.path.join(db_path, f"{collection_name}_bm25")
+
+
+def default_dedup_path(db_path: str, collection_name: str) -> str:
+    """MinHash signatures of the stored chunks, one file per collection."""
+    return os.path.join(db_path, f"{collection_name}_minhash.npz")
+
+
+def refresh_lexical_index(collection, index_dir: Optional[str], dirty: bool) -> None:
+    """Rebuild the BM25 index when the collection changed or the index is missing."""
+    if index_dir is None:
+        return
+    if dirty or not os.path.exists(os.path.join(index_dir, "meta.json")):
+        build_lexical_index(collection, index_dir)
+
+
+def load_manifest(manifest_path: str, collection_name: str) -> dict:
+    """Load the ingestion manifest, or return an empty one for a fresh collection."""
+    if not os.path.exists(manifest_path):
+        return {"version": MANIFEST_VERSION, "collection": collection_name, "files": {}}
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(
+            f"Unsupported manifest version {manifest.get('version')} in {manifest_path}"
+        )
+    return manifest
+
+
+def save_manifest(manifest: dict, manifest_path: str) -> None:
+    """Write the manifest atomically so an interrupted run never leaves it half-written."""
+    os.makedirs(os.path.dirname(manifest_path) or ".", exist_ok=True)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def read_and_chunk(file_path: str, chunker: str = CHUNKER) -> List[str]:
+    """
+    Stream a book from a memory map and split it with the selected chunker.
+
+    ``"fixed"`` flattens newlines into overlapping ``CHUNK_SIZE``-character windows;
+    ``"structured"`` packs paragraphs, aphorisms and sentences up to a token target.
+    """
+    if chunker == "fixed":
+        return list(stream_chunks(file_path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP))
+    if chunker == "structured":
+        return list(structured_chunks(iter_paragraphs(file_path)))
+    raise ValueError(f"Unsupported chunker: {chunker}")
+
+
+def chunk_metadatas(filename: str, chunks: List[str]) -> List[dict]:
+    """Metadata stored with each chunk: its book and chapter number."""
+    return [{"source": filename, "chapter": chapter} for chapter in chapter_labels(chunks)]
+
+
+def _chunk_book(books_folder: str, filename: str, chunker: str, num_perm: Optional[int] = None) -> tuple:
+    """
+    Worker-process entry point: chunk one book and derive its chunk ids and metadata,
+    plus MinHash signatures when ``num_perm`` is given (dedup enabled).
+    """
+    chunks = read_and_chunk(os.path.join(books_folder, filename), chunker=chunker)
+    signatures = None
+    if num_perm:
+        hasher = MinHasher(num_perm)
+        signatures = [hasher.signature(chunk) for chunk in chunks]
+    return filename, chunks, chunk_ids_for(filename, chunks), chunk_metadatas(filename, chunks), signatures
+
+
+def scan_books(books_folder: str, manifest: dict, force: bool = False) -> Tuple[Dict[str, dict], List[str]]:
+    """
+    Compare the books folder with the manifest.
+
+    Files whose size and mtime match the manifest are assumed unchanged without
+    hashing; everything else is hashed and compared by content. ``force`` treats
+    every book as changed (e.g. after switching chunkers).
+
+    Returns:
+        tuple: (changed, removed) where ``changed`` maps filename to its new file
+        record and ``removed`` lists manifest entries no longer on disk.
+    """
+    known = manifest["files"]
+    on_disk = sorted(f for f in os.listdir(books_folder) if f.endswith(".txt"))
+    changed = {}
+
+    for filename in on_disk:
+        file_path = os.path.join(books_folder, filename)
+        stat = os.stat(file_path)
+        record = known.get(filename)
+
+        if not force and record and record["size"] == stat.st_size and record["mtime"] == stat.st_mtime:
+            continue
+
+        sha256 = file_sha256(file_path)
+        if not force and record and record["sha256"] == sha256:
+            # Touched but not modified: refresh the cheap fingerprint only
+            record["mtime"] = stat.st_mtime
+            continue
 
-# 1. Initialize persistent Chroma client
-client = chromadb.PersistentClient(path=DB_PATH)
-
-# If collection exists, use it; otherwise, create it
-try:
-    collection = client.get_collection(COLLECTION_NAME)
-except:
-    collection = client.create_collection(name=COLLECTION_NAME)
-
-# 2. Initialize Chroma's built-in embedding function
-embedding_fn = DefaultEmbeddingFunction()
-
-# 3. Helper: Split text into chunks
-def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        chunks.append(chunk)
-        start += chunk_size - overlap
-    return chunks
-
-# 4. Process all books
-doc_id_counter = 1
-
-for filename in os.listdir(BOOKS_FOLDER):
-    if filename.endswith(".txt"):
-        file_path = os.path.join(BOOKS_FOLDER, filename)
-
-        with open(file_path, "r", encoding="utf-8") as f:
-            text = f.read()
-
-        # Clean and chunk
-        text = text.strip().replace("\n", " ")
-        chunks = chunk_text(text)
-
-        # Generate embeddings
-        embeddings = embedding_fn(chunks)
-
-        for i, chunk in enumerate(chunks):
-            print(f"\n📄 File: {filename} | Chunk {i+1}/{len(chunks)}")
-            print(f"Text chunk: {chunk[:100]}...")  # preview first 100 chars
-            print(f"Embedding dims: {len(embeddings[i])}")
-            print(f"First 10 values: {embeddings[i][:10]}")
-
-        # Store in Chroma
-        ids = [f"doc{doc_id_counter + i}" for i in range(len(chunks))]
-        metadatas = [{"source": filename} for _ in chunks]
-
-        collection.add(
-            documents=chunks,
-            embeddings=embeddings,  # explicitly pass embeddings
-            ids=ids,
-            metadatas=metadatas
+        changed[filename] = {"sha256": sha256, "size": stat.st_size, "mtime": stat.st_mtime}
+
+    removed = sorted(set(known) - set(on_disk))
+    return changed, removed
+
+
+def delete_ids(collection, ids: List[str], batch_size: int = 5000) -> None:
+    """Delete chunk ids from the collection in bounded batches."""
+    for i in range(0, len(ids), batch_size):
+        collection.delete(ids=ids[i:i + batch_size])
+
+
+def dedup_book(dedup: NearDuplicateIndex, filename: str, chunks: List[str], ids: List[str],
+               signatures: List) -> Tuple[List[int], List[Tuple[str, str]], int]:
+    """
+    Check one book's chunks against the near-duplicate index, in order.
+
+    Returns:
+        tuple: (positions of the chunks to store, ``(chunk id, book)`` of stored copies
+        they replace under the ``"longest"`` policy, UTF-8 bytes of the dropped chunks).
+    """
+    kept, replaced, bytes_dropped = [], [], 0
+    for i, chunk_id in enumerate(ids):
+        keep, other_id, other_source = dedup.check(chunk_id, filename, len(chunks[i]), signatures[i])
+        if keep:
+            kept.append(i)
+            if other_id:
+                replaced.append((other_id, other_source))
+        else:
+            bytes_dropped += len(chunks[i].encode("utf-8"))
+    return kept, replaced, bytes_dropped
+
+
+def drop_replaced(collection, manifest: dict, replaced: List[Tuple[str, str]]) -> None:
+    """Delete stored copies superseded by longer ones and count them as their book's duplicates."""
+    delete_ids(collection, [chunk_id for chunk_id, _ in replaced])
+    for chunk_id, source in replaced:
+        record = manifest["files"][source]
+        record["chunk_ids"] = [i for i in record["chunk_ids"] if i != chunk_id]
+        record["duplicates"] = record.get("duplicates", 0) + 1
+
+
+def ingest_books(
+    books_folder: str = BOOKS_FOLDER,
+    db_path: str = DB_PATH,
+    collection_name: str = COLLECTION_NAME,
+    manifest_path: str = None,
+    workers: int = CHUNK_WORKERS,
+    embed_batch_size: int = EMBED_BATCH_SIZE,
+    write_batch_size: int = WRITE_BATCH_SIZE,
+    intra_op_threads: Optional[int] = None,
+    chunker: str = CHUNKER,
+    lexical_index_dir: Optional[str] = "",
+    dedup_threshold: Optional[float] = DEDUP_THRESHOLD,
+    dedup_keep: str = DEDUP_KEEP,
+) -> dict:
+    """
+    Bring the collection in sync with the books folder, touching only what changed.
+
+    Args:
+        books_folder (str): Folder containing the ``.txt`` books.
+        db_path (str): Path to the ChromaDB storage folder.
+        collection_name (str): Name of the collection to update.
+        manifest_path (str): Optional manifest location (defaults next to the DB).
+        workers (int): Worker processes used for reading and chunking.
+        embed_batch_size (int): Chunks per embedding call.
+        write_batch_size (int): Chunks per bulk upsert (capped by the client limit).
+        intra_op_threads (int): ONNX intra-op threads for embedding (None = all cores).
+        chunker (str): ``"fixed"`` or ``"structured"``; switching re-chunks every book.
+        lexical_index_dir (str): BM25 index directory ("" = default next to the DB,
+            None = do not maintain a lexical index).
+        dedup_threshold (float): MinHash Jaccard threshold above which chunks are
+            near-duplicates (None = keep every chunk).
+        dedup_keep (str): Which copy of a duplicate survives, ``"first"`` or ``"longest"``.
+
+    Returns:
+        dict: Counts of changed/removed books, added/deleted/kept chunks,
+        pipeline throughput counters and, with dedup, what it saved.
+    """
+    manifest_path = manifest_path or default_manifest_path(db_path, collection_name)
+    if lexical_index_dir == "":
+        lexical_index_dir = default_lexical_index_path(db_path, collection_name)
+    manifest = load_manifest(manifest_path, collection_name)
+    client = persistent_client(db_path)
+    collection = client.get_or_create_collection(name=collection_name)
+
+    # Chunk ids depend on the chunker, so a different one invalidates every book.
+    # New metadata fields keep the ids but every chunk has to be written again.
+    rechunk = manifest.get("chunker", CHUNKER) != chunker
+    rewrite = manifest.get("metadata_fields", ["source"]) != METADATA_FIELDS
+    # A different dedup setting (or lost signatures) re-checks every book
+    dedup_config = None
+    if dedup_threshold:
+        dedup_config = {"threshold": dedup_threshold, "keep": dedup_keep, "num_perm": NUM_PERM}
+    dedup_path = default_dedup_path(db_path, collection_name)
+    redup = manifest.get("dedup") != dedup_config or bool(dedup_config and not os.path.exists(dedup_path))
+    changed, removed = scan_books(books_folder, manifest, force=rechunk or rewrite or redup)
+    manifest["chunker"] = chunker
+    manifest["metadata_fields"] = METADATA_FIELDS
+    manifest["dedup"] = dedup_config
+
+    dedup = None
+    if dedup_config:
+        dedup = NearDuplicateIndex(**dedup_config) if redup else NearDuplicateIndex.load(dedup_path)
+    elif os.path.exists(dedup_path):
+        os.remove(dedup_path)
+    stats = {
+        "books_changed": len(changed),
+        "books_removed": len(removed),
+        "chunks_added": 0,
+        "chunks_deleted": 0,
+        "chunks_kept": 0,
+    }
+
+    # Drop every chunk of books that left the library
+    for filename in removed:
+        stale_ids = manifest["files"].pop(filename)["chunk_ids"]
+        delete_ids(collection, stale_ids)
+        if dedup is not None:
+            dedup.remove(stale_ids)
+        stats["chunks_deleted"] += len(stale_ids)
+        logger.info(f"Removed {len(stale_ids)} chunks of deleted book {filename}")
+
+    if dedup is not None and (changed or removed):
+        # Books holding dropped duplicates are re-checked: the copy they deferred to may be gone
+        for filename, record in manifest["files"].items():
+            if record.get("duplicates") and filename not in changed:
+                changed[filename] = {key: record[key] for key in ("sha256", "size", "mtime")}
+                stats["books_rechecked"] = stats.get("books_rechecked", 0) + 1
+        for filename in changed:
+            dedup.remove(manifest["files"].get(filename, {}).get("chunk_ids", []))
+
+    if not changed:
+        save_manifest(manifest, manifest_path)
+        if dedup is not None:
+            dedup.save(dedup_path)
+        refresh_lexical_index(collection, lexical_index_dir, dirty=bool(removed))
+        return stats
+
+    pipeline = EmbeddingPipeline(
+        collection,
+        get_embedding_function(intra_op_threads=intra_op_threads),
+        embed_batch_size=embed_batch_size,
+        write_batch_size=write_batch_size,
+        max_write_batch=get_max_batch_size(client),
+    )
+    ingested = {}
+    replaced = []  # (chunk id, book) of stored copies superseded under the "longest" policy
+    dedup_stats = {"chunks_checked": 0, "duplicates_dropped": 0, "replaced": 0,
+                   "document_bytes_dropped": 0, "check_s": 0.0}
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            num_perm = NUM_PERM if dedup is not None else None
+            futures = [executor.submit(_chunk_book, books_folder, f, chunker, num_perm) for f in sorted(changed)]
+
+            # Dedup decisions depend on order, so keep it deterministic (file name order)
+            for future in (futures if dedup is not None else as_completed(futures)):
+                filename, chunks, ids, metadatas, signatures = future.result()
+                kept = list(range(len(ids)))
+                if dedup is not None:
+                    start = time.perf_counter()
+                    kept, book_replaced, bytes_dropped = dedup_book(dedup, filename, chunks, ids, signatures)
+                    replaced.extend(book_replaced)
+                    dedup_stats["document_bytes_dropped"] += bytes_dropped
+                    dedup_stats["check_s"] += time.perf_counter() - start
+                    dedup_stats["chunks_checked"] += len(ids)
+                    dedup_stats["duplicates_dropped"] += len(ids) - len(kept)
+
+                kept_ids = [ids[i] for i in kept]
+                previous_ids = set(manifest["files"].get(filename, {}).get("chunk_ids", []))
+                new_positions = [i for i in kept if rewrite or ids[i] not in previous_ids]
+                stale_ids = sorted(previous_ids - set(kept_ids))
+
+                if stale_ids:
+                    delete_ids(collection, stale_ids)
+
+                pipeline.submit(
+                    ids=[ids[i] for i in new_positions],
+                    documents=[chunks[i] for i in new_positions],
+                    metadatas=[metadatas[i] for i in new_positions],
+                )
+                ingested[filename] = (kept_ids, len(ids) - len(kept))
+
+                stats["chunks_added"] += len(new_positions)
+                stats["chunks_deleted"] += len(stale_ids)
+                stats["chunks_kept"] += len(kept) - len(new_positions)
+                logger.info(
+                    f"{filename}: {len(new_positions)} new, {len(stale_ids)} deleted, "
+                    f"{len(kept) - len(new_positions)} unchanged, {len(ids) - len(kept)} duplicate chunks"
+                )
+    finally:
+        stats["pipeline"] = pipeline.close()
+
+    # Only record books once their chunks are durably written; an interrupted
+    # run simply re-processes them and the upserts are idempotent.
+    for filename, (ids, duplicates) in ingested.items():
+        record = changed[filename]
+        record["chunk_ids"] = ids
+        record["duplicates"] = duplicates
+        manifest["files"][filename] = record
+
+    if replaced:
+        # Deleted only now, so a pending upsert of the same id cannot resurrect it
+        drop_replaced(collection, manifest, replaced)
+        stats["chunks_deleted"] += len(replaced)
+        dedup_stats["replaced"] = len(replaced)
+
+    if dedup is not None:
+        dedup.save(dedup_path)
+        stats["dedup"] = dedup_summary(manifest, dedup_stats, stats["pipeline"])
+        logger.info(f"Near-duplicate removal: {stats['dedup']}")
+
+    save_manifest(manifest, manifest_path)
+    refresh_lexical_index(collection, lexical_index_dir, dirty=True)
+    return stats
+
+
+def collection_names(client) -> List[str]:
+    """Names of all collections (``list_collections`` returns names or collections depending on the version)."""
+    return [getattr(collection, "name", collection) for collection in client.list_collections()]
+
+
+def seed_version(db_path: str, alias: str, collection_name: str, batch_size: int = WRITE_BATCH_SIZE) -> Optional[str]:
+    """
+    Start a new versioned collection as a copy of the version ``alias`` currently serves.
+
+    Chunks are copied with their stored embeddings, and the manifest and MinHash signatures
+    are copied alongside, so the following ``ingest_books`` run only embeds what changed in
+    the library since that version.
+
+    Args:
+        db_path (str): Path to the ChromaDB storage folder.
+        alias (str): Alias whose current version is copied.
+        collection_name (str): The new, still empty, versioned collection.
+        batch_size (int): Chunks per read/upsert (capped by the client limit).
+
+    Returns:
+        str: The collection the new version was seeded from, or None when the alias
+        was never published (or its collection is gone) and the version starts empty.
+    """
+    record = read_alias(db_path, alias)
+    client = persistent_client(db_path)
+    if record is None or record["collection"] not in collection_names(client):
+        return None
+
+    source_name = record["collection"]
+    source = client.get_collection(name=source_name)
+    target = client.get_or_create_collection(name=collection_name, metadata=source.metadata)
+    batch_size = min(batch_size, get_max_batch_size(client))
+    total = source.count()
+    for offset in range(0, total, batch_size):
+        batch = source.get(include=["embeddings", "documents", "metadatas"], offset=offset, limit=batch_size)
+        target.upsert(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
         )
 
-        doc_id_counter += len(chunks)
-        print(f"✅ Stored {len(chunks)} chunks from {filename}")
+    source_manifest = default_manifest_path(db_path, source_name)
+    if os.path.exists(source_manifest):
+        manifest = load_manifest(source_manifest, source_name)
+        manifest["collection"] = collection_name
+        save_manifest(manifest, default_manifest_path(db_path, collection_name))
+    if os.path.exists(default_dedup_path(db_path, source_name)):
+        shutil.copyfile(default_dedup_path(db_path, source_name), default_dedup_path(db_path, collection_name))
+    logger.info(f"Seeded {collection_name} with {total} chunks of {source_name}")
+    return source_name
+
+
+def prune_versions(db_path: str, alias: str, keep: int = KEEP_VERSIONS) -> List[str]:
+    """
+    Drop all but the newest ``keep`` versioned collections behind ``alias``.
+
+    Each dropped version's manifest, MinHash signatures and BM25 index go with it. The
+    version the alias serves is never dropped; ``keep`` should leave room for the
+    previous one while API workers still reload.
+
+    Returns:
+        list: Names of the dropped collections.
+    """
+    record = read_alias(db_path, alias)
+    current = record["collection"] if record else None
+    client = persistent_client(db_path)
+    pattern = re.compile(rf"{re.escape(alias)}_v\d{{8}}T\d{{6}}$")
+    versions = sorted(name for name in collection_names(client) if pattern.match(name))
+
+    removed = []
+    for name in versions[:max(len(versions) - keep, 0)]:
+        if name == current:
+            continue
+        client.delete_collection(name=name)
+        for path in (default_manifest_path(db_path, name), default_dedup_path(db_path, name)):
+            if os.path.exists(path):
+                os.remove(path)
+        lexical_index_dir = default_lexical_index_path(db_path, name)
+        for version_dir in list_versions(lexical_index_dir):
+            shutil.rmtree(version_dir, ignore_errors=True)
+        if os.path.islink(lexical_index_dir):
+            os.remove(lexical_index_dir)
+        elif os.path.isdir(lexical_index_dir):
+            shutil.rmtree(lexical_index_dir, ignore_errors=True)
+        removed.append(name)
+        logger.info(f"Dropped superseded version {name} of {alias}")
+    return removed
+
+
+def dedup_summary(manifest: dict, dedup_stats: dict, pipeline_stats: dict) -> dict:
+    """
+    Report what near-duplicate removal saved in this run and across the library.
+
+    Embedding time saved is estimated from this run's measured per-chunk embedding cost.
+    """
+    stored = sum(len(record["chunk_ids"]) for record in manifest["files"].values())
+    dropped = sum(record.get("duplicates", 0) for record in manifest["files"].values())
+    summary = dict(dedup_stats)
+    summary["check_s"] = round(summary["check_s"], 3)
+    summary["library_chunks_stored"] = stored
+    summary["library_duplicates_dropped"] = dropped
+    summary["library_reduction"] = round(dropped / max(stored + dropped, 1), 4)
+    if pipeline_stats.get("chunks_written"):
+        per_chunk = pipeline_stats["embed_s"] / pipeline_stats["chunks_written"]
+        summary["embed_s_saved_est"] = round(per_chunk * dedup_stats["duplicates_dropped"], 2)
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally ingest books into ChromaDB")
+    parser.add_argument("--books-folder", type=str, default=BOOKS_FOLDER, help="Folder with .txt books")
+    parser.add_argument("--db-path", type=str, default=DB_PATH, help="ChromaDB storage folder")
+    parser.add_argument("--collection", type=str, default=COLLECTION_NAME, help="Collection name")
+    parser.add_argument("--manifest", type=str, default=None, help="Optional manifest path")
+    parser.add_argument("--workers", type=int, default=CHUNK_WORKERS, help="Chunking worker processes")
+    parser.add_argument("--embed-batch-size", type=int, default=EMBED_BATCH_SIZE, help="Chunks per embedding call")
+    parser.add_argument("--write-batch-size", type=int, default=WRITE_BATCH_SIZE, help="Chunks per bulk upsert")
+    parser.add_argument("--intra-op-threads", type=int, default=None, help="ONNX intra-op threads for embedding")
+    parser.add_argument("--chunker", type=str, default=CHUNKER, choices=["fixed", "structured"], help="Chunking strategy")
+    parser.add_argument("--lexical-index", type=str, default="", help="BM25 index directory (default: next to the DB)")
+    parser.add_argument("--no-lexical-index", action="store_true", help="Do not maintain a BM25 index")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD,
+                        help="Drop chunks whose MinHash Jaccard similarity to a stored chunk reaches this value")
+    parser.add_argument("--dedup-keep", type=str, default=DEDUP_KEEP, choices=KEEP_POLICIES,
+                        help="Which copy of a near-duplicate is stored")
+    parser.add_argument("--alias", type=str, default=None, help="Publish the collection behind this alias")
+    parser.add_argument("--new-version", action="store_true",
+                        help="Build a new versioned collection for --alias instead of updating --collection")
+    parser.add_argument("--keep-versions", type=int, default=KEEP_VERSIONS,
+                        help="Versioned collections kept behind --alias after publishing (with --new-version)")
+
+    args = parser.parse_args()
+    if args.new_version and not args.alias:
+        parser.error("--new-version requires --alias")
+    if args.new_version and args.manifest:
+        parser.error("--new-version keeps one manifest per version; --manifest cannot be used with it")
+    collection_name = args.collection
+    if args.new_version:
+        collection_name = versioned_name(args.alias)
+        seed_version(args.db_path, args.alias, collection_name, batch_size=args.write_batch_size)
+
+    stats = ingest_books(
+        books_folder=args.books_folder,
+        db_path=args.db_path,
+        collection_name=collection_name,
+        manifest_path=args.manifest,
+        workers=args.workers,
+        embed_batch_size=args.embed_batch_size,
+        write_batch_size=args.write_batch_size,
+        intra_op_threads=args.intra_op_threads,
+        chunker=args.chunker,
+        lexical_index_dir=None if args.no_lexical_index else args.lexical_index,
+        dedup_threshold=args.dedup_threshold,
+        dedup_keep=args.dedup_keep,
+    )
+    print(f"\n🎯 Library in sync: {stats}")
 
-print("\n🎯 All Nietzsche books embedded and stored in ChromaDB!")
+    if args.alias:
+        lexical_index_dir = None
+        if not args.no_lexical_index:
+            lexical_index_dir = args.lexical_index or default_lexical_index_path(args.db_path, collection_name)
+        publish_alias(args.db_path, args.alias, collection_name, lexical_index_dir=lexical_index_dir)
+        print(f"🔀 {args.alias} -> {collection_name}")
+        if args.new_version:
+            for name in prune_versions(args.db_path, args.alias, keep=args.keep_versions):
+                print(f"🗑️ dropped {name}")
@@ -0,0 +1,422 @@
+"""
+Text chunking for vector-store ingestion.
+
+``chunk_text`` is the original in-memory splitter. ``stream_chunks`` produces the
+same chunks straight from a memory-mapped file: bytes are decoded incrementally
+(multi-byte UTF-8 sequences and ``\\r\\n`` pairs split across windows are handled by
+the incremental decoders), newlines are flattened on the fly and chunks are yielded
+lazily. Only a window plus one chunk is ever held in memory, whatever the file size.
+
+``structured_chunks`` packs whole paragraphs, aphorisms and sentences into chunks of
+a target token size instead of cutting every N characters, so retrieved passages
+start and end on a thought boundary.
+
+``chapter_labels`` assigns every chunk the number of the chapter (or part, essay,
+book) it belongs to, from headings such as "CHAPTER IV." or "SECOND ESSAY", so
+retrieval can be restricted to one chapter of a book.
+"""
+
+import io
+import os
+import re
+import mmap
+import codecs
+from collections import deque
+from typing import Callable, Iterable, Iterator, List, Optional
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+WINDOW_BYTES = 1 << 16  # Bytes decoded per step from the memory map
+DEFAULT_TOKENIZER = "sentence-transformers/all-MiniLM-L6-v2"
+TARGET_TOKENS = 160  # Fits MiniLM's 256-token window with room for wordpiece splits
+OVERLAP_TOKENS = 24
+
+# "125.", "125. The Madman", "§ 12", "XII." or "Aphorism 3" opening a paragraph
+APHORISM_RE = re.compile(r"^\s*(?:§\s*\d+|\d{1,4}\.(?:\s|$)|[IVXLC]{1,8}\.(?:\s|$)|aphorism\s+\d+)", re.IGNORECASE)
+SENTENCE_END_RE = re.compile(r"(?:(?<=[.!?;])|(?<=[.!?;][\"'»”’)\]]))\s+")
+PUNCT_RE = re.compile(r"[^\w\s]")
+
+# Upper-case headings only, so "the first book" in running prose is not a chapter
+ORDINALS = ["FIRST", "SECOND", "THIRD", "FOURTH", "FIFTH", "SIXTH", "SEVENTH", "EIGHTH", "NINTH", "TENTH"]
+_ORDINAL = "|".join(ORDINALS)
+_HEADING = "CHAPTER|PART|ESSAY|BOOK|DIVISION"
+CHAPTER_RE = re.compile(
+    rf"\b(?:(?:{_HEADING})\s+(?P<number>[IVXLC]{{1,8}}|\d{{1,3}}|{_ORDINAL})"
+    rf"|(?P<ordinal>{_ORDINAL})\s+(?:{_HEADING}))\b"
+)
+ROMAN_VALUES = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+
+# Helper: Split text into chunks
+def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        chunk = text[start:end]
+        chunks.append(chunk)
+        start += chunk_size - overlap
+    return chunks
+
+
+def load_tokenizer(name: str = DEFAULT_TOKENIZER):
+    """
+    Load the Hugging Face ``tokenizers`` tokenizer matching the embedding model.
+
+    Args:
+        name (str): Hub id or local ``tokenizer.json`` path.
+
+    Returns:
+        tokenizers.Tokenizer: Tokenizer whose encodings expose character offsets.
+    """
+    from tokenizers import Tokenizer
+
+    if os.path.isfile(name):
+        return Tokenizer.from_file(name)
+    return Tokenizer.from_pretrained(name)
+
+
+def iter_decoded(file_path: str, window_bytes: int = WINDOW_BYTES) -> Iterator[str]:
+    """
+    Decode a UTF-8 file from a read-only memory map, one window at a time.
+
+    Newlines are translated exactly like ``open(..., "r")`` would (``\\r\\n`` and ``\\r``
+    become ``\\n``), including pairs that straddle two windows.
+    """
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            decoder = io.IncrementalNewlineDecoder(
+                codecs.getincrementaldecoder("utf-8")(), translate=True
+            )
+            for offset in range(0, len(mm), window_bytes):
+                piece = decoder.decode(mm[offset:offset + window_bytes])
+                if piece:
+                    yield piece
+
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+
+
+def _normalized(pieces: Iterator[str]) -> Iterator[str]:
+    """Apply ``text.strip().replace("\\n", " ")`` lazily (trailing strip is left to the caller)."""
+    started = False
+    for piece in pieces:
+        piece = piece.replace("\n", " ")
+        if not started:
+            piece = piece.lstrip()
+            if not piece:
+                continue
+            started = True
+        yield piece
+
+
+def _char_chunks(pieces: Iterator[str], chunk_size: int, overlap: int) -> Iterator[str]:
+    step = chunk_size - overlap
+    buf = ""  # Text from the start of the next chunk onward
+
+    for piece in _normalized(pieces):
+        buf += piece
+        # Only text before the last non-space character is guaranteed to survive
+        # the final strip, so never emit a chunk that reaches past it.
+        confirmed = len(buf.rstrip())
+        while confirmed >= chunk_size:
+            yield buf[:chunk_size]
+            buf = buf[step:]
+            confirmed -= step
+
+    buf = buf.rstrip()
+    while buf:
+        yield buf[:chunk_size]
+        buf = buf[step:]
+
+
+def _token_chunks(
+    pieces: Iterator[str],
+    chunk_size: int,
+    overlap: int,
+    tokenizer,
+    max_untokenized: int,
+) -> Iterator[str]:
+    step = chunk_size - overlap
+    buf = ""      # Text from absolute offset `origin` onward
+    origin = 0
+    tokenized = 0  # Absolute offset up to which `buf` has been tokenized
+    spans = deque()  # Absolute (start, end) character spans of pending tokens
+
+    def tokenize(segment: str, base: int) -> None:
+        encoding = tokenizer.encode(segment, add_special_tokens=False)
+        spans.extend((base + s, base + e) for s, e in encoding.offsets)
+
+    for piece in _normalized(pieces):
+        buf += piece
+
+        # Tokenize up to the last space so no word is split across two encode calls
+        tail_start = tokenized - origin
+        cut = buf.rfind(" ", tail_start)
+        if cut <= tail_start:
+            if len(buf) - tail_start < max_untokenized:
+                continue
+            cut = len(buf)  # Pathological run without spaces: keep memory bounded
+        tokenize(buf[tail_start:cut], tokenized)
+        tokenized = origin + cut
+
+        while len(spans) >= chunk_size:
+            yield buf[spans[0][0] - origin:spans[chunk_size - 1][1] - origin]
+            for _ in range(step):
+                spans.popleft()
+            new_origin = spans[0][0] if spans else tokenized
+            buf = buf[new_origin - origin:]
+            origin = new_origin
+
+    rest = buf[tokenized - origin:].rstrip()
+    if rest:
+        tokenize(rest, tokenized)
+
+    while spans:
+        last = spans[min(chunk_size, len(spans)) - 1]
+        yield buf[spans[0][0] - origin:last[1] - origin]
+        for _ in range(min(step, len(spans))):
+            spans.popleft()
+
+
+def stream_chunks(
+    file_path: str,
+    chunk_size: int = CHUNK_SIZE,
+    overlap: int = CHUNK_OVERLAP,
+    unit: str = "char",
+    tokenizer=None,
+    window_bytes: int = WINDOW_BYTES,
+) -> Iterator[str]:
+    """
+    Lazily chunk a UTF-8 text file without loading it into memory.
+
+    With ``unit="char"`` the output is identical to
+    ``chunk_text(open(path).read().strip().replace("\\n", " "), chunk_size, overlap)``.
+    With ``unit="token"`` sizes and overlaps are counted in tokenizer tokens and each
+    chunk is the original text spanned by its tokens.
+
+    Args:
+        file_path (str): Path to the text file.
+        chunk_size (int): Chunk length in characters or tokens.
+        overlap (int): Overlap between consecutive chunks, in the same unit.
+        unit (str): ``"char"`` or ``"token"``.
+        tokenizer: ``tokenizers.Tokenizer`` for token units (defaults to MiniLM's).
+        window_bytes (int): Bytes decoded from the memory map per step.
+
+    Yields:
+        str: Consecutive overlapping chunks.
+    """
+    if not 0 <= overlap < chunk_size:
+        raise ValueError(f"overlap must be in [0, chunk_size), got {overlap} for size {chunk_size}")
+
+    pieces = iter_decoded(file_path, window_bytes=window_bytes)
+
+    if unit == "char":
+        return _char_chunks(pieces, chunk_size, overlap)
+    if unit == "token":
+        tokenizer = tokenizer or load_tokenizer()
+        return _token_chunks(pieces, chunk_size, overlap, tokenizer, max_untokenized=window_bytes * 4)
+    raise ValueError(f"Unsupported chunk unit: {unit}")
+
+
+def chunk_file(file_path: str, **kwargs) -> List[str]:
+    """Materialize ``stream_chunks`` for callers that need the full list (e.g. id derivation)."""
+    return list(stream_chunks(file_path, **kwargs))
+
+
+def approx_token_count(text: str) -> int:
+    """Cheap token estimate: words and punctuation marks, close to a wordpiece count for prose."""
+    return len(text.split()) + len(PUNCT_RE.findall(text))
+
+
+def roman_to_int(numeral: str) -> int:
+    """Value of an upper-case Roman numeral ("XIV" -> 14)."""
+    total = 0
+    for i, char in enumerate(numeral):
+        value = ROMAN_VALUES[char]
+        if i + 1 < len(numeral) and ROMAN_VALUES[numeral[i + 1]] > value:
+            total -= value
+        else:
+            total += value
+    return total
+
+
+def _chapter_number(match: "re.Match") -> int:
+    token = match.group("number") or match.group("ordinal")
+    if token.isdigit():
+        return int(token)
+    if token in ORDINALS:
+        return ORDINALS.index(token) + 1
+    return roman_to_int(token)
+
+
+def chapter_labels(chunks: Iterable[str]) -> List[int]:
+    """
+    Chapter number of each chunk, in order (0 = front matter before any heading).
+
+    Headings are numbered from their own text ("CHAPTER IX" -> 9), not by counting,
+    so a table of contents listing every chapter does not shift the numbering. A
+    chunk belongs to a heading that starts in its first half, otherwise to the
+    chapter it opened in.
+    """
+    labels = []
+    current = 0
+    for chunk in chunks:
+        label = current
+        for match in CHAPTER_RE.finditer(chunk):
+            current = _chapter_number(match)
+            if match.start() < len(chunk) // 2:
+                label = current
+        labels.append(label)
+    return labels
+
+
+BLANK_LINE_RE = re.compile(rb"\n[ \t\r]*\n")
+
+
+def _has_blank_lines(file_path: str) -> bool:
+    with open(file_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return BLANK_LINE_RE.search(mm) is not None
+
+
+def split_paragraphs(lines: Iterable[str], join_wrapped: bool) -> Iterator[str]:
+    """
+    Group lines into paragraphs.
+
+    With ``join_wrapped`` (hard-wrapped text such as Project Gutenberg books) consecutive
+    lines are joined and paragraphs end at blank lines or before an aphorism heading, so
+    sentences broken across lines come out whole. Otherwise every non-empty line is a
+    paragraph (text converted from EPUB, one paragraph per line).
+    """
+    block: List[str] = []
+    for line in lines:
+        line = line.strip()
+        if not join_wrapped:
+            if line:
+                yield line
+            continue
+        if (not line or APHORISM_RE.match(line)) and block:
+            yield " ".join(block)
+            block = []
+        if line:
+            block.append(line)
+    if block:
+        yield " ".join(block)
+
+
+def _iter_lines(file_path: str, window_bytes: int) -> Iterator[str]:
+    pending = ""
+    for piece in iter_decoded(file_path, window_bytes=window_bytes):
+        lines = (pending + piece).split("\n")
+        pending = lines.pop()
+        yield from lines
+    yield pending
+
+
+def iter_paragraphs(file_path: str, window_bytes: int = WINDOW_BYTES) -> Iterator[str]:
+    """
+    Yield the paragraphs of a file streamed from a memory map.
+
+    Files containing blank lines are treated as hard-wrapped: lines are joined into
+    blank-line-separated paragraphs. Files without any are one paragraph per line.
+    """
+    return split_paragraphs(_iter_lines(file_path, window_bytes), join_wrapped=_has_blank_lines(file_path))
+
+
+def _split_long(text: str, target_tokens: int, count_tokens: Callable[[str], int]) -> List[str]:
+    """Split an oversized paragraph on sentence ends, then on words as a last resort."""
+    pieces = []
+    for sentence in SENTENCE_END_RE.split(text):
+        if not sentence:
+            continue
+        if count_tokens(sentence) <= target_tokens:
+            pieces.append(sentence)
+            continue
+        words = sentence.split(" ")
+        current: List[str] = []
+        for word in words:
+            if current and count_tokens(" ".join(current + [word])) > target_tokens:
+                pieces.append(" ".join(current))
+                current = []
+            current.append(word)
+        if current:
+            pieces.append(" ".join(current))
+    return pieces
+
+
+def structured_chunks(
+    paragraphs: Iterable[str],
+    target_tokens: int = TARGET_TOKENS,
+    overlap_tokens: int = OVERLAP_TOKENS,
+    count_tokens: Optional[Callable[[str], int]] = None,
+) -> Iterator[str]:
+    """
+    Pack paragraphs into chunks of about ``target_tokens`` on structural boundaries.
+
+    Rules, in order of precedence:
+        - an aphorism heading ("125.", "§ 12", ...) starts a new chunk once the current
+          one holds at least half the target, so short aphorisms are not glued to a
+          long neighbour;
+        - paragraphs are never split unless they alone exceed the target, in which
+          case they are split on sentence ends;
+        - consecutive chunks within the same aphorism share their last sentence when
+          it fits in ``overlap_tokens``; nothing is repeated across aphorisms.
+
+    Args:
+        paragraphs (iterable): Paragraphs (or lines) of a book, in order.
+        target_tokens (int): Maximum tokens per chunk.
+        overlap_tokens (int): Maximum tokens carried over into the next chunk.
+        count_tokens (callable): Token counter; defaults to ``approx_token_count``.
+
+    Yields:
+        str: Chunks whose paragraphs are joined by newlines.
+    """
+    count_tokens = count_tokens or approx_token_count
+    units: List[str] = []     # Sentences/paragraphs in the current chunk
+    unit_tokens: List[int] = []
+    total = 0
+
+    def flush(carry: bool) -> Iterator[str]:
+        nonlocal units, unit_tokens, total
+        if not units:
+            return
+        yield "\n".join(units)
+        if carry and unit_tokens[-1] <= overlap_tokens and len(units) > 1:
+            units, unit_tokens = units[-1:], unit_tokens[-1:]
+            total = unit_tokens[0]
+        else:
+            units, unit_tokens, total = [], [], 0
+
+    for paragraph in paragraphs:
+        new_aphorism = bool(APHORISM_RE.match(paragraph))
+        if new_aphorism and total >= target_tokens // 2:
+            yield from flush(carry=False)
+
+        tokens = count_tokens(paragraph)
+        pieces = [paragraph] if tokens <= target_tokens else _split_long(paragraph, target_tokens, count_tokens)
+        for i, piece in enumerate(pieces):
+            piece_tokens = tokens if len(pieces) == 1 else count_tokens(piece)
+            if units and total + piece_tokens > target_tokens:
+                # The last unit belongs to the previous aphorism when this piece opens a new one
+                yield from flush(carry=not (new_aphorism and i == 0))
+                if units and total + piece_tokens > target_tokens:
+                    # The carried sentence plus this piece would still overflow
+                    units, unit_tokens, total = [], [], 0
+            units.append(piece)
+            unit_tokens.append(piece_tokens)
+            total += piece_tokens
+
+    yield from flush(carry=False)
+
+
+def chunk_structured(text: str, **kwargs) -> List[str]:
+    """``structured_chunks`` over an in-memory text, with the paragraph rules of ``iter_paragraphs``."""
+    join_wrapped = BLANK_LINE_RE.search(text.encode("utf-8")) is not None
+    return list(structured_chunks(split_paragraphs(text.splitlines(), join_wrapped), **kwargs))
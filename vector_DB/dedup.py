@@ -0,0 +1,197 @@
+"""
+MinHash / LSH near-duplicate detection for ingestion.
+
+The library holds several editions and translations of the same works, and every
+Gutenberg/EPUB file repeats the same front matter and licence text. Each chunk is
+reduced to a MinHash signature over its word 5-gram shingles; signatures are split
+into LSH bands so only chunks sharing a band are compared, and a pair whose
+estimated Jaccard similarity reaches the threshold is a duplicate.
+
+Which copy survives is a policy:
+    - ``"first"``: the copy indexed first wins (earlier file name on a fresh build,
+      the already stored copy on incremental runs);
+    - ``"longest"``: the longest text wins; a longer newcomer replaces the stored copy.
+
+Duplicates are found most reliably with the structured chunker, whose chunks start
+on paragraph boundaries; fixed 500-character windows of the same text in two books
+are usually shifted against each other and only match when the shift is small.
+"""
+
+import os
+import json
+import zlib
+import logging
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from vector_DB.lexical import tokenize
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+SHINGLE_WORDS = 5
+DEDUP_THRESHOLD = 0.8
+DEDUP_KEEP = "first"
+KEEP_POLICIES = ("first", "longest")
+MINHASH_SEED = 1
+LSH_MARGIN = 0.05  # Aim the LSH S-curve below the threshold: candidates are verified anyway
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_WORDS) -> np.ndarray:
+    """CRC32 of every word ``size``-gram (stable across processes, unlike ``hash``)."""
+    words = tokenize(text)
+    if len(words) <= size:
+        shingles = [" ".join(words)]
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64))
+
+
+def lsh_params(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """
+    Pick ``(bands, rows)`` with ``bands * rows == num_perm``.
+
+    The S-curve midpoint ``(1 / bands) ** (1 / rows)`` is placed as high as possible
+    while staying ``LSH_MARGIN`` below the threshold, so true duplicates almost always
+    share a band and few dissimilar chunks have to be compared.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    midpoint = {br: (1.0 / br[0]) ** (1.0 / br[1]) for br in options}
+    below = [br for br in options if midpoint[br] <= threshold - LSH_MARGIN]
+    if not below:
+        return min(options, key=midpoint.get)
+    return max(below, key=midpoint.get)
+
+
+class MinHasher:
+    """MinHash signatures from multiply-shift hashing of 32-bit shingle hashes."""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = MINHASH_SEED):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        """(num_perm,) uint32 signature; products wrap modulo 2**64 by design."""
+        x = shingle_hashes(text)[:, None]
+        return ((x * self.a + self.b) >> np.uint64(32)).min(axis=0).astype(np.uint32)
+
+
+class NearDuplicateIndex:
+    """
+    LSH index over the signatures of stored chunks.
+
+    Attributes:
+        threshold (float): Minimum estimated Jaccard similarity of a duplicate.
+        keep (str): Keep policy, ``"first"`` or ``"longest"``.
+    """
+
+    def __init__(self, threshold: float = DEDUP_THRESHOLD, keep: str = DEDUP_KEEP, num_perm: int = NUM_PERM):
+        if keep not in KEEP_POLICIES:
+            raise ValueError(f"Unsupported keep policy: {keep}")
+        self.threshold = threshold
+        self.keep = keep
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+
+        self.ids: List[Optional[str]] = []  # None marks a removed row
+        self.sources: List[str] = []
+        self.lengths: List[int] = []
+        self.signatures: List[np.ndarray] = []
+        self._row_of: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+
+    @property
+    def config(self) -> dict:
+        return {"threshold": self.threshold, "keep": self.keep, "num_perm": self.hasher.num_perm}
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, chunk_id: str, source: str, length: int, signature: np.ndarray) -> None:
+        row = len(self.ids)
+        self.ids.append(chunk_id)
+        self.sources.append(source)
+        self.lengths.append(length)
+        self.signatures.append(signature)
+        self._row_of[chunk_id] = row
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(key, []).append(row)
+
+    def remove(self, ids) -> None:
+        """Forget chunks (deleted from the collection or about to be re-checked)."""
+        for chunk_id in ids:
+            row = self._row_of.pop(chunk_id, None)
+            if row is not None:
+                self.ids[row] = None
+
+    def find(self, signature: np.ndarray) -> Optional[int]:
+        """Row of the most similar live chunk at or above the threshold, if any."""
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+
+        best_row, best_similarity = None, self.threshold
+        for row in candidates:
+            if self.ids[row] is None:
+                continue
+            similarity = float(np.mean(self.signatures[row] == signature))
+            if similarity >= best_similarity:
+                best_row, best_similarity = row, similarity
+        return best_row
+
+    def check(self, chunk_id: str, source: str, length: int,
+              signature: np.ndarray) -> Tuple[bool, Optional[str], Optional[str]]:
+        """
+        Decide whether a chunk is stored, registering it when it is.
+
+        Args:
+            chunk_id (str): Id of the chunk.
+            source (str): Book the chunk comes from.
+            length (int): Text length, used by the ``"longest"`` policy.
+            signature (np.ndarray): ``MinHasher.signature`` of the chunk text.
+
+        Returns:
+            tuple: ``(keep, other_id, other_source)``. When ``keep`` is False, ``other``
+            is the stored copy it duplicates; when True, ``other`` is the stored copy it
+            replaces (``"longest"`` policy) or None.
+        """
+        match = self.find(signature)
+        if match is None:
+            self.add(chunk_id, source, length, signature)
+            return True, None, None
+
+        other_id, other_source = self.ids[match], self.sources[match]
+        if self.keep == "longest" and length > self.lengths[match]:
+            self.remove([other_id])
+            self.add(chunk_id, source, length, signature)
+            return True, other_id, other_source
+        return False, other_id, other_source
+
+    def save(self, path: str) -> None:
+        """Write live signatures atomically as ``.npz`` (re-indexed on load)."""
+        live = sorted(self._row_of.values())
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            signatures=np.stack([self.signatures[r] for r in live]) if live
+            else np.empty((0, self.hasher.num_perm), dtype=np.uint32),
+            lengths=np.asarray([self.lengths[r] for r in live], dtype=np.int64),
+            ids=np.asarray(json.dumps([self.ids[r] for r in live])),
+            sources=np.asarray(json.dumps([self.sources[r] for r in live])),
+            config=np.asarray(json.dumps(self.config)),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "NearDuplicateIndex":
+        with np.load(path) as data:
+            index = cls(**json.loads(str(data["config"])))
+            ids = json.loads(str(data["ids"]))
+            sources = json.loads(str(data["sources"]))
+            for chunk_id, source, length, signature in zip(ids, sources, data["lengths"], data["signatures"]):
+                index.add(chunk_id, source, int(length), signature)
+        return index
@@ -0,0 +1,59 @@
+"""
+Embedding function factory with explicit control over ONNX Runtime threading.
+
+Chroma's ``DefaultEmbeddingFunction`` (all-MiniLM-L6-v2 on ONNX Runtime) lets the
+runtime grab every core for a single call. That is fine for a one-off script but
+oversubscribes the CPU once chunking workers or API requests run next to it, so
+ingestion and serving build their embedding function here instead.
+"""
+
+import os
+from functools import cached_property
+from typing import Optional
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction, ONNXMiniLM_L6_V2
+
+
+class ThreadedONNXMiniLM(ONNXMiniLM_L6_V2):
+    """
+    all-MiniLM-L6-v2 embedding function with a configurable ONNX Runtime thread pool.
+
+    Attributes:
+        intra_op_threads (int): Threads used inside a single operator (matmuls etc.).
+        inter_op_threads (int): Threads used to run independent operators in parallel.
+    """
+
+    def __init__(self, intra_op_threads: int = 1, inter_op_threads: int = 1):
+        super().__init__(preferred_providers=["CPUExecutionProvider"])
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+
+    @cached_property
+    def model(self):
+        """ONNX Runtime session built with the requested thread counts."""
+        so = self.ort.SessionOptions()
+        so.log_severity_level = 3
+        so.intra_op_num_threads = self.intra_op_threads
+        so.inter_op_num_threads = self.inter_op_threads
+        so.graph_optimization_level = self.ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        return self.ort.InferenceSession(
+            os.path.join(self.DOWNLOAD_PATH, self.EXTRACTED_FOLDER_NAME, "model.onnx"),
+            providers=["CPUExecutionProvider"],
+            sess_options=so,
+        )
+
+
+def get_embedding_function(intra_op_threads: Optional[int] = None, inter_op_threads: int = 1):
+    """
+    Return the MiniLM embedding function used across ingestion and retrieval.
+
+    Args:
+        intra_op_threads (int): ONNX intra-op threads. ``None`` keeps Chroma's default
+            session, which lets ONNX Runtime size the pool to all cores.
+        inter_op_threads (int): ONNX inter-op threads (only used with ``intra_op_threads``).
+
+    Returns:
+        EmbeddingFunction: A callable mapping a list of texts to a list of embeddings.
+    """
+    if intra_op_threads is None:
+        return DefaultEmbeddingFunction()
+    return ThreadedONNXMiniLM(intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads)
@@ -0,0 +1,91 @@
+"""
+Atomic publication of memory-mapped index directories.
+
+API workers memory-map the files of a NumPy index (``embeddings.npy``, ``documents.bin``)
+and of a BM25 index (``post_docs.npy``, ...). Rewriting those files in place corrupts
+every worker that has them mapped: a grown file is read through stale offsets (wrong
+results) and a shrunk one raises SIGBUS on the next page fault.
+
+So an index path is never written to directly. Every build goes into a fresh sibling
+directory (``{path}.v20261019T120000123456``) and ``path`` itself is a symlink that is
+switched to the new build with ``os.replace``, which is atomic. Workers that opened the
+previous version keep reading its unchanged files until they re-open ``path``;
+``prune_versions`` removes old builds (unlinking mapped files is safe, their pages stay
+valid until the last mapping goes away).
+
+A real directory found at ``path`` (written before this scheme) is moved aside as the
+first version on the next publish.
+"""
+
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import List
+
+KEEP_VERSIONS = 2  # The published build and the one before it (workers still draining)
+
+
+def new_version_dir(path: str) -> str:
+    """Create and return an empty versioned build directory next to ``path``."""
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    version_dir = f"{path}.v{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')}"
+    os.makedirs(version_dir)
+    return version_dir
+
+
+def list_versions(path: str) -> List[str]:
+    """Versioned build directories of ``path``, oldest first."""
+    path = os.path.abspath(path)
+    parent, prefix = os.path.dirname(path), f"{os.path.basename(path)}.v"
+    if not os.path.isdir(parent):
+        return []
+    return sorted(
+        os.path.join(parent, name) for name in os.listdir(parent)
+        if name.startswith(prefix) and os.path.isdir(os.path.join(parent, name))
+    )
+
+
+def publish_version_dir(path: str, version_dir: str, keep: int = KEEP_VERSIONS) -> str:
+    """
+    Point ``path`` at a finished build atomically and prune older builds.
+
+    Args:
+        path (str): Stable index path readers open.
+        version_dir (str): Directory returned by ``new_version_dir`` and fully written.
+        keep (int): Builds to keep, including the one just published.
+
+    Returns:
+        str: The published version directory.
+    """
+    path = os.path.abspath(path)
+    if os.path.isdir(path) and not os.path.islink(path):
+        if os.listdir(path):
+            os.replace(path, f"{path}.v00000000T000000000000")  # Legacy in-place index becomes the oldest version
+        else:
+            os.rmdir(path)
+
+    tmp_link = f"{path}.link.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(version_dir), tmp_link)  # Relative, so the tree can be moved
+    os.replace(tmp_link, path)
+    prune_versions(path, keep)
+    return version_dir
+
+
+def prune_versions(path: str, keep: int = KEEP_VERSIONS) -> List[str]:
+    """Delete all but the newest ``keep`` builds; the published one is never deleted."""
+    current = os.path.realpath(path)
+    versions = list_versions(path)
+    removed = []
+    for version_dir in versions[:max(len(versions) - keep, 0)]:
+        if os.path.realpath(version_dir) != current:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            removed.append(version_dir)
+    return removed
+
+
+def resolve(path: str) -> str:
+    """The version directory ``path`` currently points to, so one load reads a single build."""
+    return os.path.realpath(path)
@@ -0,0 +1,306 @@
+"""
+Background ingestion of uploaded books into the collection being served.
+
+``POST /ingest`` only stores the upload and enqueues a job; a single worker thread
+converts EPUBs to text, chunks the book with the offline chunker, embeds and
+upserts it in small batches. Two throttles keep queries within their latency SLO
+while a book streams in:
+
+- the worker embeds with its own ONNX session limited to ``intra_op_threads``
+  (1 by default) instead of the all-core session queries use, and
+- writes are paced to at most ``max_chunks_per_s`` chunks per second, so Chroma's
+  write lock and the page cache are only ever held briefly.
+
+Books are written into the books folder and recorded in the ingestion manifest
+with the same chunk ids ``vector_DB.chroma_db`` derives, so a later offline run
+sees them as already ingested (and an edited re-upload only touches changed
+chunks). The chunker, metadata fields and near-duplicate settings are taken from
+the collection's manifest, so uploads are chunked and deduplicated exactly like
+the offline build; books that deferred to chunks an edited re-upload no longer
+has are re-checked by the next offline run that sees a library change.
+
+Live upserts are visible to the ``chroma`` retrieval backend right away; the
+NumPy/snapshot backends and the BM25 index only see them after they are rebuilt,
+which ``on_job_done`` can trigger.
+"""
+
+import os
+import time
+import uuid
+import queue
+import shutil
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional
+from vector_DB.chroma_db import (
+    CHUNKER, METADATA_FIELDS, chunk_ids_for, chunk_metadatas, dedup_book, default_dedup_path, default_manifest_path,
+    delete_ids, drop_replaced, file_sha256, get_collection, load_manifest, read_and_chunk, save_manifest,
+)
+from vector_DB.dedup import NearDuplicateIndex
+from vector_DB.embeddings import get_embedding_function
+
+logger = logging.getLogger(__name__)
+
+INGEST_BATCH_SIZE = 16
+INGEST_MAX_CHUNKS_PER_S = 200.0
+INGEST_INTRA_OP_THREADS = 1
+MAX_FINISHED_JOBS = 100  # Finished jobs kept for status queries
+SUPPORTED_EXTENSIONS = (".txt", ".epub")
+
+
+class IngestJob:
+    """Progress of one uploaded book."""
+
+    def __init__(self, filename: str, upload_path: str):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.upload_path = upload_path
+        self.status = "queued"  # queued -> converting -> chunking -> embedding -> done | failed
+        self.chunks_total = 0
+        self.chunks_done = 0
+        self.chunks_unchanged = 0
+        self.chunks_deleted = 0
+        self.chunks_duplicate = 0
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """JSON-serializable progress, including throughput once embedding started."""
+        elapsed = ((self.finished or time.time()) - self.started) if self.started else 0.0
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "chunks_total": self.chunks_total,
+            "chunks_done": self.chunks_done,
+            "chunks_unchanged": self.chunks_unchanged,
+            "chunks_deleted": self.chunks_deleted,
+            "chunks_duplicate": self.chunks_duplicate,
+            "progress": round(self.chunks_done / self.chunks_total, 3) if self.chunks_total else 0.0,
+            "chunks_per_s": round(self.chunks_done / elapsed, 1) if elapsed else 0.0,
+            "queued_s": round((self.started or time.time()) - self.created, 3),
+            "elapsed_s": round(elapsed, 3),
+            "error": self.error,
+        }
+
+
+class IngestQueue:
+    """
+    Single-worker job queue that ingests uploaded books at a throttled rate.
+
+    Usage:
+        >>> jobs = IngestQueue(books_folder, db_path, lambda: "nietzsche_books")
+        >>> job = jobs.submit("ecce_homo.epub", "/tmp/uploads/ecce_homo.epub")
+        >>> jobs.get(job.id).to_dict()["progress"]
+    """
+
+    def __init__(
+        self,
+        books_folder: str,
+        db_path: str,
+        collection_name: Callable[[], str],
+        batch_size: int = INGEST_BATCH_SIZE,
+        max_chunks_per_s: float = INGEST_MAX_CHUNKS_PER_S,
+        intra_op_threads: Optional[int] = INGEST_INTRA_OP_THREADS,
+        chunker: str = CHUNKER,
+        on_job_done: Optional[Callable[[IngestJob], None]] = None,
+    ):
+        """
+        Args:
+            books_folder (str): Library folder the converted books are written to.
+            db_path (str): Path to the ChromaDB storage folder.
+            collection_name: Returns the collection to write to at job start (the
+                alias target can change between jobs).
+            batch_size (int): Chunks per embedding call and upsert.
+            max_chunks_per_s (float): Upper bound on the write rate (0 = unthrottled).
+            intra_op_threads (int): ONNX threads of the ingestion session.
+            chunker (str): Chunker for a collection whose manifest does not record one
+                (otherwise the manifest's chunker is used).
+            on_job_done: Called on the worker thread after a job succeeded
+                (e.g. to rebuild the BM25 index and swap the serving index).
+        """
+        self.books_folder = books_folder
+        self.db_path = db_path
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.max_chunks_per_s = max_chunks_per_s
+        self.intra_op_threads = intra_op_threads
+        self.chunker = chunker
+        self.on_job_done = on_job_done
+        self.chunks_written = 0
+        self.write_seconds = 0.0
+
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._jobs_lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._embedding_fn = None
+        self._thread = threading.Thread(target=self._run, name="ingest-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, filename: str, upload_path: str) -> IngestJob:
+        """Enqueue an uploaded file; returns immediately."""
+        if not filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise ValueError(f"Unsupported file type: {filename} (expected {', '.join(SUPPORTED_EXTENSIONS)})")
+        job = IngestJob(os.path.basename(filename), upload_path)
+        with self._jobs_lock:
+            self._jobs[job.id] = job
+            self._forget_finished()
+        self._queue.put(job)
+        logger.info(f"Queued ingest job {job.id} for {job.filename}")
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._jobs_lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """Queue depth, job counts by status and the worker's overall write throughput."""
+        with self._jobs_lock:
+            jobs = list(self._jobs.values())
+        by_status = {}
+        for job in jobs:
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "queued": self._queue.qsize(),
+            "jobs": by_status,
+            "chunks_written": self.chunks_written,
+            "chunks_per_s": round(self.chunks_written / self.write_seconds, 1) if self.write_seconds else 0.0,
+            "max_chunks_per_s": self.max_chunks_per_s,
+        }
+
+    def jobs(self) -> List[dict]:
+        with self._jobs_lock:
+            return [job.to_dict() for job in self._jobs.values()]
+
+    def _forget_finished(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            job.started = time.time()
+            try:
+                self._ingest(job)
+                job.status = "done"
+            except Exception as e:
+                logger.exception(f"Ingest job {job.id} ({job.filename}) failed")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished = time.time()
+                if os.path.exists(job.upload_path):
+                    os.remove(job.upload_path)
+            logger.info(f"Ingest job finished: {job.to_dict()}")
+            if job.status == "done" and self.on_job_done is not None:
+                try:
+                    self.on_job_done(job)
+                except Exception:
+                    logger.exception(f"Post-ingest hook failed for job {job.id}")
+
+    def _ingest(self, job: IngestJob) -> None:
+        os.makedirs(self.books_folder, exist_ok=True)
+        if job.filename.lower().endswith(".epub"):
+            job.status = "converting"
+            from inference.ebooks import epub_to_txt  # ebooklib/bs4 only needed for EPUB uploads
+
+            job.filename = os.path.splitext(job.filename)[0] + ".txt"
+            book_path = os.path.join(self.books_folder, job.filename)
+            epub_to_txt(job.upload_path, f"{book_path}.tmp")
+        else:
+            book_path = os.path.join(self.books_folder, job.filename)
+            # The upload dir and the books folder can be on different filesystems: copy across, then rename
+            shutil.move(job.upload_path, f"{book_path}.tmp")
+        os.replace(f"{book_path}.tmp", book_path)
+
+        job.status = "chunking"
+        collection_name = self.collection_name()
+        collection = get_collection(self.db_path, collection_name)
+        manifest_path = default_manifest_path(self.db_path, collection_name)
+        manifest = load_manifest(manifest_path, collection_name)
+        # Manifests written before these keys existed describe the original build ("source" only)
+        chunker = manifest.get("chunker", self.chunker)
+        fields = manifest.get("metadata_fields", ["source"] if manifest["files"] else METADATA_FIELDS)
+        chunks = read_and_chunk(book_path, chunker=chunker)
+        ids = chunk_ids_for(job.filename, chunks)
+        metadatas = [
+            {key: value for key, value in metadata.items() if key in fields}
+            for metadata in chunk_metadatas(job.filename, chunks)
+        ]
+
+        previous_ids = set(manifest["files"].get(job.filename, {}).get("chunk_ids", []))
+        kept, replaced, dedup = list(range(len(ids))), [], self._load_dedup(manifest, collection_name)
+        if dedup is not None:
+            dedup.remove(previous_ids)
+            signatures = [dedup.hasher.signature(chunk) for chunk in chunks]
+            kept, replaced, _ = dedup_book(dedup, job.filename, chunks, ids, signatures)
+        kept_ids = [ids[i] for i in kept]
+        new_positions = [i for i in kept if ids[i] not in previous_ids]
+        stale_ids = sorted(previous_ids - set(kept_ids))
+        job.chunks_total = len(new_positions)
+        job.chunks_unchanged = len(kept) - len(new_positions)
+        job.chunks_duplicate = len(ids) - len(kept)
+
+        job.status = "embedding"
+        if self._embedding_fn is None:
+            self._embedding_fn = get_embedding_function(intra_op_threads=self.intra_op_threads)
+        for start in range(0, len(new_positions), self.batch_size):
+            batch_start = time.perf_counter()
+            batch = new_positions[start:start + self.batch_size]
+            documents = [chunks[i] for i in batch]
+            collection.upsert(
+                ids=[ids[i] for i in batch],
+                documents=documents,
+                metadatas=[metadatas[i] for i in batch],
+                embeddings=self._embedding_fn(documents),
+            )
+            job.chunks_done += len(batch)
+            self.chunks_written += len(batch)
+            self._throttle(len(batch), batch_start)
+            self.write_seconds += time.perf_counter() - batch_start
+
+        if stale_ids:
+            delete_ids(collection, stale_ids)
+            job.chunks_deleted = len(stale_ids)
+
+        # Re-read so a concurrent offline run's changes are not overwritten wholesale
+        manifest = load_manifest(manifest_path, collection_name)
+        manifest.setdefault("chunker", chunker)
+        manifest.setdefault("metadata_fields", fields)
+        stat = os.stat(book_path)
+        manifest["files"][job.filename] = {
+            "sha256": file_sha256(book_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunk_ids": kept_ids,
+            "duplicates": job.chunks_duplicate,
+        }
+        if replaced:
+            drop_replaced(collection, manifest, replaced)
+            job.chunks_deleted += len(replaced)
+        if dedup is not None:
+            dedup.save(default_dedup_path(self.db_path, collection_name))
+        save_manifest(manifest, manifest_path)
+
+    def _load_dedup(self, manifest: dict, collection_name: str) -> Optional[NearDuplicateIndex]:
+        """The collection's near-duplicate index, or None when it was built without dedup."""
+        if not manifest.get("dedup"):
+            return None
+        dedup_path = default_dedup_path(self.db_path, collection_name)
+        if not os.path.exists(dedup_path):
+            # The next offline run rebuilds the signatures and re-checks every book
+            logger.warning(f"No MinHash signatures at {dedup_path}; ingesting without near-duplicate removal")
+            return None
+        return NearDuplicateIndex.load(dedup_path)
+
+    def _throttle(self, chunks: int, batch_start: float) -> None:
+        """Sleep off whatever is left of this batch's time budget."""
+        if self.max_chunks_per_s <= 0:
+            return
+        remaining = chunks / self.max_chunks_per_s - (time.perf_counter() - batch_start)
+        if remaining > 0:
+            time.sleep(remaining)
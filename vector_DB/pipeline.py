@@ -0,0 +1,199 @@
+"""
+Batched, overlapped embed-and-write stage for vector-store ingestion.
+
+Chunks are pushed in from the caller (typically fed by chunking worker processes),
+embedded in fixed-size batches on a dedicated thread and written to Chroma in bulk
+``upsert`` calls on a second thread. Bounded queues between the stages keep memory
+flat and let embedding of batch N+1 overlap with the write of batch N.
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Fallback when the client does not expose its limit (older Chroma releases)
+DEFAULT_MAX_BATCH_SIZE = 5461
+_SENTINEL = object()
+
+
+def get_max_batch_size(client) -> int:
+    """Return the largest batch the Chroma client accepts in a single add/upsert."""
+    if hasattr(client, "get_max_batch_size"):
+        return client.get_max_batch_size()
+    return getattr(client, "max_batch_size", DEFAULT_MAX_BATCH_SIZE)
+
+
+class IngestStats:
+    """Throughput counters shared by the pipeline stages."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.chunks_submitted = 0
+        self.chunks_embedded = 0
+        self.chunks_written = 0
+        self.embed_batches = 0
+        self.write_calls = 0
+        self.embed_seconds = 0.0
+        self.write_seconds = 0.0
+
+    def summary(self) -> dict:
+        """Return counters plus derived chunks/sec for the whole run and each stage."""
+        elapsed = time.perf_counter() - self.started
+        return {
+            "chunks_written": self.chunks_written,
+            "embed_batches": self.embed_batches,
+            "write_calls": self.write_calls,
+            "elapsed_s": round(elapsed, 3),
+            "embed_s": round(self.embed_seconds, 3),
+            "write_s": round(self.write_seconds, 3),
+            "chunks_per_s": round(self.chunks_written / elapsed, 1) if elapsed else 0.0,
+            "embed_chunks_per_s": (
+                round(self.chunks_embedded / self.embed_seconds, 1) if self.embed_seconds else 0.0
+            ),
+        }
+
+
+class EmbeddingPipeline:
+    """
+    Two-stage embed/write pipeline with fixed embedding batches and bulk writes.
+
+    Usage:
+        >>> pipeline = EmbeddingPipeline(collection, embedding_fn, max_write_batch=get_max_batch_size(client))
+        >>> pipeline.submit(ids, documents, metadatas)
+        >>> stats = pipeline.close()
+    """
+
+    def __init__(
+        self,
+        collection,
+        embedding_fn,
+        embed_batch_size: int = 64,
+        write_batch_size: int = 2048,
+        max_write_batch: int = DEFAULT_MAX_BATCH_SIZE,
+        queue_depth: int = 4,
+        log_every: int = 50,
+    ):
+        """
+        Args:
+            collection: Chroma collection receiving the upserts.
+            embedding_fn: Callable mapping a list of texts to embeddings.
+            embed_batch_size (int): Number of chunks per embedding call.
+            write_batch_size (int): Target number of chunks per ``upsert`` call.
+            max_write_batch (int): Hard limit imposed by the Chroma client.
+            queue_depth (int): Max batches buffered between stages.
+            log_every (int): Log throughput every N embedding batches.
+        """
+        self.collection = collection
+        self.embedding_fn = embedding_fn
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = min(write_batch_size, max_write_batch)
+        self.log_every = log_every
+        self.stats = IngestStats()
+
+        self._pending_ids: List[str] = []
+        self._pending_docs: List[str] = []
+        self._pending_metas: List[dict] = []
+        self._embed_queue = queue.Queue(maxsize=queue_depth)
+        self._write_queue = queue.Queue(maxsize=queue_depth)
+        self._error: Optional[BaseException] = None
+
+        self._embed_thread = threading.Thread(target=self._embed_loop, name="ingest-embed", daemon=True)
+        self._write_thread = threading.Thread(target=self._write_loop, name="ingest-write", daemon=True)
+        self._embed_thread.start()
+        self._write_thread.start()
+
+    def submit(self, ids: List[str], documents: List[str], metadatas: List[dict]) -> None:
+        """Queue chunks for embedding; full batches are handed to the embed thread."""
+        self._raise_if_failed()
+        self._pending_ids.extend(ids)
+        self._pending_docs.extend(documents)
+        self._pending_metas.extend(metadatas)
+        self.stats.chunks_submitted += len(ids)
+
+        while len(self._pending_ids) >= self.embed_batch_size:
+            self._dispatch(self.embed_batch_size)
+
+    def close(self) -> dict:
+        """Flush the partial batch, wait for both stages and return the throughput summary."""
+        if self._pending_ids:
+            self._dispatch(len(self._pending_ids))
+        self._embed_queue.put(_SENTINEL)
+        self._embed_thread.join()
+        self._write_thread.join()
+        self._raise_if_failed()
+
+        summary = self.stats.summary()
+        logger.info(f"Ingestion pipeline finished: {summary}")
+        return summary
+
+    def _dispatch(self, size: int) -> None:
+        batch = (self._pending_ids[:size], self._pending_docs[:size], self._pending_metas[:size])
+        del self._pending_ids[:size], self._pending_docs[:size], self._pending_metas[:size]
+        self._embed_queue.put(batch)
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Ingestion pipeline failed") from self._error
+
+    def _embed_loop(self) -> None:
+        while True:
+            batch = self._embed_queue.get()
+            if batch is _SENTINEL:
+                self._write_queue.put(_SENTINEL)
+                return
+            if self._error is not None:
+                continue  # Drain without work so producers never block
+
+            ids, docs, metas = batch
+            try:
+                start = time.perf_counter()
+                embeddings = self.embedding_fn(docs)
+                self.stats.embed_seconds += time.perf_counter() - start
+            except BaseException as e:
+                logger.error(f"Embedding batch failed: {e}")
+                self._error = e
+                continue
+
+            self.stats.chunks_embedded += len(ids)
+            self.stats.embed_batches += 1
+            if self.stats.embed_batches % self.log_every == 0:
+                logger.info(f"Ingestion throughput: {self.stats.summary()}")
+            self._write_queue.put((ids, docs, metas, embeddings))
+
+    def _write_loop(self) -> None:
+        ids, docs, metas, embeddings = [], [], [], []
+        while True:
+            item = self._write_queue.get()
+            if item is _SENTINEL:
+                if ids and self._error is None:
+                    self._write(ids, docs, metas, embeddings)
+                return
+            if self._error is not None:
+                continue
+
+            ids.extend(item[0])
+            docs.extend(item[1])
+            metas.extend(item[2])
+            embeddings.extend(item[3])
+
+            while len(ids) >= self.write_batch_size and self._error is None:
+                n = self.write_batch_size
+                self._write(ids[:n], docs[:n], metas[:n], embeddings[:n])
+                del ids[:n], docs[:n], metas[:n], embeddings[:n]
+
+    def _write(self, ids, docs, metas, embeddings) -> None:
+        try:
+            start = time.perf_counter()
+            self.collection.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=embeddings)
+            self.stats.write_seconds += time.perf_counter() - start
+        except BaseException as e:
+            logger.error(f"Bulk upsert of {len(ids)} chunks failed: {e}")
+            self._error = e
+            return
+
+        self.stats.chunks_written += len(ids)
+        self.stats.write_calls += 1
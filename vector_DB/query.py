@@ -6,6 +6,7 @@ from typing import List, Dict, Optional
 from dotenv import load_dotenv
 from groq import Groq, GroqError
 import argparse
+from vector_DB.chroma_client import persistent_client
 
 # Load environment variables from .env
 load_dotenv()
@@ -28,7 +29,7 @@ def query_chromadb(persist_directory, collection_name, query_text, n_results=3):
         dict: Query results containing IDs, documents, and metadata.
     """
     # Load the persisted ChromaDB client
-    client = chromadb.PersistentClient(path=persist_directory)
+    client = persistent_client(persist_directory)
 
     # Get the collection
     collection = client.get_collection(name=collection_name)
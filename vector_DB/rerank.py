@@ -0,0 +1,141 @@
+"""
+CPU cross-encoder reranking of retrieved chunks.
+
+Vector (or hybrid) search retrieves a wide candidate set; a small ONNX cross-encoder
+(e.g. ``cross-encoder/ms-marco-MiniLM-L-6-v2`` exported to ONNX) then scores every
+(query, chunk) pair in one batched ``session.run`` and only the best few chunks go
+into the prompt. Scores are cached per (query, chunk id) with LRU eviction, so
+repeated questions and shared candidates skip the model entirely.
+
+The model directory must contain ``model.onnx`` and the matching ``tokenizer.json``.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAX_LENGTH = 256
+CACHE_SIZE = 8192
+
+
+class CrossEncoderReranker:
+    """
+    Batched ONNX cross-encoder with an LRU score cache.
+
+    Attributes:
+        max_length (int): Token limit for each (query, chunk) pair.
+        cache_size (int): Maximum cached (query, chunk id) scores.
+        hits (int): Cache hits since startup.
+        misses (int): Cache misses since startup.
+    """
+
+    def __init__(
+        self,
+        model_dir: str,
+        max_length: int = MAX_LENGTH,
+        cache_size: int = CACHE_SIZE,
+        intra_op_threads: Optional[int] = None,
+    ):
+        """
+        Args:
+            model_dir (str): Directory containing ``model.onnx`` and ``tokenizer.json``.
+            max_length (int): Truncation length of each pair.
+            cache_size (int): LRU capacity in scores.
+            intra_op_threads (int): ONNX intra-op threads (None = runtime default).
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads is not None:
+            so.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model.onnx"), sess_options=so, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def clear_cache(self) -> None:
+        """Drop every cached score (e.g. after the corpus changed)."""
+        with self._lock:
+            self._cache.clear()
+
+    def _predict(self, query: str, documents: List[str]) -> List[float]:
+        import numpy as np
+
+        encodings = self.tokenizer.encode_batch([(query, doc) for doc in documents])
+        feed = {
+            "input_ids": np.asarray([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.asarray([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.asarray([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in feed.items() if k in self.input_names})[0]
+        return logits.reshape(len(documents), -1)[:, 0].tolist()
+
+    def score(self, query: str, ids: List[str], documents: List[str]) -> List[float]:
+        """Relevance score per chunk; uncached pairs are scored in a single batch."""
+        scores: List[Optional[float]] = [None] * len(ids)
+        with self._lock:
+            for i, chunk_id in enumerate(ids):
+                cached = self._cache.get((query, chunk_id))
+                if cached is not None:
+                    self._cache.move_to_end((query, chunk_id))
+                    scores[i] = cached
+            missing = [i for i, s in enumerate(scores) if s is None]
+            self.hits += len(ids) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            predicted = self._predict(query, [documents[i] for i in missing])
+            with self._lock:
+                for i, value in zip(missing, predicted):
+                    scores[i] = value
+                    self._cache[(query, ids[i])] = value
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return scores
+
+    def rerank(self, query: str, results: dict, top_n: int) -> dict:
+        """
+        Reorder a single-query retrieval result and keep the ``top_n`` best chunks.
+
+        Args:
+            query (str): The user question.
+            results (dict): Chroma-layout result for one query (``results["ids"][0]`` ...).
+            top_n (int): Chunks to keep.
+
+        Returns:
+            dict: Same layout, reranked; ``distances`` hold the negated cross-encoder score.
+        """
+        ids, documents = results["ids"][0], results["documents"][0]
+        if not ids:
+            return results
+
+        start = time.perf_counter()
+        scores = self.score(query, ids, documents)
+        order = sorted(range(len(ids)), key=lambda i: scores[i], reverse=True)[:top_n]
+        logger.debug(f"Reranked {len(ids)} candidates in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        return {
+            "ids": [[ids[i] for i in order]],
+            "documents": [[documents[i] for i in order]],
+            "metadatas": [[results["metadatas"][0][i] for i in order]],
+            "distances": [[-scores[i] for i in order]],
+        }
@@ -0,0 +1,325 @@
+"""
+Single-file, checksummed snapshots of a retrieval index.
+
+A replica used to need its own Chroma ``PersistentClient`` directory, rebuilt by
+re-running the ingestion. A snapshot packs everything the ``NumpyBackend`` serves
+from into one file that can be copied anywhere and memory-mapped at startup:
+
+    preamble   64 bytes: magic, format version, header offset/length, SHA-256
+    sections   64-byte aligned, back to back:
+                 embeddings    (N, D) float16, L2-normalized, row-major
+                 id_offsets    (N + 1,) uint64 into ids
+                 ids           UTF-8 chunk ids packed back to back
+                 id_order      (N,) int64 rows sorted by id, for lookups by id
+                 doc_offsets   (N + 1,) uint64 into documents
+                 documents     UTF-8 documents packed back to back
+                 meta_<col>    (N,) int32 codes per metadata column (-1 = missing)
+    header     JSON: counts, dtype, section table, metadata value tables, partitions
+
+The SHA-256 covers every byte after the preamble. Loading does not hash the file
+unless asked to (``verify=True``), so opening is just an ``mmap``.
+
+Nothing is copied into the process on load: ids are decoded per row on demand and
+looked up by binary search over ``id_order``. Every ``uvicorn --workers N`` process
+serving the same snapshot therefore maps the same page-cache pages read-only, and
+the index costs its size once per machine rather than once per worker
+(``utils.memory`` reports the unique/shared split).
+
+Usage:
+    python -m vector_DB.snapshot export --persist-dir /path/to/db --out nietzsche.snap
+    python -m vector_DB.snapshot verify nietzsche.snap
+    python -m vector_DB.snapshot import nietzsche.snap --persist-dir /path/to/new_db
+"""
+
+import os
+import json
+import time
+import struct
+import hashlib
+import logging
+import argparse
+import tempfile
+from typing import Dict, Optional, Sequence
+import numpy as np
+from vector_DB.backends import NumpyBackend, export_numpy_index
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_MAGIC = b"NZSNAP\x00\x00"
+SNAPSHOT_VERSION = 1
+PREAMBLE = struct.Struct("<8sIIQQ32s")  # magic, version, reserved, header offset, header length, sha256
+PREAMBLE_SIZE = 64
+ALIGNMENT = 64
+COPY_ROWS = 16384  # Embedding rows copied per write
+
+
+class _HashingWriter:
+    """File wrapper that hashes everything written and pads sections to ``ALIGNMENT``."""
+
+    def __init__(self, f):
+        self.f = f
+        self.sha = hashlib.sha256()
+        self.position = PREAMBLE_SIZE
+
+    def write(self, data: bytes) -> None:
+        self.f.write(data)
+        self.sha.update(data)
+        self.position += len(data)
+
+    def align(self) -> None:
+        padding = -self.position % ALIGNMENT
+        if padding:
+            self.write(b"\x00" * padding)
+
+
+class PackedStrings(Sequence):
+    """Read-only list of strings decoded on access from an offsets array and a UTF-8 blob."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        start, stop = int(self._offsets[row]), int(self._offsets[row + 1])
+        return self._blob[start:stop].tobytes().decode("utf-8")
+
+
+def _directory_size(path: str) -> int:
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files
+    )
+
+
+def write_snapshot(index_dir: str, out_path: str) -> dict:
+    """
+    Pack a ``NumpyBackend`` index directory into a single snapshot file.
+
+    Args:
+        index_dir (str): Directory written by ``export_numpy_index``.
+        out_path (str): Snapshot file to create (written atomically).
+
+    Returns:
+        dict: The snapshot header.
+    """
+    index = NumpyBackend(index_dir)
+    n, dim = index.embeddings.shape
+    sections: Dict[str, dict] = {}
+
+    ids = [chunk_id.encode("utf-8") for chunk_id in index.ids]
+    id_offsets = np.zeros(n + 1, dtype=np.uint64)
+    np.cumsum([len(i) for i in ids], out=id_offsets[1:])
+    id_order = np.asarray(sorted(range(n), key=ids.__getitem__), dtype=np.int64)
+
+    tmp_path = f"{out_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"\x00" * PREAMBLE_SIZE)
+        out = _HashingWriter(f)
+
+        def section(name: str, dtype: str, shape, chunks) -> None:
+            out.align()
+            start = out.position
+            for chunk in chunks:
+                out.write(chunk)
+            sections[name] = {"offset": start, "length": out.position - start, "dtype": dtype, "shape": list(shape)}
+
+        section("embeddings", "float16", (n, dim), (
+            np.ascontiguousarray(index.embeddings[i:i + COPY_ROWS], dtype=np.float16).tobytes()
+            for i in range(0, n, COPY_ROWS)
+        ))
+        section("id_offsets", "uint64", (n + 1,), [id_offsets.tobytes()])
+        section("ids", "uint8", (int(id_offsets[-1]),), ids)
+        section("id_order", "int64", (n,), [id_order.tobytes()])
+        section("doc_offsets", "uint64", (n + 1,), [np.asarray(index._doc_offsets, dtype=np.uint64).tobytes()])
+        section("documents", "uint8", (len(index._documents),), [index._documents.tobytes()])
+        for column, codes in index.columns.items():
+            section(f"meta_{column}", "int32", (n,), [np.asarray(codes, dtype=np.int32).tobytes()])
+
+        header = {
+            "version": SNAPSHOT_VERSION,
+            "collection": index.meta.get("collection"),
+            "count": n,
+            "dimension": dim,
+            "dtype": "float16",
+            "sections": sections,
+            "metadata_columns": list(index.columns),
+            "metadata_values": index.column_values,
+            "partition_column": index.partition_column,
+            "partitions": index.meta.get("partitions", []),
+        }
+        out.align()
+        header_offset = out.position
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        out.write(encoded)
+
+        f.seek(0)
+        f.write(PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, header_offset, len(encoded), out.sha.digest()))
+    os.replace(tmp_path, out_path)
+
+    logger.info(f"Wrote snapshot of {n} chunks to {out_path} ({os.path.getsize(out_path) / 1e6:.1f} MB)")
+    return header
+
+
+def read_preamble(path: str) -> tuple:
+    """Return ``(header_offset, header_length, sha256)`` after checking magic and version."""
+    with open(path, "rb") as f:
+        magic, version, _, header_offset, header_length, digest = PREAMBLE.unpack(f.read(PREAMBLE.size))
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError(f"{path} is not a vector snapshot")
+    if version != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {version} in {path}")
+    return header_offset, header_length, digest
+
+
+def verify_snapshot(path: str, block_size: int = 1 << 24) -> None:
+    """Hash the snapshot body and raise ``ValueError`` if it does not match the preamble."""
+    _, _, expected = read_preamble(path)
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        f.seek(PREAMBLE_SIZE)
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    if digest.digest() != expected:
+        raise ValueError(f"Checksum mismatch in snapshot {path}")
+
+
+class SnapshotBackend(NumpyBackend):
+    """``NumpyBackend`` served straight from a memory-mapped snapshot file."""
+
+    def __init__(self, path: str, embedding_function=None, verify: bool = False):
+        header_offset, header_length, _ = read_preamble(path)
+        if verify:
+            verify_snapshot(path)
+
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        header = json.loads(raw[header_offset:header_offset + header_length].tobytes().decode("utf-8"))
+
+        def section(name: str) -> np.ndarray:
+            spec = header["sections"][name]
+            data = raw[spec["offset"]:spec["offset"] + spec["length"]]
+            return data.view(spec["dtype"]).reshape(spec["shape"])
+
+        self.meta = header
+        self.embeddings = section("embeddings")
+        self.ids = PackedStrings(section("id_offsets"), section("ids"))
+        self._id_order = section("id_order") if "id_order" in header["sections"] else None
+        self._id_to_row = None
+        self._documents = section("documents")
+        self._doc_offsets = section("doc_offsets")
+
+        self.columns = {column: section(f"meta_{column}") for column in header["metadata_columns"]}
+        self.column_values = header["metadata_values"]
+        self.partition_column = header.get("partition_column")
+        self.partitions = {value: (start, stop) for value, start, stop in header.get("partitions", [])}
+
+        self._embedding_function = embedding_function
+
+    def row_of(self, chunk_id: str) -> Optional[int]:
+        """Binary search over ``id_order`` (a dict is built only for snapshots without it)."""
+        if self._id_order is None:
+            if self._id_to_row is None:
+                self._id_to_row = {cid: row for row, cid in enumerate(self.ids)}
+            return self._id_to_row.get(chunk_id)
+
+        target = chunk_id.encode("utf-8")
+        lo, hi = 0, len(self._id_order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ids[int(self._id_order[mid])].encode("utf-8") < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._id_order):
+            row = int(self._id_order[lo])
+            if self.ids[row] == chunk_id:
+                return row
+        return None
+
+
+def export_snapshot(persist_directory: str, collection_name: str, out_path: str,
+                    index_dir: Optional[str] = None) -> dict:
+    """
+    Snapshot a Chroma collection (or an existing NumPy index directory).
+
+    Returns:
+        dict: The snapshot header.
+    """
+    if index_dir:
+        return write_snapshot(index_dir, out_path)
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(out_path))) as tmp:
+        index_dir = os.path.join(tmp, "index")
+        export_numpy_index(persist_directory, collection_name, index_dir, dtype="float16")
+        return write_snapshot(index_dir, out_path)
+
+
+def import_snapshot(path: str, persist_directory: str, collection_name: Optional[str] = None,
+                    verify: bool = True) -> int:
+    """
+    Restore a snapshot into a Chroma collection (for replicas still serving from Chroma).
+
+    Returns:
+        int: Number of chunks written.
+    """
+    from vector_DB.chroma_client import persistent_client
+    from vector_DB.pipeline import get_max_batch_size
+
+    snapshot = SnapshotBackend(path, verify=verify)
+    client = persistent_client(persist_directory)
+    collection = client.get_or_create_collection(name=collection_name or snapshot.meta["collection"])
+    batch = get_max_batch_size(client)
+
+    for start in range(0, snapshot.count(), batch):
+        rows = range(start, min(start + batch, snapshot.count()))
+        collection.upsert(
+            ids=[snapshot.ids[r] for r in rows],
+            embeddings=np.asarray(snapshot.embeddings[start:rows.stop], dtype=np.float32).tolist(),
+            documents=[snapshot.document(r) for r in rows],
+            metadatas=[snapshot.metadata(r) or None for r in rows],
+        )
+    logger.info(f"Imported {snapshot.count()} chunks from {path} into {collection.name}")
+    return snapshot.count()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="Export, verify and import vector-store snapshots")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = commands.add_parser("export", help="Write a collection to a snapshot file")
+    export_cmd.add_argument("--persist-dir", type=str, help="ChromaDB storage folder")
+    export_cmd.add_argument("--collection", type=str, default="nietzsche_books", help="Collection name")
+    export_cmd.add_argument("--index-dir", type=str, default=None, help="Pack an existing NumPy index instead")
+    export_cmd.add_argument("--out", type=str, required=True, help="Snapshot file")
+
+    verify_cmd = commands.add_parser("verify", help="Check a snapshot's checksum and time a cold open")
+    verify_cmd.add_argument("path", type=str)
+
+    import_cmd = commands.add_parser("import", help="Restore a snapshot into a Chroma collection")
+    import_cmd.add_argument("path", type=str)
+    import_cmd.add_argument("--persist-dir", type=str, required=True, help="ChromaDB storage folder")
+    import_cmd.add_argument("--collection", type=str, default=None, help="Collection name (default: original)")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        header = export_snapshot(args.persist_dir, args.collection, args.out, index_dir=args.index_dir)
+        source = args.index_dir or args.persist_dir
+        print(f"✅ {header['count']:,} chunks -> {args.out}: {os.path.getsize(args.out) / 1e6:.1f} MB "
+              f"(source directory {_directory_size(source) / 1e6:.1f} MB)")
+    elif args.command == "verify":
+        start = time.perf_counter()
+        verify_snapshot(args.path)
+        hashed = time.perf_counter() - start
+        start = time.perf_counter()
+        backend = SnapshotBackend(args.path)
+        opened = time.perf_counter() - start
+        print(f"✅ Checksum OK in {hashed:.2f}s; {backend.count():,} chunks opened in {opened * 1000:.1f} ms")
+    else:
+        count = import_snapshot(args.path, args.persist_dir, args.collection)
+        print(f"✅ Imported {count:,} chunks into {args.persist_dir}")